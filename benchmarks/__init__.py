@@ -0,0 +1,93 @@
+"""
+Micro-benchmarks for pylutron_leap.
+
+Each module can be run on its own, e.g. `python -m benchmarks.bench_codec`.
+Timings can be saved as a JSON baseline and compared with later runs, see
+save_baseline() and compare_baseline().
+"""
+
+import json
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Union
+
+CORPUS_DIR = Path(__file__).parent.parent / "tests" / "messages"
+BASELINE_DIR = Path(__file__).parent / "baselines"
+DEFAULT_THRESHOLD = 0.2
+
+
+def load_corpus_lines() -> List[bytes]:
+    """Read every captured message line from tests/messages."""
+    _lines: List[bytes] = []
+    for path in sorted(CORPUS_DIR.glob("*.txt")):
+        for line in path.read_bytes().splitlines():
+            if line.strip():
+                _lines.append(line.strip())
+    return _lines
+
+
+def load_corpus() -> List[Dict[str, Any]]:
+    """Read every captured message from tests/messages as a dict."""
+    return [json.loads(line) for line in load_corpus_lines()]
+
+
+def measure(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Return the best time in seconds for a single call of func."""
+    _timer = timeit.Timer(func)
+    _number, _ = _timer.autorange()
+    return min(_timer.repeat(repeat=repeat, number=_number)) / _number
+
+
+def report(title: str, results: Dict[str, float], per: int = 1) -> None:
+    """Print timings in microseconds per item, relative to the first entry."""
+    print(title)
+    _baseline = next(iter(results.values()))
+    for name, seconds in results.items():
+        print(
+            f"  {name:<24} {seconds / per * 1e6:10.2f} us/msg"
+            f"  {_baseline / seconds:6.2f}x"
+        )
+
+
+def save_baseline(path: Union[str, Path], results: Dict[str, float]) -> None:
+    """Write timings in seconds, by name, to a JSON baseline."""
+    _path = Path(path)
+    _path.parent.mkdir(parents=True, exist_ok=True)
+    _path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def load_baseline(path: Union[str, Path]) -> Dict[str, float]:
+    return json.loads(Path(path).read_text())
+
+
+def compare_baseline(
+    baseline: Dict[str, float],
+    results: Dict[str, float],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> Dict[str, float]:
+    """
+    Print timings next to a baseline and find the regressions.
+
+    A timing regressed when it is more than threshold slower than the
+    baseline, 0.2 being 20%. Returns the ratio to the baseline of each
+    regression, by name. Timings missing from either side are listed but
+    never count as regressions.
+    """
+    _regressions: Dict[str, float] = {}
+    _width = max(len(x) for x in [*baseline, *results])
+    for name in sorted(set(baseline) | set(results)):
+        if name not in results or name not in baseline:
+            _side = "baseline" if name in baseline else "this run"
+            print(f"  {name:<{_width}}  only in {_side}")
+            continue
+
+        _ratio = results[name] / baseline[name]
+        _flag = ""
+        if _ratio > 1 + threshold:
+            _regressions[name] = _ratio
+            _flag = "  REGRESSION"
+        print(
+            f"  {name:<{_width}} {baseline[name] * 1e6:12.2f} us"
+            f" {results[name] * 1e6:12.2f} us {_ratio:6.2f}x{_flag}"
+        )
+    return _regressions
@@ -0,0 +1,26 @@
+"""Compare MessageBodyType-indexed decoding with the LeapMessage Union schema."""
+
+from benchmarks import load_corpus, measure, report
+from pylutron_leap.api.codec import decode_message, load_message
+
+
+def main() -> None:
+    _corpus = load_corpus()
+
+    def _union():
+        for data in _corpus:
+            load_message(data)
+
+    def _indexed():
+        for data in _corpus:
+            decode_message(data)
+
+    report(
+        f"Decoding {len(_corpus)} corpus messages",
+        {"Union schema": measure(_union), "indexed codec": measure(_indexed)},
+        per=len(_corpus),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compare compiled command templates with dumping through the LeapMessage schema."""
+
+import json
+from itertools import count
+
+from benchmarks import measure, report
+from pylutron_leap.api.codec import encode_message, message_schema
+from pylutron_leap.api.enum import CommandType, FanSpeedType
+from pylutron_leap.models.messages import (
+    get_zone_createrequest_fancommand,
+    get_zone_createrequest_lightinglevelcommand,
+)
+
+_TAG = "c66a3051-5355-497f-8958-02f9fb2c607d"
+
+
+def _commands(n: int = 100):
+    _levels = count()
+    for _ in range(n // 2):
+        _msg = get_zone_createrequest_lightinglevelcommand(
+            1845, CommandType.GoToDimmedLevel, next(_levels) % 101
+        )
+        _msg.Header.ClientTag = _TAG
+        yield _msg
+
+        _msg = get_zone_createrequest_fancommand(
+            842, CommandType.GoToFanSpeed, FanSpeedType.Medium
+        )
+        _msg.Header.ClientTag = _TAG
+        yield _msg
+
+
+def main() -> None:
+    def _schema():
+        for msg in _commands():
+            json.dumps(message_schema().dump(msg)).encode("UTF-8")
+
+    def _template():
+        for msg in _commands():
+            encode_message(msg)
+
+    report(
+        "Encoding 100 zone commands (including building the messages)",
+        {"schema dump": measure(_schema), "compiled template": measure(_template)},
+        per=100,
+    )
+
+
+if __name__ == "__main__":
+    main()
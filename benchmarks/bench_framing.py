@@ -0,0 +1,117 @@
+"""
+Compare StreamReader.readline() with LeapLineProtocol framing.
+
+A local socket pair stands in for the bridge and sends the corpus messages,
+untagged, as fast as the client reads them. Framing alone and the full
+LeapProtocol.run() loop, which also parses and routes every message, are
+measured for both paths.
+"""
+
+import asyncio
+import json
+import socket
+import time
+from typing import Awaitable, Callable, Tuple
+
+from benchmarks import load_corpus
+from pylutron_leap.leap import LeapProtocol
+from pylutron_leap.protocol import LeapLineProtocol
+
+MESSAGES = 100_000
+
+Connect = Callable[[socket.socket], Awaitable[Tuple[object, object]]]
+
+
+def _payload() -> Tuple[bytes, int]:
+    _lines = []
+    for message in load_corpus():
+        message["Header"].pop("ClientTag", None)
+        _lines.append(json.dumps(message).encode("UTF-8") + b"\r\n")
+
+    _repeat = MESSAGES // len(_lines) + 1
+    return b"".join(_lines) * _repeat, len(_lines) * _repeat
+
+
+async def _stream(sock: socket.socket) -> Tuple[object, object]:
+    return await asyncio.open_connection(sock=sock, limit=2**20)
+
+
+async def _protocol(sock: socket.socket) -> Tuple[object, object]:
+    _, _protocol = await asyncio.get_running_loop().create_connection(
+        LeapLineProtocol, sock=sock
+    )
+    return _protocol, _protocol
+
+
+async def _send(sock: socket.socket, payload: bytes) -> None:
+    _, _writer = await asyncio.open_connection(sock=sock)
+    _writer.write(payload)
+    await _writer.drain()
+    _writer.close()
+
+
+async def _read_lines(reader, writer) -> int:
+    _count = 0
+    while True:
+        _line = await reader.readline()
+        if not _line:
+            return _count
+        _count += 1
+
+
+async def _run_protocol(reader, writer) -> int:
+    _leap = LeapProtocol(reader, writer)  # type: ignore
+    _count = 0
+
+    async def _handler(message):
+        nonlocal _count
+        _count += 1
+
+    _leap.subscribe_unsolicited(_handler)
+    await _leap.run()
+    while any(x["depth"] for x in _leap.dispatch_stats().values()):
+        await asyncio.sleep(0)
+    return _count
+
+
+async def _measure(connect: Connect, consume, payload: bytes) -> Tuple[float, int]:
+    _client, _server = socket.socketpair()
+    _reader, _writer = await connect(_client)
+
+    _start = time.perf_counter()
+    _sender = asyncio.create_task(_send(_server, payload))
+    _count = await consume(_reader, _writer)
+    _elapsed = time.perf_counter() - _start
+
+    await _sender
+    _writer.close()  # type: ignore
+    return _elapsed, _count
+
+
+def main() -> None:
+    _payload_bytes, _count = _payload()
+    print(
+        f"Receiving {_count} messages, {len(_payload_bytes) / 2**20:.1f} MiB"
+        " over a socket pair"
+    )
+
+    for title, consume in [("framing only", _read_lines), ("run()", _run_protocol)]:
+        print(title)
+        _baseline = None
+        for name, connect in [
+            ("StreamReader", _stream),
+            ("LeapLineProtocol", _protocol),
+        ]:
+            _elapsed, _received = asyncio.run(
+                _measure(connect, consume, _payload_bytes)
+            )
+            assert _received == _count, (_received, _count)
+            _baseline = _baseline or _elapsed
+            print(
+                f"  {name:<24} {_count / _elapsed:12,.0f} msg/s"
+                f"  {_baseline / _elapsed:6.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Time the codec, id lookup and model update hot paths one by one.
+
+LeapMessage.Schema().load and .dump are timed for every body type of the
+LeapMessage.Body Union, with a corpus message where there is one and a
+made up body with every field filled in otherwise. id_from_href(),
+related_ids() and the handle_response of the session, Zone and Area are
+timed with projects of growing size from mock.MockTopology, as are the area
+tree queries.
+
+Timings can be saved as a baseline and compared with it later:
+
+    python -m benchmarks.bench_hotpaths --save benchmarks/baselines/main.json
+    python -m benchmarks.bench_hotpaths --compare benchmarks/baselines/main.json
+
+Comparing exits with status 1 when a timing regressed by more than the
+threshold.
+"""
+
+import argparse
+import asyncio
+import collections.abc
+import dataclasses
+import enum
+import sys
+import types
+import typing
+from typing import Any, Callable, Coroutine, Dict, List
+
+from benchmarks import (
+    BASELINE_DIR,
+    DEFAULT_THRESHOLD,
+    compare_baseline,
+    load_baseline,
+    load_corpus,
+    measure,
+    save_baseline,
+)
+from pylutron_leap.api import id_from_href
+from pylutron_leap.api.message import LeapMessage
+from pylutron_leap.mock import MockTopology
+from pylutron_leap.models.area import Area
+from pylutron_leap.models.zone import Zone
+from pylutron_leap.session import LeapSession
+from tests.responses import read_response
+
+SIZES = [100, 1000, 10_000]
+REPEAT = 3
+
+
+def _sample(kind: Any, name: str = "") -> Any:
+    """Make up a value of a type, as it would be in a message."""
+    _origin = typing.get_origin(kind)
+    _args = typing.get_args(kind)
+    if _origin in (typing.Union, types.UnionType):
+        return _sample(next(x for x in _args if x is not type(None)), name)
+    if _origin in (list, collections.abc.Sequence):
+        return [_sample(_args[0], name)]
+    if _origin is dict:
+        return {}
+    if dataclasses.is_dataclass(kind):
+        _hints = typing.get_type_hints(kind)
+        return {
+            x.name: _sample(_hints[x.name], x.name) for x in dataclasses.fields(kind)
+        }
+    if isinstance(kind, type) and issubclass(kind, enum.Enum):
+        return list(kind)[-1].name
+    if kind is str:
+        return "/zone/1" if name == "href" else name
+    if kind is bool:
+        return True
+    if kind in (int, float):
+        return kind(1)
+    return None
+
+
+def _body_types() -> List[type]:
+    # Optional[Union[...]] is a single Union with None in it
+    _body = typing.get_type_hints(LeapMessage)["Body"]
+    return [x for x in typing.get_args(_body) if x is not type(None)]
+
+
+def _complete(coroutine: Coroutine) -> Any:
+    """Run a coroutine that never waits, without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as ex:
+        return ex.value
+    raise RuntimeError("The coroutine waited")
+
+
+def _codec(results: Dict[str, float]) -> None:
+    _schema = LeapMessage.Schema()  # type: ignore
+    _corpus: Dict[type, Dict[str, Any]] = {}
+    for data in load_corpus():
+        if data.get("Body") is not None:
+            _corpus.setdefault(type(_schema.load(data).Body), data)
+
+    for body_type in _body_types():
+        _data = _corpus.get(body_type) or {
+            "CommuniqueType": "ReadResponse",
+            "Header": {"Url": "/zone/1"},
+            "Body": _sample(body_type),
+        }
+        _loaded = _schema.load(_data)
+        _name = body_type.__name__
+        results[f"load/{_name}"] = measure(lambda: _schema.load(_data), REPEAT)
+        results[f"dump/{_name}"] = measure(lambda: _schema.dump(_loaded), REPEAT)
+
+
+def _ids(results: Dict[str, float]) -> None:
+    _hrefs = [f"/zone/{x}/status" for x in range(1000)]
+
+    def _id_from_href():
+        for href in _hrefs:
+            id_from_href(href)
+
+    results["id_from_href"] = measure(_id_from_href, REPEAT) / len(_hrefs)
+
+    _status = read_response(
+        "OneZoneStatus", "/zone/1/status", {"ZoneStatus": {"href": "/zone/1/status"}}
+    )
+    results["related_ids/OneZoneStatus"] = measure(_status.related_ids, REPEAT)
+
+
+def _models(results: Dict[str, float], zones: int) -> None:
+    _topology = MockTopology(zones=zones)
+    _zones = read_response(
+        "MultipleZoneStatus",
+        "/zone/status",
+        {"ZoneStatuses": [_topology.zone_status(x) for x in _topology.zones]},
+    )
+    _areas = read_response(
+        "MultipleAreaStatus",
+        "/area/status",
+        {"AreaStatuses": [_topology.area_status(x) for x in _topology.areas]},
+    )
+    # The last ones are the slowest to find while models are kept in a list
+    _zone = read_response(
+        "OneZoneStatus",
+        "/zone/status",
+        {"ZoneStatus": _topology.zone_status(list(_topology.zones)[-1])},
+    )
+    _area = read_response(
+        "OneAreaStatus",
+        "/area/status",
+        {"AreaStatus": _topology.area_status(list(_topology.areas)[-1])},
+    )
+
+    _session = LeapSession("localhost")
+    Zone.handle_response(_session, _zones)
+    Area.handle_response(_session, _areas)
+    _definitions = read_response(
+        "MultipleAreaDefinition", "/area", {"Areas": list(_topology.areas.values())}
+    )
+    Area.handle_response(_session, _definitions)
+    _root = _session.models.get(Area, next(iter(_topology.areas)))
+
+    _timings: Dict[str, Callable[[], Any]] = {
+        "related_ids/MultipleZoneStatus": _zones.related_ids,
+        "LeapSession.handle_response/OneZoneStatus": lambda: _complete(
+            _session.handle_response(_zone)
+        ),
+        "Zone.handle_response/OneZoneStatus": lambda: Zone.handle_response(
+            _session, _zone
+        ),
+        "Zone.handle_response/MultipleZoneStatus": lambda: Zone.handle_response(
+            _session, _zones
+        ),
+        "Area.handle_response/OneAreaStatus": lambda: Area.handle_response(
+            _session, _area
+        ),
+        "Area.handle_response/MultipleAreaStatus": lambda: Area.handle_response(
+            _session, _areas
+        ),
+        "Area.handle_response/MultipleAreaDefinition": lambda: Area.handle_response(
+            _session, _definitions
+        ),
+        "Area.get_children/root": _root.get_children,  # type: ignore
+        "Area.get_leaf_areas/root": _root.get_leaf_areas,  # type: ignore
+    }
+    for name, func in _timings.items():
+        results[f"{name}/{zones}"] = measure(func, REPEAT)
+
+
+def run(sizes: List[int]) -> Dict[str, float]:
+    """Get the time of one call of every hot path, in seconds, by name."""
+    # LeapSession needs an event loop to create its futures
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    _results: Dict[str, float] = {}
+    _codec(_results)
+    _ids(_results)
+    for size in sizes:
+        _models(_results, size)
+    return _results
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    _parser.add_argument("--save", help="write the timings to a JSON baseline")
+    _parser.add_argument("--compare", help="compare the timings with a baseline")
+    _parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="slowdown that counts as a regression, 0.2 being 20%%",
+    )
+    _parser.add_argument(
+        "--sizes", type=int, nargs="+", default=SIZES, help="numbers of zones"
+    )
+    _args = _parser.parse_args()
+
+    _results = run(_args.sizes)
+
+    if _args.compare:
+        print(f"Comparing with {_args.compare}")
+        _regressions = compare_baseline(
+            load_baseline(_args.compare), _results, _args.threshold
+        )
+    else:
+        _width = max(len(x) for x in _results)
+        for name, seconds in _results.items():
+            print(f"  {name:<{_width}} {seconds * 1e6:12.2f} us")
+        _regressions = {}
+
+    if _args.save:
+        save_baseline(_args.save, _results)
+        print(f"Saved to {_args.save}")
+    elif not _args.compare:
+        print(f"Save a baseline with --save, e.g. to {BASELINE_DIR}/main.json")
+
+    if _regressions:
+        print(
+            f"{len(_regressions)} timings regressed by more than {_args.threshold:.0%}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Throughput of each installed JSON backend over the message corpus."""
+
+from benchmarks import load_corpus, load_corpus_lines, measure
+from pylutron_leap import jsonbackend
+
+
+def main() -> None:
+    _lines = load_corpus_lines()
+    _docs = load_corpus()
+    _size = sum(len(x) for x in _lines)
+
+    print(f"JSON throughput over {len(_lines)} messages ({_size} bytes)")
+    for name in jsonbackend.available_backends():
+        _backend = jsonbackend.get_backend(name)
+
+        def _loads(loads=_backend.loads):
+            for line in _lines:
+                loads(line)
+
+        def _dumps(dumps=_backend.dumps):
+            for doc in _docs:
+                dumps(doc)
+
+        _read = measure(_loads)
+        _write = measure(_dumps)
+        print(
+            f"  {name:<10} loads {_size / _read / 2**20:8.1f} MiB/s"
+            f"  dumps {_size / _write / 2**20:8.1f} MiB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
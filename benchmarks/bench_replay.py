@@ -0,0 +1,83 @@
+"""
+Replay a capture of the corpus messages as fast as possible.
+
+Every tagged corpus message gets a request in front of it, with a new tag per
+repetition, so the capture looks like a long session with the bridge. The
+capture is replayed through LeapProtocol alone and into a LeapSession, which
+also updates its models from every message. No socket is involved, so the
+numbers only depend on the library.
+"""
+
+import asyncio
+import io
+import json
+import logging
+
+from benchmarks import load_corpus
+from pylutron_leap.replay import replay
+from pylutron_leap.session import LeapSession
+from pylutron_leap.traffic import TrafficRecorder
+
+MESSAGES = 50_000
+REPEAT = 3
+
+_REQUESTS = {
+    "CreateResponse": "CreateRequest",
+    "ExceptionResponse": "ReadRequest",
+    "ReadResponse": "ReadRequest",
+    "SubscribeResponse": "SubscribeRequest",
+    "UpdateResponse": "UpdateRequest",
+}
+
+
+def _capture() -> bytes:
+    _file = io.BytesIO()
+    _recorder = TrafficRecorder(_file)
+    # Requests come from the responses, like the tags
+    _corpus = [x for x in load_corpus() if x["CommuniqueType"] in _REQUESTS]
+
+    for number in range(MESSAGES // len(_corpus) + 1):
+        for message in _corpus:
+            _header = message["Header"]
+            if "ClientTag" in _header:
+                _tag = f"{_header['ClientTag']}-{number}"
+                _request = {
+                    "CommuniqueType": _REQUESTS[message["CommuniqueType"]],
+                    "Header": {"Url": _header["Url"], "ClientTag": _tag},
+                }
+                _recorder.sent(json.dumps(_request).encode("UTF-8"))
+                message = {**message, "Header": {**_header, "ClientTag": _tag}}
+            _recorder.received(json.dumps(message).encode("UTF-8"))
+
+    _recorder.close()
+    return _file.getvalue()
+
+
+async def _replay(capture: bytes, with_session: bool) -> float:
+    _session = LeapSession("localhost") if with_session else None
+    _stats = await replay(io.BytesIO(capture), _session)
+    return _stats.messages_per_second
+
+
+def main() -> None:
+    # Some corpus messages are malformed on purpose and make the models
+    # complain, which would be measured too
+    logging.disable(logging.CRITICAL)
+
+    _capture_bytes = _capture()
+    _results = {
+        "protocol": max(
+            asyncio.run(_replay(_capture_bytes, False)) for _ in range(REPEAT)
+        ),
+        "session": max(
+            asyncio.run(_replay(_capture_bytes, True)) for _ in range(REPEAT)
+        ),
+    }
+
+    print(f"Replaying {len(_capture_bytes) / 2**20:.1f} MiB of captured traffic")
+    for name, rate in _results.items():
+        print(f"  {name:<24} {rate:10.0f} msgs/s  {1e6 / rate:8.2f} us/msg")
+
+
+if __name__ == "__main__":
+    main()
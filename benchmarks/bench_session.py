@@ -0,0 +1,98 @@
+"""
+Measure a LeapSession against the mock processor.
+
+For projects of growing size, this measures the time to connect and log in,
+the time until the initialization read every device, the time to ready
+the session reports, the latency of zone commands and how many status
+events per second the session keeps up with. Sizes can be given as
+arguments, and a round trip time to add with --latency, e.g.
+`python -m benchmarks.bench_session 100 1000 --latency 0.1`.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pylutron_leap.api.enum import CommandType
+from pylutron_leap.mock import MockProcessor, MockTopology
+from pylutron_leap.models.messages import get_zone_createrequest_lightinglevelcommand
+from pylutron_leap.session import LeapSession
+
+CERTS = Path(__file__).parent.parent / "tests" / "certs"
+SIZES = [100, 1000, 5000]
+COMMANDS = 200
+EVENTS = 20_000
+
+
+async def _measure(zones: int, latency: Optional[float] = None) -> Dict[str, float]:
+    _topology = MockTopology(zones=zones)
+    _results: Dict[str, float] = {}
+
+    async with MockProcessor(
+        _topology,
+        certfile=CERTS / "bridge.crt",
+        keyfile=CERTS / "bridge.key",
+        latency=latency,
+    ) as _mock:
+        _session = LeapSession("127.0.0.1", port=_mock.port, request_timeout=60)
+
+        _start = time.perf_counter()
+        await _session.connect(timeout=60)
+        _results["connect ms"] = (time.perf_counter() - _start) * 1e3
+
+        while len(list(_session.devices)) <= len(_topology.devices):
+            await asyncio.sleep(0.001)
+        _results["initialize ms"] = (time.perf_counter() - _start) * 1e3
+        while _session.ready_time is None:
+            await asyncio.sleep(0.001)
+        _results["ready ms"] = _session.ready_time * 1e3
+
+        _zone_ids = list(_topology.zones)
+        _latencies: List[float] = []
+        for number in range(COMMANDS):
+            _command = get_zone_createrequest_lightinglevelcommand(
+                _zone_ids[number % len(_zone_ids)], CommandType.GoToDimmedLevel, 50
+            )
+            _start = time.perf_counter()
+            await _session.request(_command)
+            _latencies.append(time.perf_counter() - _start)
+        _percentiles = statistics.quantiles(_latencies, n=100)
+        _results["command p50 ms"] = _percentiles[49] * 1e3
+        _results["command p99 ms"] = _percentiles[98] * 1e3
+
+        _received = _session.metrics.messages.labels("in")
+        _expected = _received.value + EVENTS
+        _start = time.perf_counter()
+        await _mock.storm(rate=EVENTS * 10, count=EVENTS)
+        while _received.value < _expected or any(
+            x["depth"] for x in _session.dispatch_stats().values()
+        ):
+            await asyncio.sleep(0.001)
+        _results["events/s"] = EVENTS / (time.perf_counter() - _start)
+
+        _session.close()
+    return _results
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    _parser.add_argument("sizes", type=int, nargs="*", help="numbers of zones")
+    _parser.add_argument(
+        "--latency", type=float, help="seconds to delay every response by"
+    )
+    _args = _parser.parse_args()
+    _sizes = _args.sizes or SIZES
+
+    print(f"{'zones':>8}", end="")
+    for size in _sizes:
+        _results = asyncio.run(_measure(size, _args.latency))
+        if size == _sizes[0]:
+            print("".join(f"{x:>16}" for x in _results))
+        print(f"{size:>8}" + "".join(f"{x:>16.1f}" for x in _results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare decoding a large MultipleDeviceDefinition whole and streamed.
+
+Both paths decode every device and hand it to a consumer that only reads its
+name, like the models do. Besides the time per message, the peak memory
+allocated while decoding is measured with tracemalloc.
+"""
+
+import json
+import tracemalloc
+from typing import Any, Callable
+
+from benchmarks import load_corpus, measure, report
+from pylutron_leap.api.codec import decode_message
+from pylutron_leap.api.streaming import decode_streamed
+from pylutron_leap.jsonbackend import loads
+
+DEVICES = 5000
+
+
+def _frame() -> bytes:
+    _message = next(
+        x
+        for x in load_corpus()
+        if x["Header"].get("MessageBodyType") == "MultipleDeviceDefinition"
+    )
+    _device = _message["Body"]["Devices"][0]
+    _message["Body"]["Devices"] = [
+        {**_device, "href": f"/device/{x}", "Name": f"Device {x}"}
+        for x in range(DEVICES)
+    ]
+    return json.dumps(_message).encode("UTF-8")
+
+
+def _whole(frame: bytes) -> int:
+    _message = decode_message(loads(frame), lazy=True)
+    return sum(len(x.Name) for x in _message.Body.Devices)
+
+
+def _streamed(frame: bytes) -> int:
+    _message = decode_streamed(frame)
+    return sum(len(x.Name) for x in _message.Body.Devices)  # type: ignore
+
+
+def _peak(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    func()
+    _, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _peak
+
+
+def main() -> None:
+    _frame_bytes = _frame()
+    assert _whole(_frame_bytes) == _streamed(_frame_bytes)
+
+    _paths = {"whole": _whole, "streamed": _streamed}
+    print(f"{DEVICES} devices, {len(_frame_bytes) / 2**20:.1f} MiB")
+    report(
+        "Decode and visit every device",
+        {
+            name: measure(lambda func=func: func(_frame_bytes), repeat=3)
+            for name, func in _paths.items()
+        },
+    )
+    print("Peak memory allocated")
+    for name, func in _paths.items():
+        _bytes = _peak(lambda func=func: func(_frame_bytes))
+        print(f"  {name:<24} {_bytes / 2**20:10.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare coalesced and per-request writes when fanning a scene out to 40 zones.
+
+The bridge is mocked by a local socket pair that answers every command line
+with a CreateResponse, so the numbers include real send/recv syscalls.
+"""
+
+import asyncio
+import json
+import socket
+import time
+
+from pylutron_leap.api.enum import CommandType
+from pylutron_leap.leap import LeapProtocol
+from pylutron_leap.models.messages import get_zone_createrequest_lightinglevelcommand
+
+ZONES = 40
+ROUNDS = 200
+
+
+async def _mock_bridge(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    while True:
+        _line = await reader.readline()
+        if not _line:
+            break
+        _request = json.loads(_line)
+        _response = {
+            "CommuniqueType": "CreateResponse",
+            "Header": {
+                "StatusCode": "201 Created",
+                "Url": _request["Header"]["Url"],
+                "ClientTag": _request["Header"]["ClientTag"],
+            },
+        }
+        writer.write(json.dumps(_response).encode("UTF-8") + b"\r\n")
+    writer.close()
+
+
+async def _fan_out(coalesce_window) -> tuple:
+    _client, _server = socket.socketpair()
+    _bridge = asyncio.create_task(
+        _mock_bridge(*await asyncio.open_connection(sock=_server))
+    )
+    _reader, _writer = await asyncio.open_connection(sock=_client)
+
+    _leap = LeapProtocol(
+        _reader, _writer, max_in_flight=ZONES, coalesce_window=coalesce_window
+    )
+    _run = asyncio.create_task(_leap.run())
+
+    _start = time.perf_counter()
+    for level in range(ROUNDS):
+        await asyncio.gather(
+            *[
+                _leap.request(
+                    get_zone_createrequest_lightinglevelcommand(
+                        zone, CommandType.GoToDimmedLevel, level % 101
+                    )
+                )
+                for zone in range(ZONES)
+            ]
+        )
+    _elapsed = time.perf_counter() - _start
+
+    _leap.close()
+    _run.cancel()
+    await _bridge
+    return _elapsed, _leap.write_calls
+
+
+def main() -> None:
+    print(f"Scene fan-out to {ZONES} zones, {ROUNDS} rounds")
+    for name, window in [("per-request", None), ("coalesced", 0.0)]:
+        _elapsed, _writes = asyncio.run(_fan_out(window))
+        print(
+            f"  {name:<12} {_elapsed / ROUNDS * 1e3:8.2f} ms/scene"
+            f"  {_writes / ROUNDS:6.1f} writes/scene"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""Encode and decode LEAP messages without walking the whole LeapMessage schema."""
+
+import dataclasses
+import time
+from logging import getLogger
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import marshmallow_dataclass
+from marshmallow import INCLUDE, Schema, ValidationError
+
+from pylutron_leap.api.area import (
+    LeapAreaDefinitionBody,
+    LeapAreaStatusBody,
+    LeapMultiAreaDefinitionBody,
+    LeapMultiAreaStatusBody,
+)
+from pylutron_leap.api.button import LeapButtonStatusBody
+from pylutron_leap.api.command import LeapCommand, LeapCommandBody
+from pylutron_leap.api.device import (
+    LeapDeviceBody,
+    LeapMultiDeviceBody,
+    LeapMultiDeviceDefinitionBody,
+)
+from pylutron_leap.api.emergency import LeapEmergencyBody, LeapMultiEmergencyBody
+from pylutron_leap.api.enum import CommuniqueType, MessageBodyTypeEnum
+from pylutron_leap.api.loadshed import LeapLoadShedBody
+from pylutron_leap.api.login import LeapLoginBody
+from pylutron_leap.api.message import (
+    LeapDirectives,
+    LeapExceptionBody,
+    LeapMessage,
+    LeapMessageHeader,
+    ResponseStatus,
+)
+from pylutron_leap.api.occupancy import (
+    LeapMultiOccupancySensorBody,
+    LeapOccupancySensorBody,
+)
+from pylutron_leap.api.ping import LeapPingBody
+from pylutron_leap.api.processor import LeapMasterDeviceListDefinitionBody
+from pylutron_leap.api.project import LeapProjectBody
+from pylutron_leap.api.version import LeapVersionBody
+from pylutron_leap.api.zone import (
+    LeapMultipleZoneExpandedStatusBody,
+    LeapMultiZoneBody,
+    LeapMultiZoneTypeGroupBody,
+    LeapZoneBody,
+    LeapZoneTypeGroupBody,
+)
+from pylutron_leap.jsonbackend import JSONBackend, current_backend
+
+logger = getLogger(__name__)
+
+"""
+Each MessageBodyType maps to exactly one body dataclass. Messages with a body
+type that is not listed here are decoded by trying every member of the
+LeapMessage.Body Union, which is much slower.
+"""
+BODY_TYPES: Dict[MessageBodyTypeEnum, type] = {
+    MessageBodyTypeEnum.ExceptionDetail: LeapExceptionBody,
+    MessageBodyTypeEnum.MultipleAreaDefinition: LeapMultiAreaDefinitionBody,
+    MessageBodyTypeEnum.MultipleAreaStatus: LeapMultiAreaStatusBody,
+    MessageBodyTypeEnum.MultipleDeviceDefinition: LeapMultiDeviceDefinitionBody,
+    MessageBodyTypeEnum.MultipleDeviceStatus: LeapMultiDeviceBody,
+    MessageBodyTypeEnum.MultipleEmergencyStatus: LeapMultiEmergencyBody,
+    MessageBodyTypeEnum.MultipleOccupancySensorStatus: LeapMultiOccupancySensorBody,
+    MessageBodyTypeEnum.MultipleZoneExpandedStatus: LeapMultipleZoneExpandedStatusBody,
+    MessageBodyTypeEnum.MultipleZoneStatus: LeapMultiZoneBody,
+    MessageBodyTypeEnum.MultipleZoneTypeGroupStatus: LeapMultiZoneTypeGroupBody,
+    MessageBodyTypeEnum.OneAreaDefinition: LeapAreaDefinitionBody,
+    MessageBodyTypeEnum.OneAreaStatus: LeapAreaStatusBody,
+    MessageBodyTypeEnum.OneButtonStatusEvent: LeapButtonStatusBody,
+    MessageBodyTypeEnum.OneClientSettingDefinition: LeapVersionBody,
+    MessageBodyTypeEnum.OneDeviceStatus: LeapDeviceBody,
+    MessageBodyTypeEnum.OneEmergencyStatus: LeapEmergencyBody,
+    MessageBodyTypeEnum.OneLoginDefinition: LeapLoginBody,
+    MessageBodyTypeEnum.OneMasterDeviceListDefinition: LeapMasterDeviceListDefinitionBody,
+    MessageBodyTypeEnum.OneOccupancySensorStatus: LeapOccupancySensorBody,
+    MessageBodyTypeEnum.OnePingResponse: LeapPingBody,
+    MessageBodyTypeEnum.OneProjectDefinition: LeapProjectBody,
+    MessageBodyTypeEnum.OneSystemLoadSheddingStatus: LeapLoadShedBody,
+    MessageBodyTypeEnum.OneZoneStatus: LeapZoneBody,
+    MessageBodyTypeEnum.OneZoneTypeGroupStatus: LeapZoneTypeGroupBody,
+}
+
+_HEADER_FIELDS = frozenset(
+    ["Url", "ClientTag", "StatusCode", "Directives", "MessageBodyType"]
+)
+
+# Every LeapCommand field except CommandType holds a parameters dataclass.
+_COMMAND_PARAMETERS = [x.name for x in dataclasses.fields(LeapCommand)][1:]
+
+_body_schemas: Dict[MessageBodyTypeEnum, Schema] = {}
+_parameter_schemas: Dict[type, Schema] = {}
+_command_templates: Dict[Tuple, "CommandTemplate"] = {}
+_message_schema: Optional[Schema] = None
+
+
+def message_schema() -> Schema:
+    """Get a shared LeapMessage schema instance."""
+    global _message_schema
+
+    if _message_schema is None:
+        _message_schema = LeapMessage.Schema()  # type: ignore
+
+    return _message_schema
+
+
+def register_body_type(body_type: MessageBodyTypeEnum, body_class: type) -> None:
+    """Decode bodies of the given MessageBodyType as body_class."""
+    BODY_TYPES[body_type] = body_class
+    _body_schemas.pop(body_type, None)
+
+
+def body_schema(body_type: Optional[MessageBodyTypeEnum]) -> Optional[Schema]:
+    """Get the cached schema for a MessageBodyType, or None if it is unknown."""
+    if body_type is None:
+        return None
+
+    _schema = _body_schemas.get(body_type)
+    if _schema is None:
+        _class = BODY_TYPES.get(body_type)
+        if _class is None:
+            return None
+        _schema = marshmallow_dataclass.class_schema(_class)()
+        _body_schemas[body_type] = _schema
+
+    return _schema
+
+
+def _parameter_schema(parameters_type: type) -> Schema:
+    _schema = _parameter_schemas.get(parameters_type)
+    if _schema is None:
+        _schema = marshmallow_dataclass.class_schema(parameters_type)()
+        _parameter_schemas[parameters_type] = _schema
+    return _schema
+
+
+def decode_header(data: Dict[str, Any]) -> LeapMessageHeader:
+    """
+    Build a LeapMessageHeader without going through marshmallow.
+
+    Raises KeyError, TypeError or ValueError if the header is not one we
+    understand, in which case the caller should use the schema instead.
+    """
+    if not _HEADER_FIELDS.issuperset(data):
+        raise KeyError(f"Unexpected header fields: {set(data) - _HEADER_FIELDS}")
+
+    _status = data.get("StatusCode")
+    _directives = data.get("Directives")
+    _body_type = data.get("MessageBodyType")
+
+    return LeapMessageHeader(
+        Url=data["Url"],
+        ClientTag=data.get("ClientTag"),
+        StatusCode=None if _status is None else ResponseStatus.from_str(_status),
+        Directives=None if _directives is None else LeapDirectives(**_directives),
+        MessageBodyType=None if _body_type is None else MessageBodyTypeEnum[_body_type],
+    )
+
+
+def load_message(data: Dict[str, Any]) -> LeapMessage:
+    """Decode a message with the full LeapMessage schema."""
+    return message_schema().load(data, unknown=INCLUDE, partial=True)
+
+
+def decode_body(header: LeapMessageHeader, data: Dict[str, Any]) -> Any:
+    """
+    Decode the Body of a received message.
+
+    The body is loaded directly with the dataclass registered for the header's
+    MessageBodyType, with the same options as load_message. Anything that
+    can't be decoded that way goes through load_message instead.
+    """
+    _schema = body_schema(header.MessageBodyType)
+    if _schema is not None:
+        try:
+            return _schema.load(data["Body"], unknown=INCLUDE, partial=True)
+        except (TypeError, ValidationError):
+            logger.debug(
+                "Body does not match %s, falling back to schema",
+                header.MessageBodyType,
+            )
+
+    return load_message(data).Body
+
+
+class LazyLeapMessage(LeapMessage):
+    """
+    A received LeapMessage whose Body is only decoded when it is first read.
+
+    The header is decoded up front so messages can be routed on the ClientTag,
+    Url and MessageBodyType. Messages nobody reads the Body of never pay for
+    building the body dataclasses. decode_observer, when set, is told how
+    many seconds decoding the Body took.
+    """
+
+    decode_observer: Optional[Callable[[LeapMessage, float], None]] = None
+
+    def __init__(
+        self,
+        CommuniqueType: CommuniqueType,
+        Header: LeapMessageHeader,
+        data: Dict[str, Any],
+    ):
+        self.CommuniqueType = CommuniqueType
+        self.Header = Header
+        self._data: Optional[Dict[str, Any]] = data
+        self._body: Any = None
+
+    @property  # type: ignore
+    def Body(self) -> Any:  # type: ignore
+        if self._data is not None:
+            _start = time.perf_counter()
+            self._body = decode_body(self.Header, self._data)
+            self._data = None
+            if self.decode_observer is not None:
+                self.decode_observer(self, time.perf_counter() - _start)
+        return self._body
+
+    @Body.setter
+    def Body(self, value: Any) -> None:
+        self._data = None
+        self._body = value
+
+    @property
+    def is_decoded(self) -> bool:
+        """Check if the Body has been built yet."""
+        return self._data is None
+
+    @property
+    def raw_body(self) -> Any:
+        """The Body as it was received, or None once it has been decoded."""
+        if self._data is None:
+            return None
+        return self._data["Body"]
+
+    def __repr__(self) -> str:
+        if self._data is None:
+            _body = repr(self._body)
+        else:
+            _body = f"<raw {self._data['Body']!r}>"
+        return (
+            f"LazyLeapMessage(CommuniqueType={self.CommuniqueType!r}, "
+            f"Header={self.Header!r}, Body={_body})"
+        )
+
+
+def decode_message(data: Dict[str, Any], lazy: bool = False) -> LeapMessage:
+    """
+    Decode a message received from the bridge.
+
+    With lazy set, a LazyLeapMessage is returned and the Body is decoded when
+    it is first accessed.
+    """
+    try:
+        _header = decode_header(data["Header"])
+        _communique_type = CommuniqueType[data["CommuniqueType"]]
+    except (KeyError, TypeError, ValueError):
+        return load_message(data)
+
+    if data.get("Body") is None:
+        return LeapMessage(CommuniqueType=_communique_type, Header=_header)
+
+    if lazy:
+        return LazyLeapMessage(_communique_type, _header, data)
+
+    return LeapMessage(
+        CommuniqueType=_communique_type,
+        Header=_header,
+        Body=decode_body(_header, data),
+    )
+
+
+class CommandTemplate:
+    """
+    The encoded form of one shape of CreateRequest command.
+
+    A shape is a CommandType together with the parameters type and the
+    parameter fields that are set. The message is dumped through the schema
+    once, with placeholders where the Url, ClientTag and parameter values go,
+    and split into byte chunks. Rendering a command of the same shape only has
+    to splice the new values in between the chunks.
+    """
+
+    def __init__(self, message: LeapMessage, fields: List[str], backend: JSONBackend):
+        _data = message_schema().dump(message)
+        _slots: List[str] = []
+
+        def _slot() -> str:
+            _slots.append(f"\x00{len(_slots)}\x00")
+            return _slots[-1]
+
+        _data["Header"]["Url"] = _slot()
+        _data["Header"]["ClientTag"] = _slot()
+        if len(fields) > 1:
+            _parameters = _data["Body"]["Command"][fields[0]]
+            for name in fields[1:]:
+                _parameters[name] = _slot()
+
+        self._dumps = backend.dumps
+        _text = backend.dumps(_data)
+        self._chunks: List[bytes] = []
+        for slot in _slots:
+            _head, _text = _text.split(backend.dumps(slot), 1)
+            self._chunks.append(_head)
+        self._chunks.append(_text)
+
+    def render(self, values: List[Any]) -> bytes:
+        """Encode a command, given the values in slot order."""
+        _parts = [self._chunks[0]]
+        for value, chunk in zip(values, self._chunks[1:]):
+            _parts.append(self._dumps(value))
+            _parts.append(chunk)
+        return b"".join(_parts)
+
+
+def _command_shape(message: LeapMessage) -> Optional[Tuple[Tuple, List[str], List]]:
+    """
+    Work out the template key, parameter fields and slot values for a command.
+
+    Returns None for anything that can't be rendered from a template: other
+    CommuniqueTypes, headers with more than a Url and ClientTag, and
+    parameters with nested values. Parameter values are serialized by their
+    schema field, so e.g. a float Level is sent as an int like a dump would.
+    """
+    _header = message.Header
+    _body = message.Body
+
+    if (
+        message.CommuniqueType != CommuniqueType.CreateRequest
+        or type(_body) is not LeapCommandBody
+        or _header.ClientTag is None
+        or _header.StatusCode is not None
+        or _header.Directives is not None
+        or _header.MessageBodyType is not None
+    ):
+        return None
+
+    _command: LeapCommand = _body.Command  # type: ignore
+    _set = [x for x in _COMMAND_PARAMETERS if getattr(_command, x) is not None]
+    _values: List[Any] = [_header.Url, _header.ClientTag]
+
+    if len(_set) == 0:
+        return ((_command.CommandType,), [], _values)
+    if len(_set) > 1:
+        return None
+
+    _parameters = getattr(_command, _set[0])
+    _schema = _parameter_schema(type(_parameters))
+    _fields = [_set[0]]
+    for field in dataclasses.fields(_parameters):
+        _value = getattr(_parameters, field.name)
+        if _value is None:
+            continue
+        try:
+            _value = _schema.fields[field.name].serialize(field.name, _parameters)
+        except (KeyError, TypeError, ValueError, ValidationError):
+            return None
+        if not isinstance(_value, (int, float, str)):
+            return None
+        _fields.append(field.name)
+        _values.append(_value)
+
+    return ((_command.CommandType, type(_parameters), *_fields), _fields, _values)
+
+
+def encode_message(message: LeapMessage) -> bytes:
+    """
+    Encode a message to send to the bridge.
+
+    Commands are rendered from a CommandTemplate compiled the first time their
+    shape is seen. Everything else is dumped through the LeapMessage schema.
+    """
+    _backend = current_backend()
+    _shape = _command_shape(message)
+    if _shape is None:
+        return _backend.dumps(message_schema().dump(message))
+
+    _key, _fields, _values = _shape
+    _key = (_backend.name, *_key)
+    _template = _command_templates.get(_key)
+    if _template is None:
+        _template = CommandTemplate(message, _fields, _backend)
+        _command_templates[_key] = _template
+
+    return _template.render(_values)
@@ -98,6 +98,8 @@ class CommuniqueType(ValuesEnum):
     ReadResponse = auto()
     SubscribeRequest = auto()
     SubscribeResponse = auto()
+    UnsubscribeRequest = auto()
+    UnsubscribeResponse = auto()
     UpdateRequest = auto()
     UpdateResponse = auto()
 
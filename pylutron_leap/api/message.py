@@ -28,7 +28,11 @@ from pylutron_leap.api.occupancy import (
     LeapOccupancySensorBody,
 )
 from pylutron_leap.api.ping import LeapPingBody
-from pylutron_leap.api.processor import LeapMasterDeviceListBody
+from pylutron_leap.api.processor import (
+    LeapMasterDeviceListBody,
+    LeapMasterDeviceListDefinitionBody,
+)
+from pylutron_leap.api.project import LeapProjectBody
 from pylutron_leap.api.version import LeapVersionBody
 from pylutron_leap.api.zone import (
     LeapMultiZoneBody,
@@ -48,6 +52,7 @@ LeapModelledBodies = Union[
     LeapButtonStatusBody,
     LeapDeviceBody,
     LeapMasterDeviceListBody,
+    LeapMasterDeviceListDefinitionBody,
     LeapMultiAreaDefinitionBody,
     LeapMultiAreaStatusBody,
     LeapMultiDeviceBody,
@@ -161,6 +166,7 @@ class LeapMessage:
             LeapExceptionBody,
             LeapLoadShedBody,
             LeapLoginBody,
+            LeapMasterDeviceListDefinitionBody,
             LeapMultiAreaDefinitionBody,
             LeapMultiAreaStatusBody,
             LeapMultiDeviceBody,
@@ -171,6 +177,7 @@ class LeapMessage:
             LeapMultiZoneTypeGroupBody,
             LeapOccupancySensorBody,
             LeapPingBody,
+            LeapProjectBody,
             LeapVersionBody,
             LeapZoneBody,
             LeapZoneTypeGroupBody,
@@ -200,7 +207,7 @@ class LeapMessage:
     def related_ids(self) -> list[int]:
         _ids: list[int] = []
         _id = id_from_href(self.Header.Url or "")
-        logger.debug(f"id from header: {_id}")
+        logger.debug("id from header: %s", _id)
         if _id is not None:
             _ids.append(_id)
 
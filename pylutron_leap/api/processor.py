@@ -34,8 +34,8 @@ class ProcessorWhiteListDefinition:
 @dataclass
 class ProcessorNetworkInterfaceDefinition:
     MACAddress: str
-    IPv4Properties: IPv4PropertyDefinition
-    IPv6Properties: IPv6PropertyDefinition
+    IPv4Properties: Optional[IPv4PropertyDefinition] = None
+    IPv6Properties: Optional[IPv6PropertyDefinition] = None
 
 
 @dataclass
@@ -56,7 +56,7 @@ class ProcessorDeviceDefinition:
 @dataclass
 class LeapMasterDeviceListBody:
     Devices: Sequence[ProcessorDeviceDefinition]
-    SignedWhiteList: ProcessorWhiteListDefinition
+    SignedWhiteList: Optional[ProcessorWhiteListDefinition] = None
 
     def related_ids(self) -> list[int]:
         _ids: list[int] = []
@@ -64,3 +64,11 @@ class LeapMasterDeviceListBody:
             _ids.extend(item.related_ids())
 
         return _ids
+
+
+@dataclass
+class LeapMasterDeviceListDefinitionBody:
+    MasterDeviceList: LeapMasterDeviceListBody
+
+    def related_ids(self) -> list[int]:
+        return self.MasterDeviceList.related_ids()
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ProjectTimestamp:
+    Year: int
+    Month: int
+    Day: int
+    Hour: int
+    Minute: int
+    Second: int
+    Utc: str
+
+
+@dataclass
+class ProjectDefinition:
+    href: str
+    Name: Optional[str] = None
+    ProductType: Optional[str] = None
+    ProjectModifiedTimestamp: Optional[ProjectTimestamp] = None
+
+
+@dataclass
+class LeapProjectBody:
+    Project: ProjectDefinition
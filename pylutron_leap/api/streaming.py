@@ -0,0 +1,299 @@
+"""
+Decode large messages one array element at a time.
+
+Bodies such as MultipleDeviceDefinition hold one big array. Parsing the whole
+message builds every element as a dict and then as a dataclass before the
+models see the first one. For frames of at least DEFAULT_STREAM_THRESHOLD
+bytes, decode_streamed() only parses the envelope up front; the array in the
+Body is a StreamedArray that parses and decodes each element as it is
+iterated, so only one element is alive at a time. Indexing a StreamedArray
+decodes it whole once, so it can be used like the list it replaces.
+"""
+
+import json
+import re
+from collections.abc import Sequence
+from logging import getLogger
+from typing import Any, Dict, Generator, Iterator, List, Optional, Tuple
+
+from marshmallow import INCLUDE, ValidationError, fields
+
+from pylutron_leap.api.codec import (
+    LazyLeapMessage,
+    body_schema,
+    decode_header,
+    load_message,
+)
+from pylutron_leap.api.enum import CommuniqueType, MessageBodyTypeEnum
+from pylutron_leap.api.message import LeapMessageHeader
+
+logger = getLogger(__name__)
+
+DEFAULT_STREAM_THRESHOLD = 2**16
+
+"""The array that is streamed, for each MessageBodyType that has one."""
+STREAMED_ARRAYS: Dict[MessageBodyTypeEnum, str] = {
+    MessageBodyTypeEnum.MultipleAreaDefinition: "Areas",
+    MessageBodyTypeEnum.MultipleAreaStatus: "AreaStatuses",
+    MessageBodyTypeEnum.MultipleDeviceDefinition: "Devices",
+    MessageBodyTypeEnum.MultipleDeviceStatus: "DeviceStatuses",
+    MessageBodyTypeEnum.MultipleZoneExpandedStatus: "ZoneExpandedStatuses",
+    MessageBodyTypeEnum.MultipleZoneStatus: "ZoneStatuses",
+}
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# A string, or a bracket outside of one
+_BRACKETS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]]')
+_decoder = json.JSONDecoder()
+
+
+def _skip(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()  # type: ignore
+
+
+def _expect(text: str, pos: int, char: str) -> int:
+    """Check for char at pos, ignoring whitespace, and return the next pos."""
+    pos = _skip(text, pos)
+    if text[pos : pos + 1] != char:
+        raise ValueError(f"Expected {char!r} at {pos}")
+    return _skip(text, pos + 1)
+
+
+def _members(text: str, pos: int) -> Generator[Tuple[str, int], int, None]:
+    """
+    Walk the members of the object starting at pos.
+
+    Yields each key with the position of its value. The caller must send back
+    the position just past the value before the next member is read.
+    """
+    pos = _expect(text, pos, "{")
+    if text[pos : pos + 1] == "}":
+        return
+
+    while True:
+        _key, pos = _decoder.raw_decode(text, pos)
+        pos = yield _key, _expect(text, pos, ":")
+        pos = _skip(text, pos)
+        if text[pos : pos + 1] == ",":
+            pos = _skip(text, pos + 1)
+        elif text[pos : pos + 1] == "}":
+            return
+        else:
+            raise ValueError(f"Expected ',' or '}}' at {pos}")
+
+
+def _elements(text: str, start: int) -> Generator[Any, None, int]:
+    """
+    Parse the elements of the array starting at start, one at a time.
+
+    Returns the position just past the array.
+    """
+    pos = _expect(text, start, "[")
+    if text[pos : pos + 1] == "]":
+        return pos + 1
+
+    while True:
+        _element, pos = _decoder.raw_decode(text, pos)
+        yield _element
+        pos = _skip(text, pos)
+        if text[pos : pos + 1] == ",":
+            pos = _skip(text, pos + 1)
+        elif text[pos : pos + 1] == "]":
+            return pos + 1
+        else:
+            raise ValueError(f"Expected ',' or ']' at {pos}")
+
+
+def _array_end(text: str, start: int) -> int:
+    """
+    Find the position just past the array starting at start.
+
+    Only brackets outside of strings are matched, so the end is found without
+    parsing the elements.
+    """
+    _depth = 0
+    for _match in _BRACKETS.finditer(text, start):
+        _token = _match.group()
+        if _token == "[":
+            _depth += 1
+        elif _token == "]":
+            _depth -= 1
+            if _depth == 0:
+                return _match.end()
+    raise ValueError(f"Unterminated array at {start}")
+
+
+class StreamedArray(Sequence):
+    """
+    An array of a received Body that is decoded as it is iterated.
+
+    Iterating parses the elements again every time, until the array is
+    indexed: then every element is decoded and kept, and used from then on.
+    len() counts the elements once.
+    """
+
+    def __init__(self, text: str, start: int, field: fields.Field):
+        """field is the List field of the body schema the array belongs to."""
+        self._text = text
+        self._start = start
+        self._field = field
+        self._items: Optional[List[Any]] = None
+        self._len: Optional[int] = None
+
+    def _decode(self, element: Any) -> Any:
+        return self._field.deserialize([element], partial=True)[0]
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._items is not None:
+            return iter(self._items)
+        return (self._decode(x) for x in _elements(self._text, self._start))
+
+    def __len__(self) -> int:
+        if self._items is not None:
+            return len(self._items)
+        if self._len is None:
+            self._len = sum(1 for _ in _elements(self._text, self._start))
+        return self._len
+
+    def __getitem__(self, index):
+        if self._items is None:
+            self._items = list(self)
+        return self._items[index]
+
+    def __repr__(self) -> str:
+        return f"StreamedArray <{self._field.name}>"
+
+
+class StreamedLeapMessage(LazyLeapMessage):
+    """A LazyLeapMessage whose big array is decoded while it is iterated."""
+
+    def __init__(
+        self,
+        CommuniqueType: CommuniqueType,
+        Header: LeapMessageHeader,
+        data: Dict[str, Any],
+        text: str,
+        array: str,
+        array_start: int,
+    ):
+        super().__init__(CommuniqueType, Header, data)
+        self._text = text
+        self._array = array
+        self._array_start = array_start
+
+    @property  # type: ignore
+    def Body(self) -> Any:  # type: ignore
+        if self._data is not None:
+            _schema = body_schema(self.Header.MessageBodyType)
+            _raw = self._data["Body"]
+            _raw[self._array] = []
+            try:
+                self._body = _schema.load(  # type: ignore
+                    _raw, unknown=INCLUDE, partial=True
+                )
+            except (TypeError, ValidationError):
+                logger.debug(
+                    "Body does not match %s, decoding it whole",
+                    self.Header.MessageBodyType,
+                )
+                self._body = load_message(json.loads(self._text)).Body
+            else:
+                setattr(
+                    self._body,
+                    self._array,
+                    StreamedArray(
+                        self._text, self._array_start, _schema.fields[self._array]  # type: ignore
+                    ),
+                )
+            self._data = None
+        return self._body
+
+    @Body.setter
+    def Body(self, value: Any) -> None:
+        self._data = None
+        self._body = value
+
+    @property
+    def raw_body(self) -> Any:
+        """Streamed bodies are never available as a whole."""
+        return None
+
+    def __repr__(self) -> str:
+        return (
+            f"StreamedLeapMessage(CommuniqueType={self.CommuniqueType!r}, "
+            f"Header={self.Header!r}, Body=<streamed {self._array}>)"
+        )
+
+
+def decode_streamed(frame: bytes) -> Optional[StreamedLeapMessage]:
+    """
+    Decode a frame, streaming the array of its Body.
+
+    Returns None if the message has no array to stream, if its Body comes
+    before its Header or if it can't be walked, in which case it should be
+    decoded as usual.
+    """
+    _text = frame.decode("UTF-8")
+    try:
+        return _decode_streamed(_text)
+    except (KeyError, TypeError, ValueError):
+        logger.debug("Can't stream message, decoding it whole", exc_info=1)
+        return None
+
+
+def _decode_streamed(text: str) -> Optional[StreamedLeapMessage]:
+    _data: Dict[str, Any] = {}
+    _header: Optional[LeapMessageHeader] = None
+    _array: Optional[Tuple[str, int]] = None
+
+    _walk = _members(text, 0)
+    try:
+        _key, _pos = next(_walk)
+        while True:
+            if _key == "Body" and _header is not None:
+                _name = STREAMED_ARRAYS.get(_header.MessageBodyType)  # type: ignore
+                if _name is None:
+                    return None
+                _data["Body"], _end, _array = _stream_body(text, _pos, _name)
+                if _array is None:
+                    return None
+            else:
+                _data[_key], _end = _decoder.raw_decode(text, _pos)
+                if _key == "Header":
+                    _header = decode_header(_data["Header"])
+            _key, _pos = _walk.send(_end)
+    except StopIteration:
+        pass
+
+    if _header is None or _array is None:
+        return None
+    if body_schema(_header.MessageBodyType) is None:
+        return None
+
+    return StreamedLeapMessage(
+        CommuniqueType[_data["CommuniqueType"]], _header, _data, text, *_array
+    )
+
+
+def _stream_body(
+    text: str, start: int, name: str
+) -> Tuple[Dict[str, Any], int, Optional[Tuple[str, int]]]:
+    """Parse a Body except for the array called name, which is only located."""
+    _body: Dict[str, Any] = {}
+    _array: Optional[Tuple[str, int]] = None
+    _end = start
+
+    _walk = _members(text, start)
+    try:
+        _key, _pos = next(_walk)
+        while True:
+            if _key == name and text[_pos : _pos + 1] == "[":
+                _array = (name, _pos)
+                _end = _array_end(text, _pos)
+            else:
+                _body[_key], _end = _decoder.raw_decode(text, _pos)
+            _key, _pos = _walk.send(_end)
+    except StopIteration:
+        pass
+
+    return _body, _skip(text, _end) + 1, _array
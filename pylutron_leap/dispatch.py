@@ -0,0 +1,138 @@
+"""Deliver received messages to callbacks without holding up the reader."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum, auto
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from pylutron_leap.api.message import LeapMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256
+
+MessageCallback = Callable[[LeapMessage], Awaitable[None]]
+# Told how many seconds a callback took for a message
+DispatchObserver = Callable[[LeapMessage, float], None]
+
+
+class OverflowPolicy(Enum):
+    """What to do with a message for a callback whose queue is full."""
+
+    # Wait for the callback to catch up. This stops reading from the bridge.
+    Block = auto()
+    # Discard the oldest queued message to make room.
+    DropOldest = auto()
+    # Discard queued messages with the same Url as the new one, so only the
+    # latest status of each object is kept. Falls back to DropOldest.
+    KeepLatest = auto()
+
+
+class DispatchQueue:
+    """
+    A bounded queue of messages for one callback, drained by its own task.
+
+    Messages are delivered in the order they were put, one at a time, so a
+    callback never runs concurrently with itself.
+    """
+
+    def __init__(
+        self,
+        callback: MessageCallback,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        policy: OverflowPolicy = OverflowPolicy.Block,
+        observer: Optional[DispatchObserver] = None,
+    ):
+        """observer is told how long the callback took for every message."""
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.callback = callback
+        self.policy = policy
+        self.maxsize = maxsize
+        self.observer = observer
+        self._queue: Deque[LeapMessage] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.max_depth = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting for the callback."""
+        return len(self._queue)
+
+    async def put(self, message: LeapMessage) -> None:
+        """
+        Queue a message, applying the overflow policy if the queue is full.
+
+        Messages put once the queue is closed, also while waiting for room,
+        are dropped.
+        """
+        if self.policy == OverflowPolicy.Block:
+            while len(self._queue) >= self.maxsize and not self._closed:
+                self._not_full.clear()
+                await self._not_full.wait()
+        elif len(self._queue) >= self.maxsize:
+            if self.policy == OverflowPolicy.KeepLatest:
+                self._drop_url(message.Header.Url)
+            if len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+
+        if self._closed:
+            self.dropped += 1
+            return
+
+        self._queue.append(message)
+        self._not_empty.set()
+        self.max_depth = max(self.max_depth, len(self._queue))
+
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    def _drop_url(self, url: str) -> None:
+        _kept = [x for x in self._queue if x.Header.Url != url]
+        self.dropped += len(self._queue) - len(_kept)
+        self._queue = deque(_kept)
+
+    async def _drain(self) -> None:
+        while True:
+            while not self._queue:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+
+            _message = self._queue.popleft()
+            self._not_full.set()
+            _start = time.perf_counter()
+            try:
+                await self.callback(_message)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Got exception from %s", self.callback)
+            self.delivered += 1
+            if self.observer is not None:
+                self.observer(_message, time.perf_counter() - _start)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+    def close(self) -> None:
+        """Stop delivering messages. Anything still queued is discarded."""
+        self._closed = True
+        self._queue.clear()
+        # Wake up the puts waiting for room, so they drop their message
+        self._not_full.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,224 @@
+"""Deliver messages only to the handlers interested in them."""
+
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set
+
+from pylutron_leap.api import id_from_href
+from pylutron_leap.api.enum import CommuniqueType, MessageBodyTypeEnum
+from pylutron_leap.api.message import LeapMessage
+from pylutron_leap.dispatch import (
+    DEFAULT_QUEUE_SIZE,
+    DispatchObserver,
+    DispatchQueue,
+    MessageCallback,
+    OverflowPolicy,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _url_prefixes(url: str) -> Iterator[str]:
+    """Yield "/zone", "/zone/12" and "/zone/12/status" for "/zone/12/status"."""
+    _path = url.split("?", 1)[0].rstrip("/")
+    _end = _path.find("/", 1)
+    while _end != -1:
+        yield _path[:_end]
+        _end = _path.find("/", _end + 1)
+    yield _path
+
+
+@dataclass(eq=False)
+class EventRegistration:
+    """What one handler is interested in. Criteria left as None match anything."""
+
+    id: int
+    queue: DispatchQueue
+    url_prefix: Optional[str] = None
+    href_id: Optional[int] = None
+    body_type: Optional[MessageBodyTypeEnum] = None
+    communique_type: Optional[CommuniqueType] = None
+    tagged: Optional[bool] = None
+    # The index the registration is filed under, and its key there
+    _index: Dict = field(default_factory=dict, repr=False)
+    _key: object = field(default=None, repr=False)
+
+    @property
+    def callback(self) -> MessageCallback:
+        return self.queue.callback
+
+    def matches(self, message: LeapMessage, href_id: Optional[int]) -> bool:
+        _header = message.Header
+        if self.tagged is not None and self.tagged != (_header.ClientTag is not None):
+            return False
+        if self.href_id is not None and self.href_id != href_id:
+            return False
+        if self.body_type is not None and self.body_type != _header.MessageBodyType:
+            return False
+        if (
+            self.communique_type is not None
+            and self.communique_type != message.CommuniqueType
+        ):
+            return False
+        if self.url_prefix is not None and self.url_prefix not in _url_prefixes(
+            _header.Url or ""
+        ):
+            return False
+        return True
+
+
+class EventBus:
+    """
+    Route messages to handlers by Url prefix, href id, body type and type.
+
+    A handler is filed in an index under the most selective criterion it
+    gave, so a message is only checked against the handlers filed under its
+    own href id, Url prefixes, body type and communique type. Handlers with
+    no criteria at all see every message.
+
+    Only the message header is looked at, so bodies stay undecoded for
+    handlers that don't read them. The href id is the one in the header Url.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.Block,
+        observer: Optional[DispatchObserver] = None,
+    ):
+        """observer is given to the DispatchQueue of every handler."""
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.observer = observer
+
+        self._ids = itertools.count()
+        self._by_href_id: Dict[int, Set[EventRegistration]] = {}
+        self._by_url_prefix: Dict[str, Set[EventRegistration]] = {}
+        self._by_body_type: Dict[MessageBodyTypeEnum, Set[EventRegistration]] = {}
+        self._by_communique_type: Dict[CommuniqueType, Set[EventRegistration]] = {}
+        self._everything: Set[EventRegistration] = set()
+        self.registrations: Dict[int, EventRegistration] = {}
+
+    def subscribe(
+        self,
+        callback: MessageCallback,
+        *,
+        url_prefix: Optional[str] = None,
+        href_id: Optional[int] = None,
+        body_type: Optional[MessageBodyTypeEnum] = None,
+        communique_type: Optional[CommuniqueType] = None,
+        tagged: Optional[bool] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
+    ) -> EventRegistration:
+        """
+        Call callback with every message matching all of the given criteria.
+
+        url_prefix matches whole path segments, so "/zone/1" matches
+        "/zone/1/status" but not "/zone/12/status". tagged limits the handler
+        to messages with (True) or without (False) a ClientTag.
+        """
+        if not callable(callback):
+            raise TypeError("callback must be callable")
+
+        if url_prefix is not None:
+            url_prefix = url_prefix.rstrip("/")
+
+        _registration = EventRegistration(
+            id=next(self._ids),
+            queue=DispatchQueue(
+                callback,
+                maxsize=self.queue_size,
+                policy=overflow_policy or self.overflow_policy,
+                observer=self.observer,
+            ),
+            url_prefix=url_prefix,
+            href_id=href_id,
+            body_type=body_type,
+            communique_type=communique_type,
+            tagged=tagged,
+        )
+
+        if href_id is not None:
+            self._file(_registration, self._by_href_id, href_id)
+        elif url_prefix is not None:
+            self._file(_registration, self._by_url_prefix, url_prefix)
+        elif body_type is not None:
+            self._file(_registration, self._by_body_type, body_type)
+        elif communique_type is not None:
+            self._file(_registration, self._by_communique_type, communique_type)
+        else:
+            self._everything.add(_registration)
+
+        self.registrations[_registration.id] = _registration
+        return _registration
+
+    @staticmethod
+    def _file(registration: EventRegistration, index: Dict, key) -> None:
+        index.setdefault(key, set()).add(registration)
+        registration._index = index
+        registration._key = key
+
+    def unsubscribe(self, registration: EventRegistration) -> None:
+        """Stop delivering messages to a handler."""
+        if self.registrations.pop(registration.id, None) is None:
+            return
+
+        registration.queue.close()
+        if registration._key is None:
+            self._everything.discard(registration)
+            return
+
+        _filed = registration._index[registration._key]
+        _filed.discard(registration)
+        if not _filed:
+            del registration._index[registration._key]
+
+    def unsubscribe_callback(self, callback: MessageCallback) -> None:
+        """Unsubscribe the first handler registered with callback."""
+        for registration in self.registrations.values():
+            if registration.callback == callback:
+                self.unsubscribe(registration)
+                return
+        raise ValueError("callback is not subscribed")
+
+    def candidates(self, message: LeapMessage) -> List[EventRegistration]:
+        """Find the handlers filed under any key of the message."""
+        _header = message.Header
+        _url = _header.Url or ""
+        _href_id = id_from_href(_url)
+
+        _found: List[EventRegistration] = list(self._everything)
+        if _href_id is not None:
+            _found.extend(self._by_href_id.get(_href_id, ()))
+        if self._by_url_prefix:
+            for prefix in _url_prefixes(_url):
+                _found.extend(self._by_url_prefix.get(prefix, ()))
+        if _header.MessageBodyType is not None:
+            _found.extend(self._by_body_type.get(_header.MessageBodyType, ()))
+        _found.extend(self._by_communique_type.get(message.CommuniqueType, ()))
+
+        # Deliver in the order the handlers were registered
+        _found.sort(key=lambda x: x.id)
+        return [x for x in _found if x.matches(message, _href_id)]
+
+    async def publish(self, message: LeapMessage) -> int:
+        """Queue a message for every interested handler and return how many."""
+        _matches = self.candidates(message)
+        for registration in _matches:
+            await registration.queue.put(message)
+        return len(_matches)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the queue statistics of every handler."""
+        return {f"events-{x.id}": x.queue.stats() for x in self.registrations.values()}
+
+    def close(self) -> None:
+        """Stop delivering queued messages until the next publish."""
+        for registration in self.registrations.values():
+            # Closed queues drop what is put, so the next publish gets new ones
+            _queue = registration.queue
+            _queue.close()
+            registration.queue = DispatchQueue(
+                _queue.callback, _queue.maxsize, _queue.policy, _queue.observer
+            )
@@ -0,0 +1,113 @@
+"""
+Pluggable JSON parsing and serialization working on bytes.
+
+orjson or msgspec are used when installed (`pip install pylutron-leap[fast]`),
+otherwise the standard library json module. Every backend produces compact
+UTF-8 output so the encoded messages are the same whichever one is in use.
+"""
+
+import json
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any, Callable, Dict, List, Optional
+
+logger = getLogger(__name__)
+
+PREFERRED_BACKENDS = ["orjson", "msgspec", "json"]
+
+
+@dataclass(frozen=True)
+class JSONBackend:
+    name: str
+    loads: Callable[[bytes], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _load_orjson() -> JSONBackend:
+    import orjson
+
+    return JSONBackend("orjson", orjson.loads, orjson.dumps)
+
+
+def _load_msgspec() -> JSONBackend:
+    import msgspec
+
+    _decoder = msgspec.json.Decoder()
+    _encoder = msgspec.json.Encoder()
+    return JSONBackend("msgspec", _decoder.decode, _encoder.encode)
+
+
+def _load_json() -> JSONBackend:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode(
+            "UTF-8"
+        )
+
+    return JSONBackend("json", json.loads, _dumps)
+
+
+_LOADERS: Dict[str, Callable[[], JSONBackend]] = {
+    "orjson": _load_orjson,
+    "msgspec": _load_msgspec,
+    "json": _load_json,
+}
+
+_current: Optional[JSONBackend] = None
+
+
+def available_backends() -> List[str]:
+    """List the backends that can be imported, in order of preference."""
+    _names: List[str] = []
+    for name in PREFERRED_BACKENDS:
+        try:
+            _LOADERS[name]()
+        except ImportError:
+            continue
+        _names.append(name)
+    return _names
+
+
+def get_backend(name: str) -> JSONBackend:
+    """Load a backend by name. Raises ImportError if it is not installed."""
+    if name not in _LOADERS:
+        raise ValueError(f"Unknown JSON backend {name!r}")
+    return _LOADERS[name]()
+
+
+def use_backend(name: Optional[str] = None) -> JSONBackend:
+    """
+    Select the JSON backend used by the library.
+
+    With no name, the first installed backend from PREFERRED_BACKENDS is used.
+    """
+    global _current
+
+    if name is not None:
+        _current = get_backend(name)
+    else:
+        for _name in PREFERRED_BACKENDS:
+            try:
+                _current = get_backend(_name)
+                break
+            except ImportError:
+                continue
+
+    logger.debug("Using %s for JSON", _current.name)  # type: ignore
+    return _current  # type: ignore
+
+
+def current_backend() -> JSONBackend:
+    """Get the selected backend, choosing the default one on first use."""
+    if _current is None:
+        return use_backend()
+    return _current
+
+
+def loads(data: bytes) -> Any:
+    """Parse a JSON document from bytes."""
+    return current_backend().loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize an object to compact JSON bytes."""
+    return current_backend().dumps(obj)
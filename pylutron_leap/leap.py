@@ -1,56 +1,275 @@
 """LEAP protocol layer."""
 
 import asyncio
-import json
 import logging
+import ssl
+import time
 import uuid
-from typing import Awaitable, Callable, Dict, List, Tuple
-
-from marshmallow import INCLUDE
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple, Union
 
+from pylutron_leap.api.codec import LazyLeapMessage, decode_message, encode_message
 from pylutron_leap.api.enum import CommuniqueType
-from pylutron_leap.api.message import LeapMessage
+from pylutron_leap.api.message import LeapMessage, LeapMessageHeader
+from pylutron_leap.api.streaming import DEFAULT_STREAM_THRESHOLD, decode_streamed
+from pylutron_leap.dispatch import (
+    DEFAULT_QUEUE_SIZE,
+    DispatchQueue,
+    MessageCallback,
+    OverflowPolicy,
+)
+from pylutron_leap.eventbus import EventBus
 from pylutron_leap.exception import SessionDisconnectedError
+from pylutron_leap.jsonbackend import loads
+from pylutron_leap.metrics import LeapMetrics, normalize_url
+from pylutron_leap.protocol import LeapLineProtocol, LeapStreamReader
+from pylutron_leap.traffic import TrafficLog, TrafficRecorder
+from pylutron_leap.transport import resume_session
 
 logger = logging.getLogger(__name__)
 _DEFAULT_LIMIT = 2**16
+DEFAULT_MAX_IN_FLIGHT = 32
+DEFAULT_COALESCE_WINDOW = 0.0
+SWEEP_INTERVAL = 0.1
+
+FRAMING_PROTOCOL = "protocol"
+FRAMING_STREAM = "stream"
+DEFAULT_FRAMING = FRAMING_PROTOCOL
 
 
 def _make_tag() -> str:
     return str(uuid.uuid4())
 
 
-MessageCallback = Callable[[LeapMessage], Awaitable[None]]
-
-
 class LeapProtocol:
     """A wrapper for making LEAP calls."""
 
     def __init__(
         self,
-        reader: asyncio.StreamReader,
-        writer: asyncio.StreamWriter,
+        reader: Union[asyncio.StreamReader, LeapStreamReader, LeapLineProtocol],
+        writer: Union[asyncio.StreamWriter, LeapLineProtocol],
+        lazy_decode: bool = True,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        coalesce_window: Optional[float] = DEFAULT_COALESCE_WINDOW,
+        timeouts: Optional["Counter[str]"] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.Block,
+        events: Optional[EventBus] = None,
+        stream_threshold: Optional[int] = DEFAULT_STREAM_THRESHOLD,
+        traffic: Optional[TrafficLog] = None,
+        metrics: Optional[LeapMetrics] = None,
+        recorder: Optional[TrafficRecorder] = None,
     ):
-        """Wrap a reader and writer with a LEAP request and response protocol."""
+        """
+        Wrap a reader and writer with a LEAP request and response protocol.
+
+        With lazy_decode, received messages are LazyLeapMessages that only
+        decode their Body when a handler reads it.
+
+        At most max_in_flight requests are sent without a response. Further
+        requests wait for a slot before they are written.
+
+        Requests are handed to a single writer task that sends everything
+        queued in the same event loop iteration, plus coalesce_window seconds
+        if it is above zero, with one writelines call. A coalesce_window of
+        None writes every request as soon as it is made.
+
+        Requests that time out are counted by Url in timeouts. Pass a Counter
+        to keep the counts across reconnects.
+
+        Every subscription callback gets a queue of queue_size messages that
+        is drained by its own task, so a slow callback doesn't stop the
+        reader. overflow_policy decides what happens when a queue is full.
+
+        Untagged messages and messages for subscriptions are published to
+        events. Pass an EventBus to keep its handlers across reconnects.
+
+        Lines of any length are read. The big array in the Body of messages
+        of at least stream_threshold bytes is decoded element by element as
+        it is iterated, see api.streaming. None turns this off.
+
+        The lines sent and received are given to traffic, which logs them to
+        pylutron_leap.traffic when that logger is enabled for DEBUG, and to
+        recorder if one is given.
+
+        Request latencies, traffic volume and decode and dispatch times are
+        recorded in metrics. Pass a LeapMetrics to keep them across
+        reconnects.
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        if isinstance(reader, asyncio.StreamReader):
+            reader = LeapStreamReader(reader)
         self._reader = reader
         self._writer = writer
+        self.stream_threshold = stream_threshold
+        self.traffic = traffic if traffic is not None else TrafficLog()
+        self.metrics = metrics if metrics is not None else LeapMetrics()
+        self.recorder = recorder
+        self._lazy_decode = lazy_decode
         self._in_flight_requests: Dict[str, "asyncio.Future[LeapMessage]"] = {}
-        self._tagged_subscriptions: Dict[str, MessageCallback] = {}
-        self._unsolicited_subs: List[MessageCallback] = []
+        self._tagged_subscriptions: Dict[str, DispatchQueue] = {}
+        self._subscription_urls: Dict[str, str] = {}
+        # Tags of subscribe requests whose response is queued for the callback
+        self._queued_responses: Set[str] = set()
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self._owns_events = events is None
+        self.events = (
+            events
+            if events is not None
+            else EventBus(
+                queue_size, overflow_policy, observer=self.metrics.observe_dispatch
+            )
+        )
+
+        self.max_in_flight = max_in_flight
+        self._window = asyncio.Semaphore(max_in_flight)
+        self._waiting = 0
+        self.wait_count = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+        self.coalesce_window = coalesce_window
+        self._write_queue: List[bytes] = []
+        self._write_ready = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+        self.write_calls = 0
+
+        self.timeouts: "Counter[str]" = timeouts if timeouts is not None else Counter()
+        self.sweep_interval = SWEEP_INTERVAL
+        self._deadlines: Dict[str, Tuple[float, str]] = {}
+        self._sweeper_task: Optional[asyncio.Task] = None
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests sent that are waiting for a response."""
+        return len(self._in_flight_requests)
+
+    def is_waiting_for(self, tag: str) -> bool:
+        """Check if the request with a ClientTag is waiting for its response."""
+        return tag in self._in_flight_requests
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a free slot in the in-flight window."""
+        return self._waiting
+
+    @property
+    def tls_session(self) -> Optional[ssl.SSLSession]:
+        """The TLS session of the connection, to resume it on reconnect."""
+        _ssl_object = self._ssl_object()
+        return None if _ssl_object is None else _ssl_object.session
+
+    @property
+    def tls_session_reused(self) -> bool:
+        """Check if the connection resumed an earlier TLS session."""
+        _ssl_object = self._ssl_object()
+        return _ssl_object is not None and _ssl_object.session_reused
+
+    def _ssl_object(self) -> Optional[ssl.SSLObject]:
+        _get_extra_info = getattr(self._writer, "get_extra_info", None)
+        if _get_extra_info is None:
+            return None
+        return _get_extra_info("ssl_object")
+
+    def flow_stats(self) -> Dict[str, float]:
+        """
+        Summarize the in-flight window.
+
+        A queue_depth that stays above zero, or a growing total_wait_time,
+        means requests are produced faster than the bridge answers them.
+        """
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth,
+            "wait_count": self.wait_count,
+            "total_wait_time": self.total_wait_time,
+            "max_wait_time": self.max_wait_time,
+            "dispatch_depth": sum(x.depth for x in self._dispatch_queues()),
+            "dispatch_dropped": sum(x.dropped for x in self._dispatch_queues()),
+        }
+
+    def _dispatch_queues(self) -> List[DispatchQueue]:
+        return [
+            *self._tagged_subscriptions.values(),
+            *(x.queue for x in self.events.registrations.values()),
+        ]
+
+    def dispatch_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the queue statistics of every subscription and event handler."""
+        _stats = {tag: x.stats() for tag, x in self._tagged_subscriptions.items()}
+        _stats.update(self.events.stats())
+        return _stats
+
+    def _dispatch_queue(
+        self, callback: MessageCallback, overflow_policy: Optional[OverflowPolicy]
+    ) -> DispatchQueue:
+        return DispatchQueue(
+            callback,
+            maxsize=self.queue_size,
+            policy=overflow_policy or self.overflow_policy,
+            observer=self.metrics.observe_dispatch,
+        )
+
+    async def _acquire_slot(self) -> None:
+        if not self._window.locked():
+            await self._window.acquire()
+            return
+
+        _loop = asyncio.get_running_loop()
+        _start = _loop.time()
+        self._waiting += 1
+        try:
+            await self._window.acquire()
+        finally:
+            self._waiting -= 1
 
-    async def request(self, message: LeapMessage) -> LeapMessage:
-        """Make a request to the bridge and return the response."""
+        _waited = _loop.time() - _start
+        self.wait_count += 1
+        self.total_wait_time += _waited
+        self.max_wait_time = max(self.max_wait_time, _waited)
+
+    async def request(
+        self, message: LeapMessage, timeout: Optional[float] = None
+    ) -> LeapMessage:
+        """
+        Make a request to the bridge and return the response.
+
+        If timeout is given, asyncio.TimeoutError is raised when no response
+        arrives within that many seconds, including any time spent waiting
+        for a slot in the in-flight window.
+        """
         if message.Header.ClientTag is None:
             _tag = _make_tag()
             message.Header.ClientTag = _tag
         else:
             _tag = message.Header.ClientTag
 
-        _future: asyncio.Future = asyncio.get_running_loop().create_future()
-        _msg_dict = LeapMessage.Schema().dump(message)  # type: ignore
+        _text = encode_message(message)
+        _loop = asyncio.get_running_loop()
+        _url = message.Header.Url
 
+        if timeout is None:
+            await self._acquire_slot()
+        else:
+            _deadline = _loop.time() + timeout
+            try:
+                await asyncio.wait_for(self._acquire_slot(), timeout)
+            except asyncio.TimeoutError:
+                self._timed_out(_url)
+                raise
+
+        _future: asyncio.Future = _loop.create_future()
         self._in_flight_requests[_tag] = _future
 
+        if timeout is not None:
+            self._deadlines[_tag] = (_deadline, _url)
+            if self._sweeper_task is None:
+                self._sweeper_task = _loop.create_task(self._sweep())
+
         # remove cancelled tasks
         def clean_up(future):
             if future.cancelled():
@@ -58,69 +277,177 @@ class LeapProtocol:
 
         _future.add_done_callback(clean_up)
 
+        self.metrics.in_flight.labels().inc()
         try:
-            _text = json.dumps(_msg_dict).encode("UTF-8")
-            logger.debug(f"Sending {_text!r}")
-            self._writer.write(_text + b"\r\n")
-
-            return await _future
+            self.traffic.sent(_text)
+            if self.recorder is not None:
+                self.recorder.sent(_text)
+            self.metrics.sent(len(_text) + 2)
+            _start = time.perf_counter()
+            if self.coalesce_window is None:
+                self._writer.writelines((_text, b"\r\n"))
+                self.write_calls += 1
+                await self._writer.drain()
+            else:
+                self._queue_write(_text)
+
+            _response = await _future
+            self.metrics.observe_request(message, time.perf_counter() - _start)
+            return _response
         finally:
+            self.metrics.in_flight.labels().dec()
             self._in_flight_requests.pop(_tag, None)
+            self._deadlines.pop(_tag, None)
+            self._window.release()
+
+    async def _sweep(self) -> None:
+        """Fail requests that are past their deadline, until none are left."""
+        _loop = asyncio.get_running_loop()
+        try:
+            while self._deadlines:
+                await asyncio.sleep(self.sweep_interval)
+
+                _now = _loop.time()
+                for tag, (deadline, url) in list(self._deadlines.items()):
+                    if deadline > _now:
+                        continue
+
+                    del self._deadlines[tag]
+                    _future = self._in_flight_requests.pop(tag, None)
+                    if _future is not None and not _future.done():
+                        logger.warning("Request to %s timed out", url)
+                        self._timed_out(url)
+                        _future.set_exception(
+                            asyncio.TimeoutError(f"No response to {url}")
+                        )
+        finally:
+            self._sweeper_task = None
+
+    def _timed_out(self, url: str) -> None:
+        self.timeouts[url] += 1
+        self.metrics.request_timeouts.labels(normalize_url(url)).inc()
+
+    def _queue_write(self, data: bytes) -> None:
+        """Queue a line for the writer task, starting it if needed."""
+        self._write_queue.append(data)
+        self._write_queue.append(b"\r\n")
+        self._write_ready.set()
+
+        if self._writer_task is None:
+            self._writer_task = asyncio.get_running_loop().create_task(
+                self._write_loop()
+            )
+
+    async def _write_loop(self) -> None:
+        """Flush queued lines in batches until the connection is closed."""
+        try:
+            while True:
+                await self._write_ready.wait()
+                # Let the rest of this loop iteration queue its requests too
+                await asyncio.sleep(self.coalesce_window or 0)
+
+                _batch, self._write_queue = self._write_queue, []
+                self._write_ready.clear()
+
+                logger.debug("Flushing %d lines", len(_batch) // 2)
+                self._writer.writelines(_batch)
+                self.write_calls += 1
+                await self._writer.drain()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("Writing to the bridge failed")
+            # Lines still queued belong to the requests failed here
+            self._write_queue = []
+            for tag in list(self._in_flight_requests):
+                _request = self._in_flight_requests.pop(tag)
+                self._deadlines.pop(tag, None)
+                if not _request.done():
+                    _request.set_exception(SessionDisconnectedError())
+        finally:
+            # The next queued write starts a new loop, unless close() already
+            # cleared this one
+            if self._writer_task is asyncio.current_task():
+                self._writer_task = None
 
     async def run(self):
         """Event monitoring loop."""
         logger.debug("Entering run() loop")
         while not self._reader.at_eof():
             _received: bytes = await self._reader.readline()
-            logger.debug(f"Received raw bytes: {_received.decode('UTF-8') }")
-
             if _received == b"":
                 break
+            self.traffic.received(_received)
+            if self.recorder is not None:
+                self.recorder.received(_received)
+            _start = time.perf_counter()
+
+            msg: Optional[LeapMessage] = None
+            if (
+                self.stream_threshold is not None
+                and len(_received) >= self.stream_threshold
+            ):
+                msg = decode_streamed(_received)
+
+            if msg is None:
+                _resp_dict: Dict[str, str | Dict] = loads(_received)
+                if isinstance(_resp_dict, dict):
+                    msg = decode_message(_resp_dict, lazy=self._lazy_decode)
+
+            if msg is not None:
+                self.metrics.received(len(_received))
+                self.metrics.observe_decode(msg, time.perf_counter() - _start)
+                if isinstance(msg, LazyLeapMessage) and not msg.is_decoded:
+                    # The body is timed when a handler first reads it
+                    msg.decode_observer = self.metrics.observe_body_decode
 
-            _resp_dict: Dict[str, str | Dict] = json.loads(_received.decode("UTF-8"))
-
-            if isinstance(_resp_dict, dict):
-                msg: LeapMessage = LeapMessage.Schema().load(
-                    _resp_dict, unknown=INCLUDE, partial=True
-                )
                 tag = msg.Header.ClientTag
                 if tag is not None:
                     in_flight = self._in_flight_requests.pop(tag, None)
                     if in_flight is not None and not in_flight.done():
                         logger.debug("received: %s", msg)
                         in_flight.set_result(msg)
+                        _status = msg.Header.StatusCode
+                        if (
+                            tag in self._queued_responses
+                            and _status is not None
+                            and _status.is_successful()
+                        ):
+                            await self._tagged_subscriptions[tag].put(msg)
                     else:
                         subscription = self._tagged_subscriptions.get(tag, None)
                         if subscription is not None:
-                            logger.debug(f"received for subscription {tag}: {msg}")
-                            logger.debug(f"Calling {subscription}")
-                            await subscription(msg)
+                            logger.debug("received for subscription %s: %s", tag, msg)
+                            await subscription.put(msg)
+                            await self.events.publish(msg)
                         else:
                             logger.error(
-                                f"Was not expecting message with tag {tag}: {msg}"
+                                "Was not expecting message with tag %s: %s", tag, msg
                             )
                 else:
                     logger.debug("Received message with no tag: %s", msg)
-                    for handler in self._unsolicited_subs:
-                        try:
-                            await handler(msg)
-                        except Exception:  # pylint: disable=broad-except
-                            logger.exception(
-                                "Got exception from unsolicited message handler"
-                            )
+                    await self.events.publish(msg)
 
     async def subscribe(
-        self, msg: LeapMessage, callback: MessageCallback
+        self,
+        msg: LeapMessage,
+        callback: MessageCallback,
+        timeout: Optional[float] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
+        queue_response: bool = False,
     ) -> Tuple[LeapMessage, str]:
         """
         Subscribe to events from the bridge.
 
         This is similar to a normal request, except that the bridge is expected to send
         additional responses with the same tag value at a later time. These additional
-        responses will be handled by the provided callback.
+        responses will be handled by the provided callback, in order, from a task of
+        its own. overflow_policy overrides the one of the protocol. With
+        queue_response, a successful response is also given to the callback, ahead
+        of the messages that follow it.
 
         This returns both the response message and a string that will be required for
-        unsubscribing (not implemented).
+        unsubscribing.
         """
         if not callable(callback):
             raise TypeError("callback must be callable")
@@ -128,55 +455,175 @@ class LeapProtocol:
         if not msg.CommuniqueType == CommuniqueType.SubscribeRequest:
             raise TypeError("CommuniqueType must be SubscribeRequest")
 
-        if msg.Header.ClientTag is None:
+        tag = msg.Header.ClientTag
+        if tag is None:
             tag = _make_tag()
             msg.Header.ClientTag = tag
 
-        _resp: LeapMessage = await self.request(msg)
+        # Registered up front, so nothing the bridge sends after the response
+        # arrives before the queue exists
+        _queue = self._dispatch_queue(callback, overflow_policy)
+        self._tagged_subscriptions[tag] = _queue
+        self._subscription_urls[tag] = msg.Header.Url
+        if queue_response:
+            self._queued_responses.add(tag)
+
+        try:
+            _resp: LeapMessage = await self.request(msg, timeout=timeout)
+        except BaseException:
+            self._end_subscription(tag)
+            raise
+        finally:
+            self._queued_responses.discard(tag)
 
         status = _resp.Header.StatusCode
         if status is not None and status.is_successful():
-            self._tagged_subscriptions[tag] = callback
-            logger.debug(f"Subscribed to {msg.Header.Url} as {tag}")
+            logger.debug("Subscribed to %s as %s", msg.Header.Url, tag)
         else:
-            logger.error(f"Subscription to {msg.Header.Url} failed.")
+            logger.error("Subscription to %s failed.", msg.Header.Url)
+            self._end_subscription(tag)
 
         return (_resp, tag)
 
-    def subscribe_unsolicited(self, callback: MessageCallback):
+    def _end_subscription(self, tag: str) -> Optional[str]:
+        """Drop the queue of a subscription and return its Url, if it has one."""
+        _queue = self._tagged_subscriptions.pop(tag, None)
+        if _queue is not None:
+            _queue.close()
+        return self._subscription_urls.pop(tag, None)
+
+    async def unsubscribe(
+        self, tag: str, timeout: Optional[float] = None
+    ) -> Optional[LeapMessage]:
+        """
+        End the subscription made with tag.
+
+        Messages for the subscription are dropped from now on, including any
+        still queued for the callback. Returns the response of the bridge, or
+        None if tag is not subscribed.
+        """
+        _url = self._end_subscription(tag)
+        if _url is None:
+            return None
+
+        # The bridge knows subscriptions by Url
+        _msg = LeapMessage(
+            CommuniqueType=CommuniqueType.UnsubscribeRequest,
+            Header=LeapMessageHeader(Url=_url),
+        )
+        _resp = await self.request(_msg, timeout=timeout)
+
+        status = _resp.Header.StatusCode
+        if status is None or not status.is_successful():
+            logger.error("Unsubscribing from %s failed: %s", _url, status)
+        return _resp
+
+    def subscribe_unsolicited(
+        self,
+        callback: MessageCallback,
+        overflow_policy: Optional[OverflowPolicy] = None,
+    ):
         """
         Subscribe to notifications of unsolicited events.
 
         The provided callback will be executed when the bridge sends an untagged
-        LeapMessage.
+        LeapMessage. Use events.subscribe() to only get some of them.
         """
-        if not callable(callback):
-            raise TypeError("callback must be callable")
-        self._unsolicited_subs.append(callback)
+        self.events.subscribe(callback, tagged=False, overflow_policy=overflow_policy)
 
     def unsubscribe_unsolicited(self, callback: MessageCallback):
         """Unsubscribe from notifications of unsolicited events."""
-        self._unsolicited_subs.remove(callback)
+        self.events.unsubscribe_callback(callback)
 
     def close(self):
         """Disconnect."""
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            self._writer_task = None
+        if self._sweeper_task is not None:
+            self._sweeper_task.cancel()
+        self._deadlines.clear()
         self._writer.close()
 
         for request in self._in_flight_requests.values():
-            request.set_exception(SessionDisconnectedError())
+            if not request.done():
+                request.set_exception(SessionDisconnectedError())
         self._in_flight_requests.clear()
+
+        for queue in self._tagged_subscriptions.values():
+            queue.close()
         self._tagged_subscriptions.clear()
+        self._subscription_urls.clear()
+        if self._owns_events:
+            self.events.close()
 
 
 async def open_connection(
-    host: str, port: int, *, limit: int = _DEFAULT_LIMIT, **kwds
+    host: str,
+    port: int,
+    *,
+    limit: int = _DEFAULT_LIMIT,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    coalesce_window: Optional[float] = DEFAULT_COALESCE_WINDOW,
+    timeouts: Optional["Counter[str]"] = None,
+    tls_session: Optional[ssl.SSLSession] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    overflow_policy: OverflowPolicy = OverflowPolicy.Block,
+    events: Optional[EventBus] = None,
+    framing: str = DEFAULT_FRAMING,
+    stream_threshold: Optional[int] = DEFAULT_STREAM_THRESHOLD,
+    traffic: Optional[TrafficLog] = None,
+    metrics: Optional[LeapMetrics] = None,
+    recorder: Optional[TrafficRecorder] = None,
+    **kwds,
 ) -> LeapProtocol:
-    """Open a stream and wrap it with LEAP."""
-    logger.debug(f"Connecting to {host}:{port}")
-    reader, writer = await asyncio.open_connection(host, port, limit=limit, **kwds)
-
-    _peer = writer.transport.get_extra_info("peername")
-    _cipher = writer.transport.get_extra_info("cipher")
-    logger.debug(f"Connected to {_peer} using {_cipher}")
-
-    return LeapProtocol(reader, writer)
+    """
+    Open a connection and wrap it with LEAP.
+
+    tls_session is resumed if ssl is a LeapSSLContext and the bridge still
+    knows the session.
+
+    framing selects how lines are read: FRAMING_PROTOCOL splits them in a
+    LeapLineProtocol as they arrive, FRAMING_STREAM uses a StreamReader that
+    buffers limit bytes. Either way, lines of any length are read.
+    """
+    _reader: Union[asyncio.StreamReader, LeapLineProtocol]
+    _writer: Union[asyncio.StreamWriter, LeapLineProtocol]
+
+    logger.debug("Connecting to %s:%s", host, port)
+    resume_session(tls_session)
+    try:
+        if framing == FRAMING_PROTOCOL:
+            _, _reader = await asyncio.get_running_loop().create_connection(
+                LeapLineProtocol, host, port, **kwds
+            )
+            _writer = _reader
+        elif framing == FRAMING_STREAM:
+            _reader, _writer = await asyncio.open_connection(
+                host, port, limit=limit, **kwds
+            )
+        else:
+            raise ValueError(f"Unknown framing {framing!r}")
+    finally:
+        resume_session(None)
+
+    logger.debug(
+        "Connected to %s using %s",
+        _writer.get_extra_info("peername"),
+        _writer.get_extra_info("cipher"),
+    )
+
+    return LeapProtocol(
+        _reader,
+        _writer,
+        max_in_flight=max_in_flight,
+        coalesce_window=coalesce_window,
+        timeouts=timeouts,
+        queue_size=queue_size,
+        overflow_policy=overflow_policy,
+        events=events,
+        stream_threshold=stream_threshold,
+        traffic=traffic,
+        metrics=metrics,
+        recorder=recorder,
+    )
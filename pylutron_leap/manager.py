@@ -0,0 +1,157 @@
+"""Sessions to every processor of a multi-processor project."""
+
+import asyncio
+import logging
+import re
+import socket
+from typing import Any, Dict, Iterable, List, Optional, Set, Type, cast
+
+from pylutron_leap.api.message import LeapMessage
+from pylutron_leap.models import BaseModel
+from pylutron_leap.models.area import Area
+from pylutron_leap.models.device import Device
+from pylutron_leap.models.processor import ProcessorModel
+from pylutron_leap.models.zone import Zone
+from pylutron_leap.session import LEAP_PORT, LeapSession
+
+logger = logging.getLogger(__name__)
+
+# Url prefix of the objects that belong to a single processor
+_URL_MODELS: Dict[str, Type[BaseModel]] = {
+    "area": Area,
+    "device": Device,
+    "zone": Zone,
+}
+_URLRE = re.compile(r"/(\w+)/(\d+)")
+
+
+class LeapManager:
+    """
+    Talk to all processors of a project through one object.
+
+    The processors are found in the master device list of the processor at
+    host, and every other one gets its own LeapSession. The models of all
+    sessions are merged, and requests for an area, device or zone are sent
+    to the session of the processor that reported it.
+    """
+
+    def __init__(self, host: str, port: int = LEAP_PORT, **session_options: Any):
+        """Options other than host and port are passed to every LeapSession."""
+        self.host = host
+        self.port = port
+        self.session_options = session_options
+
+        self.sessions: List[LeapSession] = []
+        self.processors: List[ProcessorModel] = []
+        # Processors that were found but could not be connected to
+        self.unreachable: List[str] = []
+
+    async def connect(self, timeout: Optional[float] = None) -> None:
+        """
+        Connect to the processor at host, then to the others it knows of.
+
+        The other processors are connected to concurrently. Any that fail are
+        listed in unreachable instead of failing the whole connect.
+        """
+        _primary = LeapSession(self.host, self.port, **self.session_options)
+        await _primary.connect(timeout=timeout)
+        self.sessions = [_primary]
+        self.unreachable = []
+
+        self.processors = list(await ProcessorModel.get_processors(_primary))
+        logger.debug("Found processors: %s", self.processors)
+
+        _known = await self._addresses(self.host)
+        _hosts: List[str] = []
+        for processor in self.processors:
+            if processor.ip_addr is None or processor.ip_addr in _known:
+                continue
+            if processor.ip_addr not in _hosts:
+                _hosts.append(processor.ip_addr)
+
+        _sessions = [LeapSession(x, self.port, **self.session_options) for x in _hosts]
+        _results = await asyncio.gather(
+            *(x.connect(timeout=timeout) for x in _sessions), return_exceptions=True
+        )
+
+        _by_host: Dict[str, LeapSession] = {}
+        for host, session, result in zip(_hosts, _sessions, _results):
+            if isinstance(result, BaseException):
+                logger.warning("Could not connect to processor at %s: %r", host, result)
+                session.close()
+                self.unreachable.append(host)
+            else:
+                self.sessions.append(session)
+                _by_host[host] = session
+
+        for processor in self.processors:
+            processor.session = _by_host.get(cast(str, processor.ip_addr), _primary)
+
+    async def _addresses(self, host: str) -> Set[str]:
+        """Get the addresses a host name resolves to, including the name itself."""
+        _addresses = {host}
+        try:
+            _info = await asyncio.get_running_loop().getaddrinfo(
+                host, self.port, type=socket.SOCK_STREAM
+            )
+        except OSError:
+            return _addresses
+
+        _addresses.update(x[4][0] for x in _info)
+        return _addresses
+
+    @property
+    def models(self) -> List[BaseModel]:
+        """Models of every session, each one only once."""
+        _models: Dict[tuple, BaseModel] = {}
+        for session in self.sessions:
+            for model in session.models:
+                _models.setdefault((type(model), model.leap_id), model)
+        return list(_models.values())
+
+    @property
+    def areas(self) -> Iterable[Area]:
+        return cast(Iterable[Area], filter(lambda x: isinstance(x, Area), self.models))
+
+    @property
+    def devices(self) -> Iterable[Device]:
+        return cast(
+            Iterable[Device], filter(lambda x: isinstance(x, Device), self.models)
+        )
+
+    @property
+    def zones(self) -> Iterable[Zone]:
+        return cast(Iterable[Zone], filter(lambda x: isinstance(x, Zone), self.models))
+
+    def session_for(self, model_type: Type[BaseModel], leap_id: int) -> LeapSession:
+        """Find the session of the processor that owns a model."""
+        for session in self.sessions:
+            if session.models.get(model_type, leap_id) is not None:
+                return session
+
+        if not self.sessions:
+            raise RuntimeError("Not connected")
+        return self.sessions[0]
+
+    def session_for_url(self, url: str) -> LeapSession:
+        """Find the session to send a request for url to."""
+        _match = _URLRE.match(url)
+        if _match is not None and _match.group(1) in _URL_MODELS:
+            return self.session_for(_URL_MODELS[_match.group(1)], int(_match.group(2)))
+
+        if not self.sessions:
+            raise RuntimeError("Not connected")
+        return self.sessions[0]
+
+    async def request(
+        self, message: LeapMessage, timeout: Optional[float] = None
+    ) -> LeapMessage:
+        """Make a request to the processor that owns the object in its Url."""
+        _session = self.session_for_url(message.Header.Url)
+        return await _session.request(message, timeout=timeout)
+
+    def close(self):
+        """Disconnect from every processor."""
+        for session in self.sessions:
+            session.close()
+        self.sessions = []
@@ -0,0 +1,417 @@
+"""
+Counters, gauges and histograms describing how the library behaves.
+
+A MetricsRegistry holds metric families, each with a fixed set of label
+names. Snapshots are plain dicts, or text in the Prometheus exposition
+format; render_prometheus() joins every registry in the process so all
+sessions can be scraped from one endpoint. LeapMetrics holds the families
+that LeapProtocol and LeapSession update.
+"""
+
+import re
+import weakref
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pylutron_leap.api.message import LeapMessage
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+_registries: "weakref.WeakSet[MetricsRegistry]" = weakref.WeakSet()
+
+
+@lru_cache(maxsize=1024)
+def normalize_url(url: Optional[str]) -> str:
+    """
+    Turn a Url into a label with few distinct values.
+
+    Ids become {id} and queries are dropped, so "/zone/12/status" and
+    "/zone/13/status" are both "/zone/{id}/status".
+    """
+    if not url:
+        return ""
+    return _ID_SEGMENT.sub("/{id}", url.split("?", 1)[0])
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ["value"]
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__: List[str] = []
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ["buckets", "counts", "sum", "count"]
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One count per bucket plus +Inf, not cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Dict[float, int]:
+        _total = 0
+        _result: Dict[float, int] = {}
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            _total += count
+            _result[bound] = _total
+        return _result
+
+
+class Metric:
+    """A family of values of the same kind, one per combination of labels."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = documentation
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        """Get the value for the given label values, in label name order."""
+        _child = self._children.get(values)
+        if _child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}")
+            _child = self._new_child()
+            self._children[values] = _child
+        return _child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError()
+
+    def clear(self) -> None:
+        self._children.clear()
+
+    def samples(self) -> Iterable[Tuple[Dict[str, str], Any]]:
+        for values, child in list(self._children.items()):
+            yield dict(zip(self.label_names, values)), child
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [
+            {"labels": labels, "value": self._snapshot_value(child)}
+            for labels, child in self.samples()
+        ]
+
+    def _snapshot_value(self, child: Any) -> Any:
+        return child.value
+
+    def prometheus(self, const_labels: Dict[str, str]) -> List[str]:
+        return [
+            f"{self.name}{_format_labels({**const_labels, **labels})}"
+            f" {_format_value(child.value)}"
+            for labels, child in self.samples()
+        ]
+
+
+class Counter(Metric):
+    """A total that only goes up."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the value of a family without labels."""
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Set the value of a family without labels."""
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    """Observations counted in buckets, with their count and sum."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record a value in a family without labels."""
+        self.labels().observe(value)
+
+    def _snapshot_value(self, child: _HistogramChild) -> Any:
+        return {
+            "count": child.count,
+            "sum": child.sum,
+            "buckets": child.cumulative(),
+        }
+
+    def prometheus(self, const_labels: Dict[str, str]) -> List[str]:
+        _lines: List[str] = []
+        for labels, child in self.samples():
+            _labels = {**const_labels, **labels}
+            for bound, count in child.cumulative().items():
+                _bucket = _format_labels({**_labels, "le": _format_value(bound)})
+                _lines.append(f"{self.name}_bucket{_bucket} {count}")
+            _lines.append(
+                f"{self.name}_sum{_format_labels(_labels)} {_format_value(child.sum)}"
+            )
+            _lines.append(f"{self.name}_count{_format_labels(_labels)} {child.count}")
+        return _lines
+
+
+class MetricsRegistry:
+    """
+    The metric families of one session or connection.
+
+    const_labels are added to every sample in the Prometheus output, to tell
+    the registries of a process apart. Collectors are called before every
+    snapshot, to update gauges from state that is kept elsewhere.
+    """
+
+    def __init__(self, const_labels: Optional[Dict[str, str]] = None):
+        self.const_labels = dict(const_labels or {})
+        self.metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        _registries.add(self)
+
+    def _add(self, metric: Metric) -> Any:
+        _existing = self.metrics.get(metric.name)
+        if _existing is not None:
+            if type(_existing) is not type(metric):
+                raise ValueError(f"{metric.name} is already a {_existing.kind}")
+            return _existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> Counter:
+        return self._add(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> None:
+        for collector in self._collectors:
+            collector()
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the samples of every family, by name."""
+        self.collect()
+        return {name: x.snapshot() for name, x in self.metrics.items()}
+
+    def prometheus(self) -> str:
+        """Render the registry in the Prometheus text format."""
+        return render_prometheus([self])
+
+
+def render_prometheus(registries: Optional[Iterable[MetricsRegistry]] = None) -> str:
+    """
+    Render registries in the Prometheus text format.
+
+    By default every registry that is still in use in the process is
+    included. Families with the same name are merged.
+    """
+    if registries is None:
+        registries = list(_registries)
+
+    _families: Dict[str, Tuple[Metric, List[str]]] = {}
+    for registry in registries:
+        registry.collect()
+        for name, metric in registry.metrics.items():
+            _entry = _families.setdefault(name, (metric, []))
+            _entry[1].extend(metric.prometheus(registry.const_labels))
+
+    _lines: List[str] = []
+    for name, (metric, samples) in _families.items():
+        _lines.append(f"# HELP {name} {metric.help}")
+        _lines.append(f"# TYPE {name} {metric.kind}")
+        _lines.extend(samples)
+    return "\n".join(_lines) + "\n" if _lines else ""
+
+
+class LeapMetrics:
+    """The metrics kept about LEAP connections, shared across reconnects."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        _registry = registry if registry is not None else MetricsRegistry()
+        self.registry = _registry
+
+        self.request_latency = _registry.histogram(
+            "leap_request_duration_seconds",
+            "Time from sending a request to getting its response",
+            ["url", "communique_type"],
+        )
+        self.request_timeouts = _registry.counter(
+            "leap_request_timeouts_total",
+            "Requests that got no response in time",
+            ["url"],
+        )
+        self.in_flight = _registry.gauge(
+            "leap_requests_in_flight", "Requests sent and waiting for a response"
+        )
+        self.bytes = _registry.counter(
+            "leap_bytes_total", "Bytes exchanged with the bridge", ["direction"]
+        )
+        self.messages = _registry.counter(
+            "leap_messages_total", "Messages exchanged with the bridge", ["direction"]
+        )
+        self.decode_time = _registry.histogram(
+            "leap_decode_duration_seconds",
+            "Time to parse a received message and decode its header, and its "
+            "body unless that is decoded lazily",
+            ["body_type"],
+        )
+        self.body_decode_time = _registry.histogram(
+            "leap_body_decode_duration_seconds",
+            "Time to decode the body of a lazily decoded message, when it is "
+            "first read",
+            ["body_type"],
+        )
+        self.dispatch_time = _registry.histogram(
+            "leap_dispatch_duration_seconds",
+            "Time a subscription or event handler took for one message",
+            ["body_type"],
+        )
+        self.reconnects = _registry.counter(
+            "leap_reconnects_total", "Connections to the bridge that were lost"
+        )
+        self.ping_rtt = _registry.histogram(
+            "leap_ping_duration_seconds", "Round trip time of pings"
+        )
+
+        self._sent_bytes = self.bytes.labels("out")
+        self._received_bytes = self.bytes.labels("in")
+        self._sent_messages = self.messages.labels("out")
+        self._received_messages = self.messages.labels("in")
+        # Per message, skip building the label from the MessageBodyType
+        self._decode_children: Dict[Any, _HistogramChild] = {}
+        self._dispatch_children: Dict[Any, _HistogramChild] = {}
+        self._body_decode_children: Dict[Any, _HistogramChild] = {}
+
+    def sent(self, size: int) -> None:
+        self._sent_bytes.inc(size)
+        self._sent_messages.inc()
+
+    def received(self, size: int) -> None:
+        self._received_bytes.inc(size)
+        self._received_messages.inc()
+
+    def observe_request(self, message: LeapMessage, seconds: float) -> None:
+        self.request_latency.labels(
+            normalize_url(message.Header.Url), message.CommuniqueType.name
+        ).observe(seconds)
+
+    def observe_decode(self, message: LeapMessage, seconds: float) -> None:
+        _child = self._decode_children.get(message.Header.MessageBodyType)
+        if _child is None:
+            _child = self.decode_time.labels(_body_type(message))
+            self._decode_children[message.Header.MessageBodyType] = _child
+        _child.observe(seconds)
+
+    def observe_body_decode(self, message: LeapMessage, seconds: float) -> None:
+        _child = self._body_decode_children.get(message.Header.MessageBodyType)
+        if _child is None:
+            _child = self.body_decode_time.labels(_body_type(message))
+            self._body_decode_children[message.Header.MessageBodyType] = _child
+        _child.observe(seconds)
+
+    def observe_dispatch(self, message: LeapMessage, seconds: float) -> None:
+        _child = self._dispatch_children.get(message.Header.MessageBodyType)
+        if _child is None:
+            _child = self.dispatch_time.labels(_body_type(message))
+            self._dispatch_children[message.Header.MessageBodyType] = _child
+        _child.observe(seconds)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        return self.registry.snapshot()
+
+    def prometheus(self) -> str:
+        return self.registry.prometheus()
+
+
+def _body_type(message: LeapMessage) -> str:
+    _body_type = message.Header.MessageBodyType
+    return "" if _body_type is None else _body_type.name
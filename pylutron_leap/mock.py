@@ -0,0 +1,498 @@
+"""
+A LEAP processor to test and benchmark against, without hardware.
+
+MockProcessor listens for TLS connections and answers the requests that
+LeapSession makes: login, pings, the client settings, the project, device,
+area and zone reads, subscriptions and zone commands. The project it serves
+is a MockTopology, which can be made as large as a real installation, and
+storm() sends zone status events to the subscribed connections at a chosen
+rate.
+"""
+
+import asyncio
+import logging
+import re
+import ssl
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pylutron_leap.jsonbackend import dumps, loads
+from pylutron_leap.metrics import normalize_url
+
+logger = logging.getLogger(__name__)
+
+LEAP_VERSION = 1.115
+
+_ZONE_COMMAND = re.compile(r"^/zone/(\d+)/commandprocessor$")
+_ONE = re.compile(r"^/(area|zone)/(\d+)(/status)?$")
+
+Message = Dict[str, Any]
+
+
+class MockTopology:
+    """
+    The areas, devices and zones of a made up project.
+
+    There is one processor device, and a device for every zones_per_device
+    zones. Zones are grouped in leaf areas of zones_per_area zones, which
+    all belong to a root area. Every object gets its own id, as in a real
+    project.
+    """
+
+    def __init__(
+        self,
+        zones: int = 16,
+        zones_per_area: int = 8,
+        zones_per_device: int = 1,
+        name: str = "Mock Project",
+    ):
+        if zones_per_area < 1 or zones_per_device < 1:
+            raise ValueError("zones_per_area and zones_per_device must be at least 1")
+
+        self.name = name
+        self._next_id = 100
+
+        _root = self._new_id()
+        self.areas: Dict[int, Message] = {
+            _root: _area(_root, "Project", None, is_leaf=False)
+        }
+        self.processor = _device(self._new_id(), "Processor", _root, [])
+        self.processor["DeviceType"] = "RadioRa3Processor"
+        self.processor["IsThisDevice"] = True
+
+        self.devices: Dict[int, Message] = {}
+        self.zones: Dict[int, Message] = {}
+        self.levels: Dict[int, int] = {}
+
+        _area_id = _root
+        _device_id = 0
+        for number in range(zones):
+            if number % zones_per_area == 0:
+                _area_id = self._new_id()
+                self.areas[_area_id] = _area(
+                    _area_id, f"Area {len(self.areas)}", _root, is_leaf=True
+                )
+            if number % zones_per_device == 0:
+                _device_id = self._new_id()
+                self.devices[_device_id] = _device(
+                    _device_id, f"Device {len(self.devices) + 1}", _area_id, []
+                )
+
+            _zone_id = self._new_id()
+            self.zones[_zone_id] = {
+                "href": f"/zone/{_zone_id}",
+                "Name": f"Zone {number + 1}",
+                "SortOrder": number,
+                "ControlType": "Dimmed",
+                "Device": {"href": f"/device/{_device_id}"},
+                "AssociatedArea": {"href": f"/area/{_area_id}"},
+            }
+            self.levels[_zone_id] = 0
+            self.devices[_device_id]["LocalZones"].append({"href": f"/zone/{_zone_id}"})
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def zone_status(self, zone_id: int) -> Message:
+        return {
+            "href": f"/zone/{zone_id}/status",
+            "Level": self.levels[zone_id],
+            "StatusAccuracy": "Good",
+        }
+
+    def area_status(self, area_id: int) -> Message:
+        return {
+            "href": f"/area/{area_id}/status",
+            "Level": 0,
+            "OccupancyStatus": "Unoccupied",
+        }
+
+
+def _area(area_id: int, name: str, parent: Optional[int], is_leaf: bool) -> Message:
+    _definition: Message = {
+        "href": f"/area/{area_id}",
+        "Name": name,
+        "SortOrder": area_id,
+        "IsLeaf": is_leaf,
+    }
+    if parent is not None:
+        _definition["Parent"] = {"href": f"/area/{parent}"}
+    return _definition
+
+
+def _device(device_id: int, name: str, area_id: int, zones: List[Message]) -> Message:
+    return {
+        "href": f"/device/{device_id}",
+        "Name": name,
+        "Parent": {"href": "/project"},
+        "SerialNumber": 10000000 + device_id,
+        "ModelNumber": "MOCK-1",
+        "DeviceType": "Unknown",
+        "AssociatedArea": {"href": f"/area/{area_id}"},
+        "LocalZones": zones,
+        "AddressedState": "Addressed",
+    }
+
+
+def _response(
+    request: Message,
+    communique_type: str,
+    status: str = "200 OK",
+    body_type: Optional[str] = None,
+    body: Optional[Message] = None,
+) -> Message:
+    _header: Message = {"StatusCode": status, "Url": request["Header"].get("Url")}
+    if body_type is not None:
+        _header["MessageBodyType"] = body_type
+    _tag = request["Header"].get("ClientTag")
+    if _tag is not None:
+        _header["ClientTag"] = _tag
+
+    _message: Message = {"CommuniqueType": communique_type, "Header": _header}
+    if body is not None:
+        _message["Body"] = body
+    return _message
+
+
+def _not_found(request: Message) -> Message:
+    return _response(
+        request,
+        "ExceptionResponse",
+        "404 NotFound",
+        "ExceptionDetail",
+        {"Message": "The requested resource does not exist"},
+    )
+
+
+def _command_level(command: Message) -> Optional[int]:
+    """Find the level a zone command asks for, if it's one we understand."""
+    for key, parameters in command.items():
+        if not key.endswith("Parameters") or not isinstance(parameters, dict):
+            continue
+        if isinstance(parameters.get("Level"), int):
+            return parameters["Level"]
+        if parameters.get("SwitchedLevel") in ("On", "Off"):
+            return 100 if parameters["SwitchedLevel"] == "On" else 0
+    return None
+
+
+class _MockConnection:
+    """A client of the mock, with the Urls it subscribed to and their tags."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.subscriptions: Dict[str, Optional[str]] = {}
+
+    def send(self, message: Message) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(dumps(message) + b"\r\n")
+
+    def send_all(self, messages: List[Message]) -> None:
+        for message in messages:
+            self.send(message)
+
+    def send_event(self, url: str, message: Message) -> bool:
+        if url not in self.subscriptions:
+            return False
+
+        _tag = self.subscriptions[url]
+        if _tag is not None:
+            message = {**message, "Header": {**message["Header"], "ClientTag": _tag}}
+        self.send(message)
+        return True
+
+
+class MockProcessor:
+    """
+    Serve a MockTopology over LEAP.
+
+    LeapSession only connects with TLS, so certfile and keyfile are needed
+    to test it; without them the mock listens for plain TCP. Every response
+    is sent latency seconds after its request, while the requests after it
+    are read, like over a link with that round trip time. Requests are
+    counted by normalized Url in requests.
+    """
+
+    def __init__(
+        self,
+        topology: Optional[MockTopology] = None,
+        certfile: Optional[Path] = None,
+        keyfile: Optional[Path] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[float] = None,
+    ):
+        if (keyfile or certfile) and not (keyfile and certfile):
+            raise ValueError("Both keyfile and certfile are required for TLS!")
+
+        self.topology = topology if topology is not None else MockTopology()
+        self.host = host
+        self.latency = latency
+        self.requests: Counter[str] = Counter()
+        self.connections: Set[_MockConnection] = set()
+        self._port = port
+        self._certfile = certfile
+        self._keyfile = keyfile
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _ssl_context(self) -> Optional[ssl.SSLContext]:
+        if self._certfile is None:
+            return None
+        _context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        _context.load_cert_chain(self._certfile, self._keyfile)
+        return _context
+
+    @property
+    def port(self) -> int:
+        """The port listened on, chosen by the system when port was 0."""
+        if self._server is None:
+            return self._port
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._serve, self.host, self._port, ssl=self._ssl_context(), limit=2**20
+        )
+
+    async def close(self) -> None:
+        """Stop listening and disconnect every client."""
+        if self._server is not None:
+            self._server.close()
+        for connection in list(self.connections):
+            connection.writer.close()
+        # Closing the writers ends the connection handlers
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "MockProcessor":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        _task = asyncio.current_task()
+        if _task is not None:
+            self._tasks.add(_task)
+        _connection = _MockConnection(writer)
+        self.connections.add(_connection)
+        _loop = asyncio.get_running_loop()
+
+        try:
+            while True:
+                _line = await reader.readline()
+                if not _line:
+                    break
+                if not _line.strip():
+                    continue
+
+                _messages = self.handle(_connection, loads(_line))
+                if self.latency:
+                    _loop.call_later(self.latency, _connection.send_all, _messages)
+                    continue
+                _connection.send_all(_messages)
+                await writer.drain()
+        except (ConnectionError, ssl.SSLError, ValueError) as ex:
+            logger.debug("Mock connection ended: %r", ex)
+        finally:
+            self.connections.discard(_connection)
+            writer.close()
+            if _task is not None:
+                self._tasks.discard(_task)
+
+    def handle(self, connection: _MockConnection, request: Message) -> List[Message]:
+        """Answer a request, with the events it causes after the response."""
+        _type = request.get("CommuniqueType")
+        _url = request["Header"].get("Url", "")
+        self.requests[normalize_url(_url)] += 1
+
+        if _type == "SubscribeRequest":
+            return self._subscribe(connection, request, _url)
+        if _type == "UnsubscribeRequest":
+            connection.subscriptions.pop(_url, None)
+            return [_response(request, "UnsubscribeResponse", "204 NoContent")]
+        if _type == "UpdateRequest" and _url == "/login":
+            _login = request.get("Body", {}).get("Login", {})
+            return [
+                _response(
+                    request,
+                    "UpdateResponse",
+                    body_type="OneLoginDefinition",
+                    body={
+                        "Login": {
+                            "href": "/login",
+                            "ContextType": _login.get("ContextType", "Application"),
+                            "LoginId": _login.get("LoginId"),
+                        }
+                    },
+                )
+            ]
+        if _type == "CreateRequest":
+            return self._command(request, _url)
+        if _type == "ReadRequest":
+            _read = self._read(_url)
+            if _read is not None:
+                return [
+                    _response(
+                        request, "ReadResponse", body_type=_read[0], body=_read[1]
+                    )
+                ]
+        return [_not_found(request)]
+
+    def _read(self, url: str) -> Optional[Tuple[str, Message]]:
+        _topology = self.topology
+        if url == "/server/status/ping":
+            return "OnePingResponse", {"PingResponse": {"LEAPVersion": LEAP_VERSION}}
+        if url == "/clientsetting":
+            return "OneClientSettingDefinition", {
+                "ClientSetting": {
+                    "href": "/clientsetting",
+                    "ClientMajorVersion": 1,
+                    "ClientMinorVersion": 115,
+                    "Permissions": {"SessionRole": "Admin"},
+                }
+            }
+        if url == "/project":
+            return "OneProjectDefinition", {
+                "Project": {"href": "/project", "Name": _topology.name}
+            }
+        if url == "/device?where=IsThisDevice:true":
+            return "MultipleDeviceDefinition", {"Devices": [_topology.processor]}
+        if url == "/device?where=IsThisDevice:false":
+            return "MultipleDeviceDefinition", {
+                "Devices": list(_topology.devices.values())
+            }
+        if url == "/device":
+            return "MultipleDeviceDefinition", {
+                "Devices": [_topology.processor, *_topology.devices.values()]
+            }
+        if url == "/area":
+            return "MultipleAreaDefinition", {"Areas": list(_topology.areas.values())}
+        if url == "/area/status":
+            return "MultipleAreaStatus", {
+                "AreaStatuses": [_topology.area_status(x) for x in _topology.areas]
+            }
+        if url == "/zone":
+            return "MultipleZoneDefinition", {"Zones": list(_topology.zones.values())}
+        if url == "/zone/status":
+            return "MultipleZoneStatus", {
+                "ZoneStatuses": [_topology.zone_status(x) for x in _topology.zones]
+            }
+
+        _match = _ONE.match(url)
+        if _match is None:
+            return None
+        _kind, _id, _status = _match.group(1), int(_match.group(2)), _match.group(3)
+        if _kind == "zone" and _id in _topology.zones:
+            if _status:
+                return "OneZoneStatus", {"ZoneStatus": _topology.zone_status(_id)}
+            return "OneZoneDefinition", {"Zone": _topology.zones[_id]}
+        if _kind == "area" and _id in _topology.areas:
+            if _status:
+                return "OneAreaStatus", {"AreaStatus": _topology.area_status(_id)}
+            return "OneAreaDefinition", {"Area": _topology.areas[_id]}
+        return None
+
+    def _subscribe(
+        self, connection: _MockConnection, request: Message, url: str
+    ) -> List[Message]:
+        connection.subscriptions[url] = request["Header"].get("ClientTag")
+
+        _directives = request["Header"].get("Directives") or {}
+        _read = self._read(url)
+        if _read is None or _directives.get("SuppressMessageBody"):
+            return [_response(request, "SubscribeResponse")]
+        return [
+            _response(request, "SubscribeResponse", body_type=_read[0], body=_read[1])
+        ]
+
+    def _command(self, request: Message, url: str) -> List[Message]:
+        _match = _ZONE_COMMAND.match(url)
+        if _match is None or int(_match.group(1)) not in self.topology.zones:
+            return [_not_found(request)]
+
+        _zone_id = int(_match.group(1))
+        _level = _command_level(request.get("Body", {}).get("Command", {}))
+        _messages = [_response(request, "CreateResponse", "201 Created")]
+        if _level is not None:
+            self.topology.levels[_zone_id] = _level
+            self._zone_changed(_zone_id)
+        return _messages
+
+    def _zone_event(self, zone_id: int) -> Message:
+        return {
+            "CommuniqueType": "ReadResponse",
+            "Header": {
+                "MessageBodyType": "OneZoneStatus",
+                "StatusCode": "200 OK",
+                "Url": "/zone/status",
+            },
+            "Body": {"ZoneStatus": self.topology.zone_status(zone_id)},
+        }
+
+    def _zone_changed(self, zone_id: int) -> int:
+        """Tell the subscribed connections about a zone, returning how many."""
+        _event = self._zone_event(zone_id)
+        _sent = 0
+        for connection in list(self.connections):
+            if connection.send_event("/zone/status", _event):
+                _sent += 1
+        return _sent
+
+    async def storm(
+        self,
+        rate: float,
+        count: Optional[int] = None,
+        duration: Optional[float] = None,
+        interval: float = 0.01,
+    ) -> int:
+        """
+        Change zone levels at rate per second, sending an event for each.
+
+        Zones are changed in turn until count changes were made or duration
+        seconds have passed, whichever comes first. Changes are sent in
+        batches every interval seconds. Returns the number of changes.
+        """
+        if count is None and duration is None:
+            raise ValueError("Either count or duration is required")
+
+        _zones = list(self.topology.zones)
+        if not _zones:
+            return 0
+
+        _loop = asyncio.get_running_loop()
+        _start = _loop.time()
+        _changes = 0
+        while True:
+            _elapsed = _loop.time() - _start
+            if duration is not None:
+                _elapsed = min(_elapsed, duration)
+            _due = int(rate * _elapsed)
+            if count is not None:
+                _due = min(_due, count)
+
+            for number in range(_changes, _due):
+                _zone_id = _zones[number % len(_zones)]
+                self.topology.levels[_zone_id] = (
+                    self.topology.levels[_zone_id] + 1
+                ) % 101
+                self._zone_changed(_zone_id)
+            _changes = _due
+
+            if _changes == count or (duration is not None and _elapsed >= duration):
+                break
+            await asyncio.gather(*(x.writer.drain() for x in list(self.connections)))
+            await asyncio.sleep(interval)
+
+        await asyncio.gather(
+            *(x.writer.drain() for x in list(self.connections)), return_exceptions=True
+        )
+        return _changes
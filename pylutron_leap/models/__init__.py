@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Sequence
 
 from pylutron_leap.api.message import LeapMessage
 
@@ -16,9 +16,13 @@ class BaseModel(object):
     Attributes:
         default_session   Session used send commands. May be overriden on
                           a per-model basis.
+        indexes           Secondary indexes of the session models, by name,
+                          with the function that gets the key of a model.
+                          Models are found by key with ModelRegistry.find().
     """
 
     default_session: LeapSession
+    indexes: Dict[str, Callable[[Any], Optional[Hashable]]] = {}
 
     def __init__(self, leap_id: int, session: Optional[LeapSession] = None):
         self.leap_id: int = leap_id
@@ -96,25 +96,21 @@ class Area(BaseModel):
             self._sort = defn.SortOrder
         if defn.IsLeaf is not None:
             self._leaf = defn.IsLeaf
+        self.session.area_tree.update(self.leap_id, self.parent, self.is_leaf)
 
     @classmethod
     def get_or_create_area(cls, session: LeapSession, leap_id: int) -> Area:
-        _areas = list(filter(lambda x: x.leap_id == leap_id, session.areas))
-        if len(_areas):
-            assert len(_areas) == 1
-            logger.debug(f"Found area: {_areas[0]}")
-            return _areas[0]
-        else:
-            _area = Area(leap_id, session)
-            session.models.append(_area)
-
+        _area, _created = session.models.get_or_create(
+            Area, leap_id, lambda: Area(leap_id, session)
+        )
+        if _created:
             # async def update_def(a: Area = _area):
             #     a.refresh_definition
 
             # get_running_loop().call_soon(update_def)
 
-            logger.debug(f"Created new area: {_area}")
-            return _area
+            logger.debug("Created new area: %s", _area)
+        return _area
 
     @classmethod
     def can_handle_response(cls, response: LeapMessage) -> bool:
@@ -183,7 +179,7 @@ class Area(BaseModel):
                 _id = id_from_href(entry.href)
 
                 if _id is None:
-                    logger.error(f"Something went wrong parsing Area ID: {entry.href}")
+                    logger.error("Something went wrong parsing Area ID: %s", entry.href)
                     continue
 
                 _area = Area.get_or_create_area(self.session, _id)
@@ -192,16 +188,41 @@ class Area(BaseModel):
 
         return _updated_areas
 
+    def _areas(self, leap_ids: List[int]) -> List[Area]:
+        _areas = self.session.models.view(Area)
+        return [_areas[x] for x in leap_ids if x in _areas]
+
     def get_children(self) -> Sequence[Area]:
-        return filter(
-            lambda x: x.parent == self.leap_id, self.session.areas
-        )  # type: ignore
+        return self._areas(self.session.area_tree.children(self.leap_id))
 
     def get_parent(self) -> Area | None:
-        _areas = list(filter(lambda x: x.leap_id == self.parent, self.session.areas))
-        if len(_areas):
-            return _areas[0]
-        return None
+        _parent = self.session.area_tree.parent(self.leap_id)
+        if _parent is None:
+            return None
+        return self.session.models.get(Area, _parent)
+
+    def get_ancestors(self) -> Sequence[Area]:
+        """Get the areas this one is in, its parent first."""
+        return self._areas(self.session.area_tree.ancestors(self.leap_id))
+
+    def get_leaf_areas(self) -> Sequence[Area]:
+        """Get the leaf areas below this one, at any depth."""
+        return self._areas(self.session.area_tree.leaves(self.leap_id))
+
+    @property
+    def depth(self) -> int:
+        """Number of areas this one is in, 0 for the root area."""
+        return self.session.area_tree.depth(self.leap_id)
+
+    def get_known_devices(self) -> Sequence[Device]:
+        """Get the devices in this area whose definition was read, without a request."""
+        return list(self.session.models.find(Device, "area_id", self.leap_id).values())
+
+    def get_known_zones(self) -> Sequence[Zone]:
+        """Get the zones in this area whose definition was read, without a request."""
+        return list(
+            self.session.models.find(Zone, "associated_area", self.leap_id).values()
+        )
 
     async def refresh_state(self) -> None:
         """
@@ -0,0 +1,128 @@
+"""
+The hierarchy of the areas of a session, by leap_id.
+
+AreaTree is kept up to date by Area._update_definition from the Parent and
+IsLeaf of every AreaDefinition, in whatever order they arrive. Children,
+ancestors, depth and the leaf areas below an area take time proportional to
+the answer: every area keeps the set of leaf areas below it, which is
+updated along the ancestors when an area moves or its IsLeaf changes.
+"""
+
+from logging import getLogger
+from typing import Dict, Iterable, List, Optional
+
+logger = getLogger(__name__)
+
+# Dicts with None values are sets that keep their insertion order
+_Ids = Dict[int, None]
+
+
+class AreaTree:
+    """Parents, children and leaf descendants of areas, by leap_id."""
+
+    def __init__(self):
+        self._parents: Dict[int, int] = {}
+        self._children: Dict[int, _Ids] = {}
+        self._leaves: Dict[int, _Ids] = {}
+        self._is_leaf: _Ids = {}
+        self._areas: _Ids = {}
+
+    def __contains__(self, area_id: int) -> bool:
+        return area_id in self._areas
+
+    def __len__(self) -> int:
+        return len(self._areas)
+
+    def update(self, area_id: int, parent: Optional[int], is_leaf: bool) -> None:
+        """Set the parent and leafness of an area, None making it a root."""
+        self._areas[area_id] = None
+        if parent is not None and (parent == area_id or self._below(parent, area_id)):
+            logger.warning(
+                "Ignoring parent %s of area %s: it's a cycle", parent, area_id
+            )
+            parent = self._parents.get(area_id)
+
+        _moved = self._subtree_leaves(area_id)
+        if is_leaf != (area_id in self._is_leaf):
+            # Leafness of the area itself changes for all of its ancestors
+            self._change_ancestors(area_id, {area_id: None}, add=is_leaf)
+            if is_leaf:
+                self._is_leaf[area_id] = None
+            else:
+                self._is_leaf.pop(area_id, None)
+            _moved = self._subtree_leaves(area_id)
+
+        _old = self._parents.get(area_id)
+        if _old == parent:
+            return
+
+        if _old is not None:
+            self._change_ancestors(area_id, _moved, add=False)
+            self._children[_old].pop(area_id, None)
+            del self._parents[area_id]
+        if parent is not None:
+            self._parents[area_id] = parent
+            self._children.setdefault(parent, {})[area_id] = None
+            self._change_ancestors(area_id, _moved, add=True)
+
+    def remove(self, area_id: int) -> None:
+        """Forget an area, making its children roots."""
+        if area_id not in self._areas:
+            return
+        for child in list(self._children.get(area_id, ())):
+            self.update(child, None, child in self._is_leaf)
+        self.update(area_id, None, False)
+        del self._areas[area_id]
+        self._children.pop(area_id, None)
+        self._leaves.pop(area_id, None)
+
+    def _subtree_leaves(self, area_id: int) -> _Ids:
+        _leaves = dict(self._leaves.get(area_id, {}))
+        if area_id in self._is_leaf:
+            _leaves[area_id] = None
+        return _leaves
+
+    def _change_ancestors(self, area_id: int, leaves: _Ids, add: bool) -> None:
+        if not leaves:
+            return
+        for ancestor in self._walk_up(area_id):
+            _below = self._leaves.setdefault(ancestor, {})
+            if add:
+                _below.update(leaves)
+            else:
+                for leaf in leaves:
+                    _below.pop(leaf, None)
+
+    def _walk_up(self, area_id: int) -> Iterable[int]:
+        _parent = self._parents.get(area_id)
+        while _parent is not None:
+            yield _parent
+            _parent = self._parents.get(_parent)
+
+    def _below(self, area_id: int, ancestor: int) -> bool:
+        return any(x == ancestor for x in self._walk_up(area_id))
+
+    def parent(self, area_id: int) -> Optional[int]:
+        return self._parents.get(area_id)
+
+    def children(self, area_id: int) -> List[int]:
+        return list(self._children.get(area_id, ()))
+
+    def ancestors(self, area_id: int) -> List[int]:
+        """Get the ancestors of an area, its parent first."""
+        return list(self._walk_up(area_id))
+
+    def depth(self, area_id: int) -> int:
+        """Get the number of ancestors of an area, 0 for a root."""
+        return sum(1 for _ in self._walk_up(area_id))
+
+    def leaves(self, area_id: int) -> List[int]:
+        """Get the leaf areas below an area, at any depth."""
+        return list(self._leaves.get(area_id, ()))
+
+    def is_leaf(self, area_id: int) -> bool:
+        return area_id in self._is_leaf
+
+    def roots(self) -> List[int]:
+        """Get the areas without a parent."""
+        return [x for x in self._areas if x not in self._parents]
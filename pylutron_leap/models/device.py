@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from collections.abc import Sequence
 from logging import getLogger
+from operator import attrgetter
 from typing import TYPE_CHECKING, Dict, List, Optional, cast
 
 from pylutron_leap.api import HRef, id_from_href
@@ -40,6 +41,13 @@ DeviceBodyTypes = [
 
 
 class Device(BaseModel):
+    indexes = {
+        "area_id": attrgetter("area_id"),
+        "model_number": attrgetter("model_number"),
+        "serial_number": attrgetter("serial_number"),
+        "device_type": attrgetter("device_type"),
+    }
+
     def __init__(self, leap_id: int, session: LeapSession = None):
         super().__init__(leap_id, session)
 
@@ -82,18 +90,12 @@ class Device(BaseModel):
 
     @classmethod
     def get_or_create_device(cls, session: LeapSession, leap_id: int) -> Device:
-        _devices = list(filter(lambda x: x.leap_id == leap_id, session.devices))
-        if len(_devices):
-            assert len(_devices) == 1
-            logger.debug(f"Found device: {_devices[0]}")
-
-            return _devices[0]
-        else:
-            _device = Device(leap_id, session)
-            session.models.append(_device)
-            logger.debug(f"Created new device: {_device}")
-
-            return _device
+        _device, _created = session.models.get_or_create(
+            Device, leap_id, lambda: Device(leap_id, session)
+        )
+        if _created:
+            logger.debug("Created new device: %s", _device)
+        return _device
 
     def _update_status(self, status: DeviceStatusType) -> None:
 
@@ -104,7 +106,7 @@ class Device(BaseModel):
         if status.FailedTransfers is not None:
             self.failed_transfers = status.FailedTransfers
 
-        logger.debug(f"Updated device status of {self.leap_id}")
+        logger.debug("Updated device status of %s", self.leap_id)
 
     def _update_definition(self, defn: DeviceDefinition) -> None:
 
@@ -148,7 +150,9 @@ class Device(BaseModel):
                     # _zone.device = self
                     # self.local_zones[_id] = _zone
 
-        logger.debug(f"Device defn updated {self}")
+        self.session.models.refresh(self)
+
+        logger.debug("Device defn updated %s", self)
 
     @classmethod
     def can_handle_response(cls, response: LeapMessage) -> bool:
@@ -200,7 +204,7 @@ class Device(BaseModel):
             _body = cast(LeapMultiDeviceDefinitionBody, response.Body)
             for entry in _body.Devices:
                 _ids = entry.related_ids()
-                logger.debug(f"Processing device {_ids}")
+                logger.debug("Processing device %s", _ids)
                 assert len(_ids) == 1
 
                 _device = cls.get_or_create_device(session, _ids[0])
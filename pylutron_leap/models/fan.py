@@ -28,7 +28,7 @@ class FanModel(Zone):
                 _id = id_from_href(response.Body.ZoneStatus.href)
             except ValueError as exc:
                 logger.error(exc)
-                logger.error(f"Unable to determine zone id from response: {response}")
+                logger.error("Unable to determine zone id from response: %s", response)
                 return
 
             if self.leap_id == _id:
@@ -41,7 +41,9 @@ class FanModel(Zone):
                         _id = id_from_href(response.Body.ZoneStatus.href)
                     except ValueError as exc:
                         logger.error(exc)
-                        logger.error(f"Unable to determine zone id from entry: {entry}")
+                        logger.error(
+                            "Unable to determine zone id from entry: %s", entry
+                        )
                         continue
 
                     if self.leap_id == _id:
@@ -82,6 +82,33 @@ def get_other_devices() -> LeapMessage:
     )
 
 
+def get_project() -> LeapMessage:
+    """
+    { "CommuniqueType": "ReadRequest",
+    "Header": { "Url": "/project" }}
+
+    The OneProjectDefinition returned changes when the project is transferred
+    to the processor again.
+    """
+    return LeapMessage(
+        CommuniqueType=CommuniqueType.ReadRequest,
+        Header=LeapMessageHeader(Url="/project"),
+    )
+
+
+def get_all_zone_status() -> LeapMessage:
+    """
+    { "CommuniqueType": "ReadRequest",
+    "Header": { "Url": "/zone/status" }}
+
+    returns a MultipleZoneStatus with the current level of every zone.
+    """
+    return LeapMessage(
+        CommuniqueType=CommuniqueType.ReadRequest,
+        Header=LeapMessageHeader(Url="/zone/status"),
+    )
+
+
 def get_all_area_subscribe():
     return LeapMessage(
         CommuniqueType=CommuniqueType.SubscribeRequest,
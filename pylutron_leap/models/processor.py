@@ -1,13 +1,18 @@
+from __future__ import annotations
+
 from collections.abc import Sequence
 from logging import getLogger
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, cast
 
 from pylutron_leap.api import id_from_href
 from pylutron_leap.api.command import LeapCommand, LeapCommandBody
 from pylutron_leap.api.enum import CommandType, CommuniqueType, MessageBodyTypeEnum
 from pylutron_leap.api.message import LeapMessage, LeapMessageHeader
+from pylutron_leap.api.processor import LeapMasterDeviceListDefinitionBody
 from pylutron_leap.models import BaseModel
-from pylutron_leap.session import LeapSession
+
+if TYPE_CHECKING:
+    from pylutron_leap.session import LeapSession
 
 logger = getLogger(__name__)
 
@@ -19,13 +24,17 @@ class ProcessorModel(BaseModel):
         self.serial: Optional[int] = None
         self.mac_addr: Optional[str] = None
         self.proc_id: Optional[int] = None
+        self.ip_addr: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"Processor <ID: {self.leap_id}, IP: {self.ip_addr}>"
 
     @classmethod
     async def get_processors(cls, session) -> Sequence["ProcessorModel"]:
         _processors: List[ProcessorModel] = list()
 
         _msg = LeapMessage(
-            CommuniqueType=CommuniqueType.CreateRequest,
+            CommuniqueType=CommuniqueType.ReadRequest,
             Header=LeapMessageHeader(Url="/project/masterdevicelist"),
         )
         _response = await session.request(_msg)
@@ -36,7 +45,8 @@ class ProcessorModel(BaseModel):
         ):
             return _processors
 
-        for entry in _response.Body.MasterDeviceList.Devices:
+        _body = cast(LeapMasterDeviceListDefinitionBody, _response.Body)
+        for entry in _body.MasterDeviceList.Devices:
             _id = id_from_href(entry.href)
             if _id is not None:
                 _proc = ProcessorModel(_id, session)
@@ -47,6 +57,11 @@ class ProcessorModel(BaseModel):
                 )
                 _proc.proc_id = entry.IPL.ProcessorID
 
+                for interface in entry.NetworkInterfaces:
+                    if interface.IPv4Properties is not None:
+                        _proc.ip_addr = interface.IPv4Properties.IP
+                        break
+
                 _processors.append(_proc)
 
         return _processors
@@ -0,0 +1,198 @@
+"""
+The models of a session, indexed by kind and leap_id.
+
+The kind of a model is the class right below BaseModel that it derives
+from, so a FanModel is a Zone. Finding or creating a model takes constant
+time, and view() gives a live, read-only mapping of the models of a kind by
+leap_id. The secondary indexes that models declare in BaseModel.indexes,
+like the zones of an area, are kept up to date by refresh(), which models
+call when their definition changes, so find() is a lookup as well.
+ModelRegistry is also a list of every model, in the order they were
+added, so code that iterates, appends to or extends LeapSession.models keeps
+working.
+"""
+
+from __future__ import annotations
+
+from collections.abc import MutableSequence
+from types import MappingProxyType
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+    overload,
+)
+
+from pylutron_leap.models import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+_kinds: Dict[type, type] = {}
+
+
+def kind_of(model_type: Type[BaseModel]) -> Type[BaseModel]:
+    """Get the class right below BaseModel that model_type derives from."""
+    _kind = _kinds.get(model_type)
+    if _kind is None:
+        _mro = model_type.__mro__
+        if BaseModel not in _mro:
+            raise TypeError(f"{model_type.__name__} is not a model")
+        _kind = _mro[max(_mro.index(BaseModel) - 1, 0)]
+        _kinds[model_type] = _kind
+    return _kind
+
+
+class ModelRegistry(MutableSequence):
+    """A list of models with an index by kind and leap_id."""
+
+    def __init__(self, models: Iterable[BaseModel] = ()):
+        self._models: List[BaseModel] = []
+        self._index: Dict[type, Dict[int, BaseModel]] = {}
+        # (kind, index name) -> key -> leap_id -> model
+        self._secondary: Dict[
+            Tuple[type, str], Dict[Hashable, Dict[int, BaseModel]]
+        ] = {}
+        # (kind, index name, leap_id) -> key
+        self._keys: Dict[Tuple[type, str, int], Hashable] = {}
+        self.extend(models)
+
+    def _add(self, model: BaseModel) -> None:
+        # Like a lookup in the list, the index finds the first one added
+        _models = self._index.setdefault(kind_of(type(model)), {})
+        if _models.setdefault(model.leap_id, model) is model:
+            self.refresh(model)
+
+    def _reindex(self) -> None:
+        # The dicts are kept, so views stay live
+        for models in self._index.values():
+            models.clear()
+        for keys in self._secondary.values():
+            for models in keys.values():
+                models.clear()
+        self._keys.clear()
+        for model in self._models:
+            self._add(model)
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    @overload
+    def __getitem__(self, index: int) -> BaseModel: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[BaseModel]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[BaseModel, List[BaseModel]]:
+        return self._models[index]
+
+    def __setitem__(self, index, value) -> None:
+        self._models[index] = value
+        self._reindex()
+
+    def __delitem__(self, index) -> None:
+        del self._models[index]
+        self._reindex()
+
+    def insert(self, index: int, value: BaseModel) -> None:
+        self._models.insert(index, value)
+        if index >= len(self._models) - 1:
+            self._add(value)
+        else:
+            self._reindex()
+
+    def clear(self) -> None:
+        self._models.clear()
+        self._reindex()
+
+    def __iter__(self):
+        return iter(self._models)
+
+    def __contains__(self, model: object) -> bool:
+        if not isinstance(model, BaseModel):
+            return False
+        return self.get(type(model), model.leap_id) is model or model in self._models
+
+    def __repr__(self) -> str:
+        return f"ModelRegistry({self._models!r})"
+
+    def get(self, model_type: Type[T], leap_id: int) -> Optional[T]:
+        """Find the model of a type with a leap_id."""
+        _model = self._index.get(kind_of(model_type), {}).get(leap_id)
+        if _model is None or not isinstance(_model, model_type):
+            return None
+        return cast(T, _model)
+
+    def get_or_create(
+        self, model_type: Type[T], leap_id: int, factory: Callable[[], T]
+    ) -> Tuple[T, bool]:
+        """
+        Find the model of a type with a leap_id, or add the one factory makes.
+
+        Returns the model and whether it was created.
+        """
+        _model = self.get(model_type, leap_id)
+        if _model is not None:
+            return _model, False
+
+        _model = factory()
+        self.append(_model)
+        return _model, True
+
+    def refresh(self, model: BaseModel) -> None:
+        """Update the secondary indexes after the definition of a model changed."""
+        _kind = kind_of(type(model))
+        if self._index.get(_kind, {}).get(model.leap_id) is not model:
+            return
+
+        for name, key_of in model.indexes.items():
+            _key = key_of(model)
+            _slot = (_kind, name, model.leap_id)
+            _old = self._keys.get(_slot)
+            if _old == _key:
+                continue
+
+            _keys = self._secondary.setdefault((_kind, name), {})
+            if _old is not None:
+                _keys[_old].pop(model.leap_id, None)
+                del self._keys[_slot]
+            if _key is not None:
+                _keys.setdefault(_key, {})[model.leap_id] = model
+                self._keys[_slot] = _key
+
+    def find(self, model_type: Type[T], index: str, key: Hashable) -> Mapping[int, T]:
+        """
+        Get the models of a type by leap_id, whose index has a key.
+
+        Like view(), the mapping follows the models of a kind and is a copy
+        for a subclass.
+        """
+        _kind = kind_of(model_type)
+        if index not in model_type.indexes:
+            raise KeyError(f"{model_type.__name__} has no index {index}")
+        _models = self._secondary.setdefault((_kind, index), {}).setdefault(key, {})
+        if _kind is not model_type:
+            return {k: v for k, v in _models.items() if isinstance(v, model_type)}
+        return cast(Mapping[int, T], MappingProxyType(_models))
+
+    def view(self, model_type: Type[T]) -> Mapping[int, T]:
+        """
+        Get the models of a type by leap_id.
+
+        The mapping of a kind follows the models added later; for a subclass
+        of a kind, like FanModel, it is a copy.
+        """
+        _models = self._index.setdefault(kind_of(model_type), {})
+        if kind_of(model_type) is not model_type:
+            return {k: v for k, v in _models.items() if isinstance(v, model_type)}
+        return cast(Mapping[int, T], MappingProxyType(_models))
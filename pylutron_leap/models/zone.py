@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from collections.abc import Coroutine
 from logging import getLogger
+from operator import attrgetter
 from typing import TYPE_CHECKING, List, Optional, Sequence, cast
 
 from pylutron_leap.api import HRef, id_from_href
@@ -37,10 +38,25 @@ ZoneBodyTypes = [
 ]
 
 
+def _associated_area(zone: Zone) -> Optional[int]:
+    if zone.associated_area is None:
+        return None
+    return id_from_href(zone.associated_area.href)
+
+
+def _category(zone: Zone) -> Optional[str]:
+    return zone.category.Type if zone.category is not None else None
+
+
 class Zone(BaseModel):
     instances: Sequence[Zone] = []
     default_session: LeapSession
     subscribe_callbacks: Sequence[Coroutine[None, LeapMessage, None]] = []
+    indexes = {
+        "associated_area": _associated_area,
+        "control_type": attrgetter("control_type"),
+        "category": _category,
+    }
 
     def __init__(self, leap_id: int, session: LeapSession = None):
         super().__init__(leap_id, session)
@@ -139,16 +155,14 @@ class Zone(BaseModel):
         if defn.AssociatedFacade is not None:
             self.associated_facade = defn.AssociatedFacade
 
+        self.session.models.refresh(self)
+
     @classmethod
     def get_or_create_zone(cls, session: LeapSession, leap_id: int) -> Zone:
-        _zones = list(filter(lambda x: x.leap_id == leap_id, session.zones))
-        if len(_zones):
-            assert len(_zones) == 1
-            return _zones[0]
-        else:
-            _zone = Zone(leap_id, session)
-            session.models.append(_zone)
-            return _zone
+        _zone, _ = session.models.get_or_create(
+            Zone, leap_id, lambda: Zone(leap_id, session)
+        )
+        return _zone
 
     @property
     def href(self) -> str:
@@ -0,0 +1,215 @@
+"""A pool of LEAP connections to the same bridge."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pylutron_leap.api.enum import CommuniqueType
+from pylutron_leap.api.message import LeapMessage
+from pylutron_leap.dispatch import MessageCallback, OverflowPolicy
+from pylutron_leap.leap import LeapProtocol
+
+logger = logging.getLogger(__name__)
+
+Reopen = Callable[[int], Awaitable[LeapProtocol]]
+Login = Callable[[LeapProtocol], Awaitable[None]]
+
+
+class LeapPool:
+    """
+    Spread LEAP requests over several connections to one bridge.
+
+    Subscriptions and unsolicited events stay on the primary connection so
+    they arrive in order. Other requests go to the ready secondary connection
+    with the fewest requests in flight, or to the primary if there is none.
+
+    A secondary connection that ends is replaced while the pool runs if reopen
+    is given. reopen(attempt) opens a new connection, waiting longer the more
+    attempts have failed, and login logs it in before it gets requests.
+    """
+
+    def __init__(
+        self,
+        primary: LeapProtocol,
+        secondaries: Iterable[LeapProtocol] = (),
+        reopen: Optional[Reopen] = None,
+        login: Optional[Login] = None,
+    ):
+        self.primary = primary
+        self.secondaries: List[LeapProtocol] = list(secondaries)
+        self.reopen = reopen
+        self.login = login
+        self._primary_ready = False
+        self._ready: List[LeapProtocol] = []
+        self._closed = False
+        self.lost = 0
+
+    @property
+    def connections(self) -> List[LeapProtocol]:
+        return [self.primary, *self.secondaries]
+
+    def mark_ready(self, leap: LeapProtocol) -> None:
+        """Count a connection as ready, and use it if secondary, once logged in."""
+        if leap is self.primary:
+            self._primary_ready = True
+        elif leap in self.secondaries and leap not in self._ready:
+            self._ready.append(leap)
+
+    def discard(self, leap: LeapProtocol) -> None:
+        """Close a secondary connection and stop using it."""
+        if leap not in self.secondaries:
+            return
+
+        logger.warning("Dropping LEAP connection from the pool")
+        self.secondaries.remove(leap)
+        if leap in self._ready:
+            self._ready.remove(leap)
+        self.lost += 1
+        leap.close()
+
+    def pick(self) -> LeapProtocol:
+        """Get the least busy connection for a request."""
+        if not self._ready:
+            return self.primary
+        return min(self._ready, key=lambda x: x.in_flight + x.queue_depth)
+
+    async def request(
+        self, message: LeapMessage, timeout: Optional[float] = None
+    ) -> LeapMessage:
+        """Make a request on the least busy connection."""
+        if message.CommuniqueType == CommuniqueType.SubscribeRequest:
+            return await self.primary.request(message, timeout=timeout)
+        return await self.pick().request(message, timeout=timeout)
+
+    async def subscribe(
+        self,
+        msg: LeapMessage,
+        callback: MessageCallback,
+        timeout: Optional[float] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
+        queue_response: bool = False,
+    ) -> Tuple[LeapMessage, str]:
+        """Subscribe to events on the primary connection."""
+        return await self.primary.subscribe(
+            msg,
+            callback,
+            timeout=timeout,
+            overflow_policy=overflow_policy,
+            queue_response=queue_response,
+        )
+
+    async def unsubscribe(
+        self, tag: str, timeout: Optional[float] = None
+    ) -> Optional[LeapMessage]:
+        """End a subscription on the primary connection."""
+        return await self.primary.unsubscribe(tag, timeout=timeout)
+
+    def subscribe_unsolicited(
+        self,
+        callback: MessageCallback,
+        overflow_policy: Optional[OverflowPolicy] = None,
+    ):
+        """Subscribe to unsolicited events on the primary connection."""
+        self.primary.subscribe_unsolicited(callback, overflow_policy=overflow_policy)
+
+    def unsubscribe_unsolicited(self, callback: MessageCallback):
+        """Unsubscribe from unsolicited events on the primary connection."""
+        self.primary.unsubscribe_unsolicited(callback)
+
+    async def run(self):
+        """
+        Read from every connection until the primary one ends.
+
+        A secondary connection that ends is dropped from the pool, and its
+        share of the requests goes to the remaining connections until it is
+        replaced.
+        """
+        _secondaries = [
+            asyncio.ensure_future(self._keep_open(x)) for x in self.secondaries
+        ]
+        try:
+            return await self.primary.run()
+        finally:
+            for task in _secondaries:
+                task.cancel()
+
+    async def _keep_open(self, leap: LeapProtocol) -> None:
+        """Read from a secondary connection, replacing it whenever it ends."""
+        _run = asyncio.ensure_future(leap.run())
+        try:
+            while True:
+                try:
+                    await _run
+                except Exception:
+                    logger.warning("Pooled LEAP connection failed", exc_info=1)
+                self.discard(leap)
+
+                if self.reopen is None or self._closed:
+                    return
+                leap, _run = await self._replace()
+        finally:
+            _run.cancel()
+
+    async def _replace(self) -> Tuple[LeapProtocol, asyncio.Task]:
+        """Open and log in a new secondary connection, retrying until it works."""
+        assert self.reopen is not None
+        _attempt = 0
+        while True:
+            try:
+                _leap = await self.reopen(_attempt)
+            except Exception:
+                logger.warning("Reopening a pooled LEAP connection failed", exc_info=1)
+                _attempt += 1
+                continue
+
+            self.secondaries.append(_leap)
+            _run = asyncio.ensure_future(_leap.run())
+            try:
+                if self.login is not None:
+                    await self.login(_leap)
+            except Exception:
+                logger.warning("Reopened LEAP connection failed to log in", exc_info=1)
+                self.secondaries.remove(_leap)
+                _leap.close()
+                _run.cancel()
+                _attempt += 1
+                continue
+            except BaseException:
+                _run.cancel()
+                raise
+
+            logger.info("Reopened a pooled LEAP connection")
+            self.mark_ready(_leap)
+            return _leap, _run
+
+    def flow_stats(self) -> Dict[str, float]:
+        """Sum the in-flight window statistics of all connections."""
+        _stats: Dict[str, float] = {}
+        for leap in self.connections:
+            for key, value in leap.flow_stats().items():
+                if key == "max_wait_time":
+                    _stats[key] = max(_stats.get(key, 0.0), value)
+                else:
+                    _stats[key] = _stats.get(key, 0) + value
+        return _stats
+
+    def dispatch_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the subscription queue statistics of the primary connection."""
+        return self.primary.dispatch_stats()
+
+    def health(self) -> Dict[str, object]:
+        """Describe the connections in the pool."""
+        return {
+            "connections": len(self.connections),
+            "ready": int(self._primary_ready) + len(self._ready),
+            "lost": self.lost,
+            "in_flight": [x.in_flight for x in self.connections],
+        }
+
+    def close(self):
+        """Disconnect every connection."""
+        self._closed = True
+        for leap in self.connections:
+            leap.close()
+        self._primary_ready = False
+        self._ready.clear()
@@ -1,26 +1,223 @@
+"""An asyncio transport protocol that frames LEAP messages."""
+
+import asyncio
 import logging
-import sys
-from asyncio import Future, Protocol, Transport
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(name)s: %(message)s",
-    stream=sys.stderr,
-)
+from collections import deque
+from typing import Any, Deque, Iterable, List, Optional
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_BUFFER_SIZE = 2**16
+# Stop reading from the socket when this many frames are waiting
+DEFAULT_MAX_FRAMES = 1024
+_MIN_READ = 2**12
+
+
+class LeapLineProtocol(asyncio.BufferedProtocol):
+    """
+    Split the bytes received from the bridge into line frames.
+
+    The transport reads straight into a reusable bytearray. Complete lines
+    are cut out of it through a memoryview, copied once into the bytes
+    handed to the decoder, and the partial line left over is moved to the
+    front of the buffer. The buffer grows to fit lines longer than it.
 
-class LeapProtocol(Protocol):
-    transport: Transport = None
-    completed: Future = None
+    Besides readline() and at_eof() for reading, the protocol has the
+    write(), writelines(), drain() and close() methods of a StreamWriter, so
+    it can be passed to leap.LeapProtocol as both reader and writer.
+    """
 
-    def connection_made(self, transport: Transport) -> None:
+    def __init__(
+        self,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        max_frames: int = DEFAULT_MAX_FRAMES,
+    ):
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        # Received bytes are _buffer[_start:_end], with no newline before _scan
+        self._start = 0
+        self._end = 0
+        self._scan = 0
+
+        self._frames: Deque[bytes] = deque()
+        self.max_frames = max_frames
+        self._reading_paused = False
+        self._frame_waiter: Optional[asyncio.Future] = None
+        self._eof = False
+
+        self._writing_paused = False
+        self._drain_waiter: Optional[asyncio.Future] = None
+        self._exception: Optional[BaseException] = None
+
+        self.transport: Optional[asyncio.Transport] = None
+        self.frames_received = 0
+
+    def connection_made(self, transport) -> None:
         self.transport = transport
-        self.remote_addr = transport.get_extra_info("peername")
-        logger.debug("connecting to {} port {}".format(*self.remote_addr))
-        return super().connection_made(transport)
+        logger.debug("Connected to %s", transport.get_extra_info("peername"))
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if len(self._buffer) - self._end < _MIN_READ:
+            self._make_room(max(sizehint, _MIN_READ))
+        return self._view[self._end :]
+
+    def _make_room(self, size: int) -> None:
+        """Move the partial line to the front, growing the buffer if needed."""
+        _pending = self._end - self._start
+        if self._start:
+            # memoryview assignment copies overlapping ranges safely
+            self._view[:_pending] = self._view[self._start : self._end]
+            self._scan -= self._start
+            self._start = 0
+            self._end = _pending
+
+        if len(self._buffer) - self._end < size:
+            _grown = bytearray(max(len(self._buffer) * 2, self._end + size))
+            _grown[: self._end] = self._view[: self._end]
+            self._view.release()
+            self._buffer = _grown
+            self._view = memoryview(self._buffer)
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._end += nbytes
+
+        _find = self._buffer.find
+        _start = self._start
+        _newline = _find(b"\n", self._scan, self._end)
+        while _newline != -1:
+            # Frames end with CRLF, but a bare LF is accepted too
+            _stop = _newline
+            if _stop > _start and self._buffer[_stop - 1] == 13:
+                _stop -= 1
+            if _stop > _start:
+                self._frames.append(bytes(self._view[_start:_stop]))
+                self.frames_received += 1
+
+            _start = _newline + 1
+            _newline = _find(b"\n", _start, self._end)
+
+        if _start == self._end:
+            # Everything was consumed, start over at the front
+            self._start = self._end = self._scan = 0
+        else:
+            self._start = _start
+            self._scan = self._end
+
+        if self._frames:
+            self._wake_reader()
+            if len(self._frames) >= self.max_frames and not self._reading_paused:
+                self._reading_paused = True
+                self.transport.pause_reading()  # type: ignore
+
+    def _wake_reader(self) -> None:
+        if self._frame_waiter is not None and not self._frame_waiter.done():
+            self._frame_waiter.set_result(None)
+
+    def eof_received(self) -> Optional[bool]:
+        self._eof = True
+        self._wake_reader()
+        return None
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._eof = True
+        self._exception = exc
+        self._wake_reader()
+
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            if exc is None:
+                self._drain_waiter.set_result(None)
+            else:
+                self._drain_waiter.set_exception(exc)
+
+    async def readline(self) -> bytes:
+        """Get the next frame, or b"" once the connection has ended."""
+        while not self._frames:
+            if self._eof:
+                return b""
+            self._frame_waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._frame_waiter
+            finally:
+                self._frame_waiter = None
+
+        _frame = self._frames.popleft()
+        if self._reading_paused and len(self._frames) <= self.max_frames // 2:
+            self._reading_paused = False
+            self.transport.resume_reading()  # type: ignore
+        return _frame
+
+    def at_eof(self) -> bool:
+        return self._eof and not self._frames
+
+    def pause_writing(self) -> None:
+        self._writing_paused = True
+
+    def resume_writing(self) -> None:
+        self._writing_paused = False
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_result(None)
+
+    def write(self, data: bytes) -> None:
+        self.transport.write(data)  # type: ignore
+
+    def writelines(self, data: Iterable[bytes]) -> None:
+        self.transport.writelines(data)  # type: ignore
+
+    async def drain(self) -> None:
+        """Wait until the transport wants more data."""
+        if self._exception is not None:
+            raise self._exception
+        if self.transport is not None and self.transport.is_closing():
+            # Let connection_lost() run, like StreamWriter.drain() does
+            await asyncio.sleep(0)
+        if not self._writing_paused:
+            return
+
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._drain_waiter
+        finally:
+            self._drain_waiter = None
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        if self.transport is None:
+            return default
+        return self.transport.get_extra_info(name, default)
+
+
+class LeapStreamReader:
+    """
+    Read line frames of any length from a StreamReader.
+
+    StreamReader.readline() gives up on lines longer than the limit of the
+    reader, and throws away what it read of them. Lines that overrun the
+    limit are read here in pieces and put back together instead.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self._reader = reader
+
+    async def readline(self) -> bytes:
+        _chunks: List[bytes] = []
+        while True:
+            try:
+                _chunks.append(await self._reader.readuntil(b"\n"))
+                break
+            except asyncio.LimitOverrunError as ex:
+                _chunks.append(await self._reader.readexactly(ex.consumed))
+            except asyncio.IncompleteReadError as ex:
+                # Like readline(), return what's left at the end of the stream
+                _chunks.append(ex.partial)
+                break
 
-    def connection_lost(self, exc: Exception | None) -> None:
+        if len(_chunks) == 1:
+            return _chunks[0]
+        logger.debug("Read a line of %d bytes", sum(map(len, _chunks)))
+        return b"".join(_chunks)
 
-        self.transport.close()
-        return super().connection_lost(exc)
+    def at_eof(self) -> bool:
+        return self._reader.at_eof()
@@ -0,0 +1,175 @@
+"""
+Feed a capture written by TrafficRecorder back through a LeapProtocol.
+
+There is no socket: received lines are fed to the protocol's reader, and the
+requests in the capture are made again so their recorded responses find
+them, while whatever the protocol writes is thrown away. With a session, the
+responses, subscription messages and unsolicited messages reach
+LeapSession.handle_response as they did when the capture was recorded.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Iterable, Optional, Union
+
+from pylutron_leap.api.enum import CommuniqueType
+from pylutron_leap.api.message import LeapMessage, LeapMessageHeader
+from pylutron_leap.jsonbackend import loads
+from pylutron_leap.leap import LeapProtocol
+from pylutron_leap.metrics import LeapMetrics
+from pylutron_leap.traffic import SENT, CapturedLine, read_capture
+
+if TYPE_CHECKING:
+    from pylutron_leap.session import LeapSession
+
+logger = logging.getLogger(__name__)
+
+# Requests whose responses weren't captured never free their slot
+_MAX_IN_FLIGHT = 2**20
+
+_CLIENT_TAG = re.compile(rb'"ClientTag"\s*:\s*"([^"]*)"')
+
+
+class _DiscardingWriter:
+    """Stand in for the connection, dropping everything written to it."""
+
+    def __init__(self):
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> None:
+        self.bytes_written += len(data)
+
+    def writelines(self, data: Iterable[bytes]) -> None:
+        for chunk in data:
+            self.write(chunk)
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        return default
+
+
+@dataclass
+class ReplayStats:
+    received: int
+    sent: int
+    seconds: float
+    metrics: LeapMetrics
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.received / self.seconds if self.seconds else 0.0
+
+
+def _request(frame: bytes) -> Optional[LeapMessage]:
+    """Rebuild the envelope of a captured request, which is all that's needed."""
+    try:
+        _data = loads(frame)
+        _header = _data["Header"]
+        return LeapMessage(
+            CommuniqueType=CommuniqueType[_data["CommuniqueType"]],
+            Header=LeapMessageHeader(
+                Url=_header["Url"], ClientTag=_header["ClientTag"]
+            ),
+        )
+    except (KeyError, TypeError, ValueError):
+        logger.warning("Skipping request that can't be replayed: %r", frame)
+        return None
+
+
+async def replay(
+    capture: Union[str, Path, BinaryIO, Iterable[CapturedLine]],
+    session: Optional["LeapSession"] = None,
+    speed: Optional[float] = None,
+    **kwds,
+) -> ReplayStats:
+    """
+    Replay a capture through a new LeapProtocol.
+
+    speed is a multiple of the recorded speed, so 1.0 waits for the recorded
+    time between lines. With None, lines are replayed as fast as possible.
+    Other keyword arguments are passed to LeapProtocol.
+    """
+    if isinstance(capture, (str, Path)) or hasattr(capture, "readline"):
+        capture = read_capture(capture)  # type: ignore
+
+    if session is not None:
+        kwds.setdefault("events", session.events)
+        kwds.setdefault("metrics", session.metrics)
+    kwds.setdefault("max_in_flight", _MAX_IN_FLIGHT)
+
+    _reader = asyncio.StreamReader()
+    _leap = LeapProtocol(_reader, _DiscardingWriter(), **kwds)  # type: ignore
+    _run = asyncio.create_task(_leap.run())
+
+    async def _handler(message: LeapMessage) -> None:
+        if session is not None:
+            await session.handle_response(message)
+
+    async def _replay_request(message: LeapMessage) -> None:
+        try:
+            if message.CommuniqueType == CommuniqueType.SubscribeRequest:
+                _response, _ = await _leap.subscribe(message, _handler)
+            else:
+                _response = await _leap.request(message)
+            await _handler(_response)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Replaying %s failed", message.Header.Url)
+
+    _pending: Dict[str, asyncio.Task] = {}
+    _received = _sent = 0
+    _loop = asyncio.get_running_loop()
+    _started = _loop.time()
+    _clock = time.perf_counter()
+
+    for line in capture:  # type: ignore
+        if speed is not None:
+            _delay = _started + line.time / speed - _loop.time()
+            if _delay > 0:
+                await asyncio.sleep(_delay)
+
+        if line.direction == SENT:
+            _message = _request(line.frame)
+            if _message is None:
+                continue
+            _sent += 1
+            _tag = _message.Header.ClientTag
+            _task = asyncio.create_task(_replay_request(_message))
+            _pending[_tag] = _task  # type: ignore
+            while not _leap.is_waiting_for(_tag) and not _task.done():  # type: ignore
+                await asyncio.sleep(0)
+            continue
+
+        _received += 1
+        _reader.feed_data(line.frame + b"\r\n")
+        if not _pending:
+            continue
+
+        # Let the request see its response, so subscriptions are in place
+        # before the messages that follow them
+        _match = _CLIENT_TAG.search(line.frame)
+        _task = _pending.pop(_match.group(1).decode(), None) if _match else None
+        if _task is not None:
+            await asyncio.wait([_task])
+
+    _reader.feed_eof()
+    await _run
+    for task in _pending.values():
+        task.cancel()
+
+    # Wait for the handlers to catch up
+    while any(x["depth"] for x in _leap.dispatch_stats().values()):
+        await asyncio.sleep(0)
+    _seconds = time.perf_counter() - _clock
+
+    await asyncio.gather(*_pending.values(), return_exceptions=True)
+    _leap.close()
+    return ReplayStats(_received, _sent, _seconds, _leap.metrics)
@@ -1,18 +1,33 @@
 import asyncio
+import hashlib
 import logging
+import random
 import ssl
-import sys
+import time
+from collections import Counter
 from functools import partial
 from pathlib import Path
-from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, cast
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    cast,
+)
 
 from pylutron_leap.models import BaseModel
 from pylutron_leap.models.messages import (
     get_all_area_subscribe,
     get_all_occupancy_subscribe,
+    get_all_zone_status,
     get_all_zone_subscribe,
     get_connected_processor,
     get_other_devices,
+    get_project,
 )
 
 try:
@@ -23,28 +38,44 @@ except ImportError:
 
 from typing import Union
 
+from pylutron_leap.api.codec import message_schema
 from pylutron_leap.api.enum import CommuniqueType, ContextTypeEnum, MessageBodyTypeEnum
 from pylutron_leap.api.login import LoginBody
 from pylutron_leap.api.message import LeapLoginBody, LeapMessage, LeapMessageHeader
+from pylutron_leap.dispatch import DEFAULT_QUEUE_SIZE, OverflowPolicy
+from pylutron_leap.eventbus import EventBus
 from pylutron_leap.exception import SessionDisconnectedError
-from pylutron_leap.leap import LeapProtocol, open_connection
+from pylutron_leap.jsonbackend import dumps
+from pylutron_leap.leap import (
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_FRAMING,
+    DEFAULT_MAX_IN_FLIGHT,
+    LeapProtocol,
+    open_connection,
+)
+from pylutron_leap.metrics import LeapMetrics, MetricsRegistry
 from pylutron_leap.models.area import Area
+from pylutron_leap.models.areatree import AreaTree
 from pylutron_leap.models.device import Device
+from pylutron_leap.models.registry import ModelRegistry
 from pylutron_leap.models.zone import Zone
+from pylutron_leap.pool import LeapPool
+from pylutron_leap.subscription import Subscription, SubscriptionManager
+from pylutron_leap.traffic import TrafficLog, TrafficRecorder
+from pylutron_leap.transport import get_leap_ssl_context
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(name)s (%(lineno)d): %(message)s",
-    stream=sys.stderr,
-)
 logger = logging.getLogger(__name__)
 
 PING_INTERVAL = 60.0
 CONNECT_TIMEOUT = 5.0
 REQUEST_TIMEOUT = 5.0
 RECONNECT_DELAY = 2.0
+RECONNECT_MAX_DELAY = 120.0
 LEAP_PORT = 8081
 
+# Models in the order they get a chance to handle a response
+MODEL_TYPES: List[Type[BaseModel]] = [Area, Device, Zone]
+
 
 MessageCallback = Callable[[LeapMessage], Awaitable[None]]
 
@@ -60,7 +91,20 @@ class LeapSession(object):
         username: Optional[str] = None,
         password: Optional[str] = None,
         verify_tls: Optional[bool] = False,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        coalesce_window: Optional[float] = DEFAULT_COALESCE_WINDOW,
+        request_timeout: Optional[float] = REQUEST_TIMEOUT,
+        connect_timeout: Optional[float] = CONNECT_TIMEOUT,
+        pool_size: int = 1,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.Block,
+        framing: str = DEFAULT_FRAMING,
+        traffic_sample_every: int = 1,
+        recorder: Optional[TrafficRecorder] = None,
     ):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+
         self.config: Dict[str, Optional[str | int | bool | Path]] = {
             "host": host,
             "port": port,
@@ -70,25 +114,122 @@ class LeapSession(object):
             "keyfile": keyfile,
             "certfile": certfile,
             "ca_chain": ca_chain,
+            "max_in_flight": max_in_flight,
+            "coalesce_window": coalesce_window,
+            "request_timeout": request_timeout,
+            "connect_timeout": connect_timeout,
+            "pool_size": pool_size,
+            "queue_size": queue_size,
+            "overflow_policy": overflow_policy,
+            "framing": framing,
+            "traffic_sample_every": traffic_sample_every,
         }
 
         self._login_task: Optional[asyncio.Task] = None
         # Use future so we can wait before the login starts and
         # don't need to wait for "login" on reconnect.
         self._login_completed: asyncio.Future = get_loop().create_future()
-        self._leap: LeapProtocol
+        self._leap: Union[LeapProtocol, LeapPool] = None  # type: ignore
         self._monitor_task: Optional[asyncio.Task] = None
         self._ping_task: Optional[asyncio.Task] = None
-        self.models: List[BaseModel] = []
+        self._initialize_task: Optional[asyncio.Task] = None
+        # Every model, also indexed by kind and leap_id
+        self.models = ModelRegistry()
+        # Hierarchy of the areas, from their definitions
+        self.area_tree = AreaTree()
+
+        # Requests that timed out, by Url, across all connections
+        self.timeouts: Counter[str] = Counter()
+        # Wire captures, when the pylutron_leap.traffic logger is enabled
+        self.traffic = TrafficLog(traffic_sample_every)
+        # Captures every connection's lines, see replay.replay()
+        self.recorder = recorder
+        # Metrics of every connection, labelled with the host
+        self.metrics = LeapMetrics(MetricsRegistry({"host": host}))
+        self._add_metrics()
+
+        # Handlers for unsolicited and subscription messages. This outlives
+        # the connections, so handlers only register once.
+        self.events = EventBus(
+            queue_size, overflow_policy, observer=self.metrics.observe_dispatch
+        )
+        self.events.subscribe(partial(handle_response_session, self), tagged=False)
+
+        # Subscriptions to Urls, restored after every reconnect
+        self.subscriptions = SubscriptionManager(lambda: self._leap)
+        self._subscribed = False
+        self._connect_deadline: Optional[float] = None
+
+        # Resumed on reconnect to skip the full TLS handshake
+        self._tls_session: Optional[ssl.SSLSession] = None
+        self.tls_resumptions = 0
+
+        # Failed connections since the last successful login
+        self._reconnect_attempts = 0
+        # Fingerprint of the project the models were last enumerated from
+        self._project_fingerprint: Optional[str] = None
+        # Initializations done, by "full" or "status" only
+        self.syncs: Counter[str] = Counter()
+        # Seconds from connecting until the last initialization was done
+        self._connect_started: Optional[float] = None
+        self.ready_time: Optional[float] = None
+
+    async def connect(self, timeout: Optional[float] = None) -> None:
+        """
+        Connect and log in to the bridge.
+
+        The timeout covers the TLS connection and the login, and defaults to
+        the connect_timeout of the session. asyncio.TimeoutError is raised if
+        the session is not logged in by then.
+        """
+        if timeout is None:
+            timeout = cast(Optional[float], self.config["connect_timeout"])
 
-    async def connect(self) -> None:
         if not self._login_completed.done():
             self._login_completed.cancel()
             self._login_completed = get_loop().create_future()
 
+        if timeout is not None:
+            self._connect_deadline = get_loop().time() + timeout
         self._monitor_task = get_loop().create_task(self._monitor())
 
-        await self._login_completed
+        try:
+            await asyncio.wait_for(asyncio.shield(self._login_completed), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Could not connect within %s seconds", timeout)
+            self._monitor_task.cancel()
+            raise
+        finally:
+            self._connect_deadline = None
+
+    def _connect_budget(self) -> Optional[float]:
+        """
+        Get the time left to connect and log in.
+
+        This is what remains of the budget given to connect(), or the
+        connect_timeout of the session when reconnecting on our own.
+        """
+        if self._connect_deadline is None:
+            return cast(Optional[float], self.config["connect_timeout"])
+        return max(0.0, self._connect_deadline - get_loop().time())
+
+    @property
+    def request_timeout(self) -> Optional[float]:
+        """Default time to wait for a response, in seconds."""
+        return cast(Optional[float], self.config["request_timeout"])
+
+    def _request_deadline(self, timeout: Optional[float]) -> Optional[float]:
+        if timeout is None:
+            timeout = self.request_timeout
+        if timeout is None:
+            return None
+        return get_loop().time() + timeout
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        return max(0.0, deadline - get_loop().time())
 
     @property
     def logged_in(self) -> bool:
@@ -113,32 +254,147 @@ class LeapSession(object):
 
     @property
     def areas(self) -> Iterable[Area]:
-        return cast(Iterable[Area], filter(lambda x: isinstance(x, Area), self.models))
+        return self.models.view(Area).values()
 
     @property
     def devices(self) -> Iterable[Device]:
-        return cast(
-            Iterable[Device], filter(lambda x: isinstance(x, Device), self.models)
-        )
+        return self.models.view(Device).values()
 
     @property
     def zones(self) -> Iterable[Zone]:
-        return cast(Iterable[Zone], filter(lambda x: isinstance(x, Zone), self.models))
+        return self.models.view(Zone).values()
+
+    def flow_stats(self) -> Dict[str, float]:
+        """Get the in-flight window statistics of the current connection."""
+        if getattr(self, "_leap", None) is None:
+            return {}
+        return self._leap.flow_stats()
 
-    async def request(self, message: LeapMessage) -> LeapMessage:
+    def dispatch_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the queue statistics of every subscription, by tag."""
+        if self._leap is None:
+            return {}
+        return self._leap.dispatch_stats()
+
+    def pool_health(self) -> Dict[str, object]:
+        """
+        Describe the connections to the bridge.
+
+        The pool is healthy when pool_size connections are open and logged in.
+        """
+        _size = self.config["pool_size"]
+        if self._leap is None:
+            _health: Dict[str, object] = {
+                "connections": 0,
+                "ready": 0,
+                "lost": 0,
+                "in_flight": [],
+            }
+        elif isinstance(self._leap, LeapPool):
+            _health = self._leap.health()
+        else:
+            _health = {
+                "connections": 1,
+                "ready": 1 if self.logged_in else 0,
+                "lost": 0,
+                "in_flight": [self._leap.in_flight],
+            }
+
+        _health["size"] = _size
+        _health["healthy"] = _health["ready"] == _size
+        return _health
+
+    def _add_metrics(self) -> None:
+        """Add the session's own metrics, and gauges of the stats above."""
+        _registry = self.metrics.registry
+        self._tls_resumptions_metric = _registry.counter(
+            "leap_tls_resumptions_total", "Connections that resumed a TLS session"
+        )
+        self._syncs_metric = _registry.counter(
+            "leap_syncs_total",
+            "Initializations after connecting, by full or status only",
+            ["kind"],
+        )
+        self._ready_metric = _registry.histogram(
+            "leap_session_ready_seconds",
+            "Time from connecting until the session is subscribed and ready",
+            ["kind"],
+        )
+
+        _gauges = {
+            name: _registry.gauge(f"leap_{name}", documentation)
+            for name, documentation in [
+                ("connections", "Open connections to the bridge"),
+                ("connections_ready", "Connections that are logged in"),
+                ("request_queue_depth", "Requests waiting for an in-flight slot"),
+                ("dispatch_queue_depth", "Messages waiting for their handlers"),
+                ("dispatch_dropped", "Messages dropped by full handler queues"),
+            ]
+        }
+
+        def _collect() -> None:
+            _health = self.pool_health()
+            _flow = self.flow_stats()
+            _gauges["connections"].set(_health["connections"])  # type: ignore
+            _gauges["connections_ready"].set(_health["ready"])  # type: ignore
+            _gauges["request_queue_depth"].set(_flow.get("queue_depth", 0))
+            _gauges["dispatch_queue_depth"].set(_flow.get("dispatch_depth", 0))
+            _gauges["dispatch_dropped"].set(_flow.get("dispatch_dropped", 0))
+
+        _registry.add_collector(_collect)
+
+    def _connections(self) -> List[LeapProtocol]:
+        if self._leap is None:
+            return []
+        if isinstance(self._leap, LeapPool):
+            return self._leap.connections
+        return [self._leap]
+
+    async def request(
+        self, message: LeapMessage, timeout: Optional[float] = None
+    ) -> LeapMessage:
+        """
+        Make a request, connecting first if needed.
+
+        The timeout covers connecting as well as the request itself, and
+        defaults to the request_timeout of the session.
+        """
+        _deadline = self._request_deadline(timeout)
         if not self.logged_in:
-            await self.connect()
-        _response = await self._leap.request(message)
+            await self.connect(timeout=self._remaining(_deadline))
+        _response = await self._leap.request(
+            message, timeout=self._remaining(_deadline)
+        )
         return _response
 
     async def subscribe(
-        self, message: LeapMessage, callback: MessageCallback
-    ) -> Tuple[LeapMessage, str]:
+        self,
+        message: LeapMessage,
+        callback: MessageCallback,
+        timeout: Optional[float] = None,
+    ) -> Tuple[LeapMessage, Subscription]:
+        """
+        Subscribe to a Url, connecting first if needed.
+
+        Subscriptions to the same Url are shared, and are made again after a
+        reconnect. Cancel the returned Subscription to stop getting messages.
+        """
+        _deadline = self._request_deadline(timeout)
         if not self.logged_in:
-            await self.connect()
+            await self.connect(timeout=self._remaining(_deadline))
 
         logger.debug("Subscribing from session")
-        return await self._leap.subscribe(message, callback)
+        return await self.subscriptions.subscribe(
+            message, callback, timeout=self._remaining(_deadline)
+        )
+
+    async def unsubscribe(
+        self, subscription: Subscription, timeout: Optional[float] = None
+    ) -> None:
+        """Stop getting the messages of a subscription."""
+        if timeout is None:
+            timeout = self.request_timeout
+        await self.subscriptions.unsubscribe(subscription, timeout=timeout)
 
     async def session_info(self) -> None:
         """
@@ -151,44 +407,113 @@ class LeapSession(object):
                 Url="/clientsetting",
             ),
         )
-        logger.debug(f"Requesting Session Info: {_msg}")
-        _response = await self._leap.request(_msg)
-        logger.debug(f"Session Info response: {_response}")
-
-    async def _connect(self):
-        # TODO: Make context options configurable maybe
-        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLSv1_2)
-
-        ssl_context.verify_mode = ssl.CERT_REQUIRED
-        ssl_context.check_hostname = True
-
-        if self.config["verify_tls"] is False:
-            ssl_context.verify_mode = ssl.CERT_NONE
-            ssl_context.check_hostname = False
-
-        if self.config.get("ca_chain", None):
-            ssl_context.load_verify_locations(self.config["ca_chain"])
-            ssl_context.verify_mode = ssl.CERT_REQUIRED
-
-        if self.config.get("keyfile", None) or self.config.get("certfile", None):
-            if not (
-                self.config.get("keyfile", None) and self.config.get("certfile", None)
-            ):
-                logger.error("Both keyfile and certfile are required for TLS auth!")
-                raise ValueError("Both keyfile and certfile are required for TLS auth!")
-            else:
-                ssl_context.load_cert_chain(
-                    self.config["certfile"], self.config["keyfile"]
-                )
+        logger.debug("Requesting Session Info: %s", _msg)
+        _response = await self._leap.request(_msg, timeout=self.request_timeout)
+        logger.debug("Session Info response: %s", _response)
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        return get_leap_ssl_context(
+            verify_tls=cast(Optional[bool], self.config["verify_tls"]),
+            ca_chain=cast(Optional[Path], self.config.get("ca_chain", None)),
+            keyfile=cast(Optional[Path], self.config.get("keyfile", None)),
+            certfile=cast(Optional[Path], self.config.get("certfile", None)),
+        )
 
-        self._leap = await open_connection(
+    async def _open_connection(
+        self, ssl_context: ssl.SSLContext, events: Optional[EventBus] = None
+    ) -> LeapProtocol:
+        _leap = await open_connection(
             host=self.config["host"],
             port=self.config["port"],
             server_hostname="",
             ssl=ssl_context,
+            max_in_flight=self.config["max_in_flight"],
+            coalesce_window=self.config["coalesce_window"],
+            timeouts=self.timeouts,
+            events=events,
+            tls_session=self._tls_session,
+            queue_size=self.config["queue_size"],
+            overflow_policy=self.config["overflow_policy"],
+            framing=self.config["framing"],
+            traffic=self.traffic,
+            metrics=self.metrics,
+            recorder=self.recorder,
+        )
+
+        if _leap.tls_session_reused:
+            self.tls_resumptions += 1
+            self._tls_resumptions_metric.inc()
+            logger.debug("Resumed TLS session")
+        elif _leap.tls_session is not None:
+            self._tls_session = _leap.tls_session
+
+        return _leap
+
+    async def _connect(self):
+        ssl_context = self._ssl_context()
+        _pool_size = cast(int, self.config["pool_size"])
+
+        # Only the primary connection publishes events, as the bridge sends
+        # unsolicited messages on every connection
+        _primary = await self._open_connection(ssl_context, self.events)
+        if _pool_size == 1:
+            self._leap = _primary
+            return
+
+        # Opened after the primary, so they can resume its TLS session
+        _results = await asyncio.gather(
+            *(self._open_connection(ssl_context) for _ in range(_pool_size - 1)),
+            return_exceptions=True,
+        )
+        _connections = [x for x in _results if isinstance(x, LeapProtocol)]
+        _errors = [x for x in _results if not isinstance(x, LeapProtocol)]
+
+        if _errors:
+            logger.warning(
+                "Opened %d of %d pooled connections",
+                len(_connections) + 1,
+                _pool_size,
+                exc_info=_errors[0],  # type: ignore
+            )
+
+        self._leap = LeapPool(
+            _primary,
+            _connections,
+            reopen=self._reopen_connection,
+            login=self._login_connection,
+        )
+
+    async def _reopen_connection(self, attempt: int) -> LeapProtocol:
+        """Open a connection to replace a lost pooled one, after a backoff."""
+        await asyncio.sleep(self._backoff(attempt))
+        return await asyncio.wait_for(
+            self._open_connection(self._ssl_context()), self._connect_budget()
         )
 
     async def _login(self):
+        if isinstance(self._leap, LeapPool):
+            _pool = self._leap
+            await self._login_connection(_pool.primary)
+            _pool.mark_ready(_pool.primary)
+            # A secondary connection that fails to log in only shrinks the pool
+            _results = await asyncio.gather(
+                *(self._login_connection(x) for x in _pool.secondaries),
+                return_exceptions=True,
+            )
+            for leap, result in zip(list(_pool.secondaries), _results):
+                if isinstance(result, Exception):
+                    logger.warning("Pooled connection login failed: %r", result)
+                    _pool.discard(leap)
+                else:
+                    _pool.mark_ready(leap)
+        else:
+            await self._login_connection(self._leap)
+
+        self._reconnect_attempts = 0
+        if not self._login_completed.done():
+            self._login_completed.set_result(None)
+
+    async def _login_connection(self, leap: LeapProtocol) -> None:
         _msg = LeapMessage(
             CommuniqueType=CommuniqueType.UpdateRequest,
             Header=LeapMessageHeader(
@@ -203,67 +528,163 @@ class LeapSession(object):
             ),
         )
 
-        logger.debug(f"Logging in. {_msg}")
-        _response = await self._leap.request(_msg)
-        logger.debug(f"Login response: {_response}")
-
-        if not self._login_completed.done():
-            self._login_completed.set_result(None)
+        # The request holds the password, so only the user is logged
+        logger.debug("Logging in as %s", self.config["username"])
+        _response = await leap.request(_msg, timeout=self._connect_budget())
+        logger.debug("Login response: %s", _response)
 
     async def _initialize(self) -> None:
-        """Do some initial setup to enumerate the system state and subscribe to events"""
+        """
+        Subscribe to events and bring the models up to date.
+
+        Subscriptions do not survive a reconnect, so they are always made
+        again. Definitions are only read again when the project changed since
+        they were last read; otherwise only the current status is read.
+
+        Once logged in, the subscriptions and reads are all sent at once, so
+        this takes about one round trip rather than one per request. On a
+        reconnect the status is read along with the project, and definitions
+        are only read once the project turns out to have changed. Each
+        response is applied as soon as it and those of the requests before it
+        arrived, so the order is fixed while events that come in after a
+        response are not overwritten by it.
+        """
 
-        logger.debug("Waiting for _login_completed before initilization")
+        logger.debug("Waiting for login before initilization")
+        if self._login_task is not None:
+            await asyncio.shield(self._login_task)
         await self._login_completed
 
-        # Subscribe to all zones
-        logger.debug("Subscribing to all zones")
-        _msg = get_all_zone_subscribe()
-        response, sub_tag = await self.subscribe(
-            _msg, partial(handle_response_session, self)
-        )
-        self.zone_subscription_tag = sub_tag
-        await self.handle_response(response)
-
-        # Subscribe to all areas
-        logger.debug("Subscribing to all areas")
-        _msg = get_all_area_subscribe()
-        response, sub_tag = await self.subscribe(
-            _msg, partial(handle_response_session, self)
+        _full = self._project_fingerprint is None
+        _responses = self._subscribe_all() + self._request_all(
+            self._definition_requests() if _full else self._status_requests()
         )
+        _fingerprint_task = get_loop().create_task(self._read_project_fingerprint())
+        try:
+            await self._apply_in_order(_responses)
+            _fingerprint = await _fingerprint_task
+        finally:
+            for task in [*_responses, _fingerprint_task]:
+                task.cancel()
+        self._subscribed = True
+
+        if _fingerprint is not None and _fingerprint == self._project_fingerprint:
+            logger.debug("Project is unchanged, only reading status")
+            _kind = "status"
+        else:
+            if not _full:
+                logger.debug("Project changed, reading definitions")
+                await self._apply_in_order(
+                    self._request_all(self._definition_requests())
+                )
+            self._project_fingerprint = _fingerprint
+            _kind = "full"
+        self.syncs[_kind] += 1
+        self._syncs_metric.labels(_kind).inc()
 
-        self.area_subscription_tag = sub_tag
-        await self.handle_response(response)
-        logger.debug("Subscribed to areas")
+        if self._connect_started is not None:
+            self.ready_time = time.perf_counter() - self._connect_started
+            self._ready_metric.labels(_kind).observe(self.ready_time)
+            logger.debug("Session ready after %.3fs", self.ready_time)
+
+    def _subscribe_all(self) -> List["asyncio.Task[Optional[LeapMessage]]"]:
+        """
+        Subscribe to zones, areas and occupancy groups, or restore them.
+
+        Returns the tasks of the responses still to be handled, in order;
+        restored subscriptions deliver their own.
+        """
+        _loop = get_loop()
+        if self._subscribed:
+            logger.debug("Restoring subscriptions")
+            return [
+                _loop.create_task(
+                    self.subscriptions.restore(timeout=self.request_timeout)
+                )
+            ]
+
+        logger.debug("Subscribing to all zones, areas and occupancy groups")
 
         # TODO: Once all areas have been populated, need to:
         #  - get area definition: `/area/XXX`
         #  - enumerate zones for each area:  `/area/XXX/associatedzone`
 
-        # Subscribe to occupancygroup status events
-        _msg = get_all_occupancy_subscribe()
-        _resp, sub_tag = await self.subscribe(
-            _msg, partial(handle_response_session, self)
+        return [
+            _loop.create_task(self._subscribe_to(get_all_zone_subscribe())),
+            _loop.create_task(self._subscribe_to(get_all_area_subscribe())),
+            _loop.create_task(
+                self._subscribe_to(get_all_occupancy_subscribe(), handled=False)
+            ),
+        ]
+
+    async def _subscribe_to(
+        self, message: LeapMessage, handled: bool = True
+    ) -> Optional[LeapMessage]:
+        _response, _ = await self.subscribe(
+            message, partial(handle_response_session, self)
         )
+        return _response if handled else None
 
-        # Enumerate Devices
+    async def _read_project_fingerprint(self) -> Optional[str]:
+        """Fingerprint the project definition, or None if it can't be read."""
+        _response = await self._leap.request(
+            get_project(), timeout=self.request_timeout
+        )
+
+        _status = _response.Header.StatusCode
+        if _status is None or not _status.is_successful() or _response.Body is None:
+            return None
+
+        # Dumped, so it doesn't depend on how the response was decoded
+        _body = message_schema().dump(_response)["Body"]
+        return hashlib.sha1(dumps(_body)).hexdigest()
+
+    def _request_all(
+        self, messages: List[LeapMessage]
+    ) -> List["asyncio.Task[Optional[LeapMessage]]"]:
+        """Send requests at once, without waiting for their responses."""
+        return [
+            get_loop().create_task(
+                self._leap.request(x, timeout=self.request_timeout)  # type: ignore
+            )
+            for x in messages
+        ]
+
+    async def _apply_in_order(
+        self, responses: List["asyncio.Task[Optional[LeapMessage]]"]
+    ) -> None:
+        """Handle each response once it and the ones before it have arrived."""
+        for task in responses:
+            _response = await task
+            if _response is not None:
+                await self.handle_response(_response)
+
+    def _definition_requests(self) -> List[LeapMessage]:
         # TODO: Implement "associated-object" lookups
-        logger.debug("Query processor information")
-        _msg = get_connected_processor()
-        response = await self._leap.request(_msg)
-        await self.handle_response(response)
+        return [get_connected_processor(), get_other_devices()]
+
+    def _status_requests(self) -> List[LeapMessage]:
+        # The zone subscription suppresses its body, so levels that changed
+        # while disconnected have to be read
+        return [get_all_zone_status()]
 
-        logger.debug("Query other devices")
-        _msg = get_other_devices()
-        response = await self._leap.request(_msg)
-        await self.handle_response(response)
+    def _reconnect_delay(self) -> float:
+        """Get the time to wait before the next reconnect."""
+        _delay = self._backoff(self._reconnect_attempts)
+        self._reconnect_attempts += 1
+        return _delay
 
-        # Handle unsolicited messages
-        logger.debug("Subscribing to everything else")
-        self._leap.subscribe_unsolicited(partial(handle_response_session, self))
+    @staticmethod
+    def _backoff(attempts: int) -> float:
+        """
+        Get the time to wait after the given number of failed attempts.
 
-        if not self._initialize_task.done():
-            self._initialize_task.set_result(None)
+        The delay doubles with every failed attempt up to RECONNECT_MAX_DELAY,
+        and half of it is random so bridges that went down together don't all
+        come back at the same moment.
+        """
+        _delay = min(RECONNECT_MAX_DELAY, RECONNECT_DELAY * 2 ** min(attempts, 32))
+        return _delay / 2 + random.uniform(0, _delay / 2)
 
     async def _monitor(self):
         """Event monitoring loop."""
@@ -284,7 +705,8 @@ class LeapSession(object):
         """Monitor for events until an error occurs."""
         try:
             logger.debug("Connecting to Smart Bridge via SSL")
-            await self._connect()
+            self._connect_started = time.perf_counter()
+            await asyncio.wait_for(self._connect(), self._connect_budget())
             logger.debug("Successfully connected to Smart Bridge.")
 
             if self._login_task is not None:
@@ -301,7 +723,8 @@ class LeapSession(object):
             await self._leap.run()
 
             logger.warning("LEAP session ended. Reconnecting...")
-            await asyncio.sleep(RECONNECT_DELAY)
+            self.metrics.reconnects.inc()
+            await asyncio.sleep(self._reconnect_delay())
         # ignore OSError too.
         # sometimes you get OSError instead of ConnectionError.
         except (
@@ -312,7 +735,8 @@ class LeapSession(object):
             SessionDisconnectedError,
         ):
             logger.warning("Reconnecting...", exc_info=1)
-            await asyncio.sleep(RECONNECT_DELAY)
+            self.metrics.reconnects.inc()
+            await asyncio.sleep(self._reconnect_delay())
         finally:
             if self._initialize_task is not None:
                 self._initialize_task.cancel()
@@ -331,17 +755,13 @@ class LeapSession(object):
                 self._leap = None
 
     async def _ping(self):
-        """Periodically ping the LEAP server to keep the connection open."""
+        """Periodically ping the LEAP server to keep the connections open."""
         try:
             while True:
                 await asyncio.sleep(PING_INTERVAL)
-                _msg = LeapMessage(
-                    CommuniqueType.ReadRequest,
-                    LeapMessageHeader(Url="/server/status/ping"),
+                await asyncio.gather(
+                    *(self._ping_connection(x) for x in self._connections())
                 )
-                logger.debug(f"Pinging server: {_msg}")
-                _resp = await self._leap.request(_msg)
-                logger.debug(f"Ping response: {_resp}")
 
         except asyncio.TimeoutError:
             logger.warning("ping was not answered. closing connection.")
@@ -353,28 +773,63 @@ class LeapSession(object):
             self._leap.close()
             raise
 
+    async def _ping_connection(self, leap: LeapProtocol) -> None:
+        _msg = LeapMessage(
+            CommuniqueType.ReadRequest,
+            LeapMessageHeader(Url="/server/status/ping"),
+        )
+        logger.debug("Pinging server: %s", _msg)
+        _start = time.perf_counter()
+        try:
+            _resp = await leap.request(_msg, timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            if isinstance(self._leap, LeapPool) and leap is not self._leap.primary:
+                logger.warning("ping was not answered on a pooled connection.")
+                self._leap.discard(leap)
+                return
+            raise
+        self.metrics.ping_rtt.observe(time.perf_counter() - _start)
+        logger.debug("Ping response: %s", _resp)
+
     async def handle_response(self, response: LeapMessage) -> None:
-        logger.debug("Handling message: ")
-        logger.debug(LeapMessage.Schema().dump(response))  # type: ignore
+        _model = self.model_for_response(response)
+        if _model is None:
+            # Nothing cares about this body, so don't decode it
+            logger.debug(
+                "Ignoring message with body type %s", response.Header.MessageBodyType
+            )
+            return
+
+        if logger.isEnabledFor(logging.DEBUG):
+            # Dumping walks the whole body, which defeats streaming it
+            logger.debug("Handling message: ")
+            logger.debug(LeapMessage.Schema().dump(response))  # type: ignore
 
-        _related_ids: list[int] = []
+            _related_ids: list[int] = []
 
-        if response is not None:
-            related_ids = getattr(response, "related_ids", None)
-            if callable(related_ids):
-                _related_ids = response.related_ids()
+            if response is not None:
+                related_ids = getattr(response, "related_ids", None)
+                if callable(related_ids):
+                    _related_ids = response.related_ids()
 
-        logger.debug(f"Related IDs: {_related_ids}")
+            logger.debug("Related IDs: %s", _related_ids)
 
-        if Area.can_handle_response(response):
-            Area.handle_response(self, response)
-        elif Device.can_handle_response(response):
-            Device.handle_response(self, response)
-        elif Zone.can_handle_response(response):
-            Zone.handle_response(self, response)
+        _model.handle_response(self, response)
+
+    def model_for_response(self, response: LeapMessage) -> Optional[Type[BaseModel]]:
+        """Find the model that handles a response, if any."""
+        for model in MODEL_TYPES:
+            if model.can_handle_response(response):
+                return model
+        return None
 
     def close(self):
-        self.leap.close()
+        """Disconnect and stop reconnecting."""
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        if self._leap is not None:
+            self._leap.close()
 
 
 async def handle_response_session(session: LeapSession, response: LeapMessage) -> None:
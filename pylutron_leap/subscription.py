@@ -0,0 +1,224 @@
+"""Share subscriptions between consumers and restore them after reconnects."""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from pylutron_leap.api.enum import CommuniqueType
+from pylutron_leap.api.message import LeapMessage, LeapMessageHeader
+from pylutron_leap.dispatch import MessageCallback
+from pylutron_leap.leap import LeapProtocol
+from pylutron_leap.pool import LeapPool
+
+logger = logging.getLogger(__name__)
+
+Connection = Union[LeapProtocol, LeapPool]
+
+
+@dataclass(eq=False)
+class _WireSubscription:
+    """One subscription on the bridge, shared by every consumer of its Url."""
+
+    url: str
+    request: LeapMessage
+    consumers: List["Subscription"] = field(default_factory=list)
+    tag: Optional[str] = None
+    response: Optional[LeapMessage] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class Subscription:
+    """A consumer's interest in the messages of a subscribed Url."""
+
+    def __init__(
+        self,
+        manager: "SubscriptionManager",
+        wire: _WireSubscription,
+        callback: MessageCallback,
+    ):
+        self._manager = manager
+        self._wire = wire
+        self.callback = callback
+
+    @property
+    def url(self) -> str:
+        return self._wire.url
+
+    @property
+    def tag(self) -> Optional[str]:
+        """The ClientTag of the subscription on the current connection."""
+        return self._wire.tag
+
+    @property
+    def active(self) -> bool:
+        return self in self._wire.consumers
+
+    async def cancel(self, timeout: Optional[float] = None) -> None:
+        """Stop getting messages, unsubscribing if nobody else wants them."""
+        await self._manager.unsubscribe(self, timeout=timeout)
+
+    def __repr__(self) -> str:
+        return f"Subscription <Url: {self.url}, Tag: {self.tag}>"
+
+
+class SubscriptionManager:
+    """
+    Make one subscription on the bridge per Url, however many consumers ask.
+
+    Consumers of the same Url share the subscription and each get every
+    message of it. The bridge is only told to unsubscribe when the last one
+    cancels. After a reconnect, restore() makes every subscription again.
+
+    Subscriptions are identified by Url alone, so the Directives of the first
+    request for a Url are the ones used on the wire.
+    """
+
+    def __init__(self, connection: Callable[[], Optional[Connection]]):
+        """connection returns the current connection to the bridge, if any."""
+        self._connection = connection
+        self._wires: Dict[str, _WireSubscription] = {}
+
+    def __len__(self) -> int:
+        return len(self._wires)
+
+    def consumers(self, url: str) -> int:
+        """Count the consumers of a Url."""
+        _wire = self._wires.get(url)
+        return 0 if _wire is None else len(_wire.consumers)
+
+    async def subscribe(
+        self,
+        message: LeapMessage,
+        callback: MessageCallback,
+        timeout: Optional[float] = None,
+    ) -> Tuple[LeapMessage, Subscription]:
+        """
+        Subscribe callback to the Url of a SubscribeRequest.
+
+        If the Url is already subscribed, the response the bridge sent to the
+        first request for it is returned and nothing is sent.
+        """
+        if not callable(callback):
+            raise TypeError("callback must be callable")
+
+        if not message.CommuniqueType == CommuniqueType.SubscribeRequest:
+            raise TypeError("CommuniqueType must be SubscribeRequest")
+
+        _url = message.Header.Url
+        _wire = self._wires.get(_url)
+        if _wire is None:
+            _wire = _WireSubscription(_url, message)
+            self._wires[_url] = _wire
+
+        _subscription = Subscription(self, _wire, callback)
+        _wire.consumers.append(_subscription)
+
+        try:
+            async with _wire.lock:
+                if _wire.tag is None:
+                    await self._subscribe(_wire, timeout)
+        except BaseException:
+            await self.unsubscribe(_subscription)
+            raise
+
+        return (_wire.response, _subscription)  # type: ignore
+
+    async def _subscribe(
+        self,
+        wire: _WireSubscription,
+        timeout: Optional[float],
+        queue_response: bool = False,
+    ) -> LeapMessage:
+        _connection = self._connection()
+        if _connection is None:
+            raise ConnectionError("Not connected")
+
+        # Every request needs a tag of its own
+        _request = LeapMessage(
+            CommuniqueType=CommuniqueType.SubscribeRequest,
+            Header=LeapMessageHeader(
+                Url=wire.url, Directives=wire.request.Header.Directives
+            ),
+        )
+        _response, _tag = await _connection.subscribe(
+            _request,
+            partial(self._deliver, wire),
+            timeout=timeout,
+            queue_response=queue_response,
+        )
+
+        wire.response = _response
+        _status = _response.Header.StatusCode
+        if _status is not None and _status.is_successful():
+            wire.tag = _tag
+        return _response
+
+    async def _deliver(self, wire: _WireSubscription, message: LeapMessage) -> None:
+        for subscription in list(wire.consumers):
+            try:
+                await subscription.callback(message)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Got exception from %s", subscription)
+
+    async def unsubscribe(
+        self, subscription: Subscription, timeout: Optional[float] = None
+    ) -> None:
+        """Remove a consumer, unsubscribing on the bridge if it was the last."""
+        _wire = subscription._wire
+        if subscription in _wire.consumers:
+            _wire.consumers.remove(subscription)
+        if _wire.consumers or self._wires.get(_wire.url) is not _wire:
+            return
+
+        # The bridge unsubscribes by Url, so the wire stays registered until
+        # it has. Consumers of the Url that come meanwhile wait for the lock
+        # and subscribe it again.
+        async with _wire.lock:
+            if _wire.consumers or self._wires.get(_wire.url) is not _wire:
+                return
+            try:
+                await self._unsubscribe(_wire, timeout)
+            finally:
+                if not _wire.consumers:
+                    del self._wires[_wire.url]
+
+    async def _unsubscribe(
+        self, wire: _WireSubscription, timeout: Optional[float]
+    ) -> None:
+        _tag, wire.tag = wire.tag, None
+        _connection = self._connection()
+        if _tag is None or _connection is None:
+            return
+
+        logger.debug("Nobody wants %s anymore, unsubscribing", wire.url)
+        try:
+            await _connection.unsubscribe(_tag, timeout=timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            # The subscription ends with the connection anyway
+            logger.warning("Could not unsubscribe from %s", wire.url, exc_info=1)
+
+    async def restore(self, timeout: Optional[float] = None) -> None:
+        """
+        Make every subscription again on a new connection.
+
+        The response to each new subscription is given to its consumers like
+        any other message, through the same queue, since it carries the state
+        they missed.
+        """
+        _wires = list(self._wires.values())
+        for wire in _wires:
+            wire.tag = None
+
+        async def _restore(wire: _WireSubscription) -> None:
+            async with wire.lock:
+                if wire.tag is None and wire.consumers:
+                    _response = await self._subscribe(
+                        wire, timeout, queue_response=True
+                    )
+                    if wire.tag is None:
+                        # Failed, so there is no queue to put it through
+                        await self._deliver(wire, _response)
+
+        await asyncio.gather(*(_restore(x) for x in _wires))
@@ -0,0 +1,171 @@
+"""
+Log and record the raw lines exchanged with the bridge.
+
+Wire captures go to the pylutron_leap.traffic logger at DEBUG level, so they
+can be turned on and off separately from the rest of the library's debug
+output. Busy connections can be sampled to keep the captures small.
+
+TrafficRecorder writes every line to a capture file instead, which
+replay.replay() can feed back through a LeapProtocol.
+"""
+
+import logging
+import re
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Union
+
+TRAFFIC_LOGGER = "pylutron_leap.traffic"
+DEFAULT_MAX_BYTES = 4096
+
+traffic_logger = logging.getLogger(TRAFFIC_LOGGER)
+
+_PASSWORD = re.compile(rb'("Password"\s*:\s*)"(?:[^"\\]|\\.)*"')
+
+
+def redact(frame: bytes) -> bytes:
+    """Hide passwords, so login requests can be logged."""
+    if b'"Password"' not in frame:
+        return frame
+    return _PASSWORD.sub(rb'\1"***"', frame)
+
+
+class TrafficLog:
+    """
+    Log one in sample_every frames in each direction to TRAFFIC_LOGGER.
+
+    Frames are cut to max_bytes, or logged whole if it is None. Nothing is
+    formatted, and no frames are counted, unless the logger is enabled for
+    DEBUG.
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 1,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        logger: logging.Logger = traffic_logger,
+    ):
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+
+        self.sample_every = sample_every
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._received = 0
+        self._sent = 0
+
+    def received(self, frame: bytes) -> None:
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+
+        self._received += 1
+        if self._received % self.sample_every == 0:
+            self._log("<<", self._received, frame)
+
+    def sent(self, frame: bytes) -> None:
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+
+        self._sent += 1
+        if self._sent % self.sample_every == 0:
+            self._log(">>", self._sent, redact(frame))
+
+    def _log(self, direction: str, number: int, frame: bytes) -> None:
+        _size = len(frame)
+        if self.max_bytes is not None and _size > self.max_bytes:
+            frame = frame[: self.max_bytes]
+        self.logger.debug(
+            "%s #%d (%d bytes) %s",
+            direction,
+            number,
+            _size,
+            frame.decode(errors="replace"),
+        )
+
+
+CAPTURE_HEADER = b'{"capture":"pylutron-leap","version":1}\n'
+RECEIVED = "<"
+SENT = ">"
+
+_CAPTURE_LINE = re.compile(rb'\[([0-9.]+),"([<>])",(.*)\]\s*$', re.DOTALL)
+
+
+class CapturedLine(NamedTuple):
+    """A line of a capture: seconds since it started, direction and frame."""
+
+    time: float
+    direction: str
+    frame: bytes
+
+
+class TrafficRecorder:
+    """
+    Write the lines exchanged with the bridge to a JSONL capture file.
+
+    After a header line, every frame is stored as [seconds, direction,
+    frame], where seconds come from a monotonic clock started with the
+    recorder and direction is RECEIVED or SENT. The frame is written as it
+    was on the wire, since it is JSON already. Passwords are redacted.
+    """
+
+    def __init__(self, file: Union[str, Path, BinaryIO]):
+        if isinstance(file, (str, Path)):
+            self._file: BinaryIO = open(file, "wb")
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+
+        self._file.write(CAPTURE_HEADER)
+        self._start = time.monotonic()
+        self.lines = 0
+
+    def received(self, frame: bytes) -> None:
+        self._write(b"<", frame)
+
+    def sent(self, frame: bytes) -> None:
+        self._write(b">", redact(frame))
+
+    def _write(self, direction: bytes, frame: bytes) -> None:
+        _seconds = b"%.6f" % (time.monotonic() - self._start)
+        self._file.write(b'[%s,"%s",%s]\n' % (_seconds, direction, frame.strip()))
+        self.lines += 1
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_capture(file: Union[str, Path, BinaryIO]) -> Iterator[CapturedLine]:
+    """Read the lines of a capture written by TrafficRecorder."""
+    if isinstance(file, (str, Path)):
+        with open(file, "rb") as _file:
+            yield from read_capture(_file)
+        return
+
+    if file.readline() != CAPTURE_HEADER:
+        raise ValueError("Not a pylutron-leap capture")
+
+    for number, line in enumerate(file, 2):
+        if not line.strip():
+            continue
+        _match = _CAPTURE_LINE.match(line)
+        if _match is None:
+            raise ValueError(f"Line {number} of the capture is not a frame")
+        _seconds, _direction, _frame = _match.groups()
+        yield CapturedLine(float(_seconds), _direction.decode(), _frame)
+
+
+def load_capture(file: Union[str, Path, BinaryIO]) -> List[CapturedLine]:
+    return list(read_capture(file))
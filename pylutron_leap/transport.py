@@ -1,4 +1,35 @@
+import os
 import ssl
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Session to resume on the next TLS connection made from this context
+_resume_session: ContextVar[Optional[ssl.SSLSession]] = ContextVar(
+    "resume_session", default=None
+)
+
+_contexts: Dict[Tuple, "LeapSSLContext"] = {}
+
+
+class LeapSSLContext(ssl.SSLContext):
+    """
+    An SSLContext that can resume a TLS session on asyncio connections.
+
+    asyncio has no way to pass an SSLSession to a new connection, so the
+    session to resume is taken from a context variable when the connection
+    wraps its socket. Use resume_session() around open_connection().
+    """
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, **kwds):
+        if kwds.get("session") is None and not server_side:
+            kwds["session"] = _resume_session.get()
+        return super().wrap_bio(incoming, outgoing, server_side, **kwds)
+
+
+def resume_session(session: Optional[ssl.SSLSession]) -> None:
+    """Resume session on the TLS connections opened next by this task."""
+    _resume_session.set(session)
 
 
 def create_leap_ssl_context():
@@ -7,3 +38,66 @@ def create_leap_ssl_context():
     _ctx.verify_mode = ssl.CERT_NONE
 
     return _ctx
+
+
+def _mtime(path: Optional[Path]) -> Optional[float]:
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def get_leap_ssl_context(
+    verify_tls: Optional[bool] = False,
+    ca_chain: Optional[Path] = None,
+    keyfile: Optional[Path] = None,
+    certfile: Optional[Path] = None,
+) -> LeapSSLContext:
+    """
+    Get a TLS context for connecting to a bridge.
+
+    Contexts are shared by every connection with the same settings, so the
+    certificates are only read again when one of the files changes.
+    """
+    if (keyfile or certfile) and not (keyfile and certfile):
+        raise ValueError("Both keyfile and certfile are required for TLS auth!")
+
+    _key = (
+        verify_tls,
+        ca_chain,
+        _mtime(ca_chain),
+        keyfile,
+        _mtime(keyfile),
+        certfile,
+        _mtime(certfile),
+    )
+    _context = _contexts.get(_key)
+    if _context is not None:
+        return _context
+
+    # TODO: Make context options configurable maybe
+    _context = LeapSSLContext(ssl.PROTOCOL_TLSv1_2)
+
+    _context.verify_mode = ssl.CERT_REQUIRED
+    _context.check_hostname = True
+
+    if verify_tls is False:
+        _context.check_hostname = False
+        _context.verify_mode = ssl.CERT_NONE
+
+    if ca_chain:
+        _context.load_verify_locations(ca_chain)
+        _context.verify_mode = ssl.CERT_REQUIRED
+
+    if keyfile and certfile:
+        _context.load_cert_chain(certfile, keyfile)
+
+    _contexts[_key] = _context
+    return _context
+
+
+def clear_ssl_context_cache() -> None:
+    """Forget every shared TLS context."""
+    _contexts.clear()
@@ -0,0 +1,24 @@
+"""Build decoded bridge responses for tests and benchmarks."""
+
+from typing import Any, Dict
+
+from pylutron_leap.api.codec import decode_message
+from pylutron_leap.api.message import LeapMessage
+
+
+def read_response(
+    body_type: str, url: str, body: Dict[str, Any], lazy: bool = False
+) -> LeapMessage:
+    """Decode a successful ReadResponse for url with a body of body_type."""
+    return decode_message(
+        {
+            "CommuniqueType": "ReadResponse",
+            "Header": {
+                "MessageBodyType": body_type,
+                "StatusCode": "200 OK",
+                "Url": url,
+            },
+            "Body": body,
+        },
+        lazy=lazy,
+    )
@@ -0,0 +1,97 @@
+import asyncio
+
+from pylutron_leap.models.area import Area
+from pylutron_leap.models.areatree import AreaTree
+from pylutron_leap.session import LeapSession
+from tests.responses import read_response
+
+
+def _building() -> AreaTree:
+    # 1 is the building, 2 and 3 its floors, 4 to 7 rooms
+    _tree = AreaTree()
+    for area_id, parent, is_leaf in [
+        (4, 2, True),
+        (5, 2, True),
+        (2, 1, False),
+        (6, 3, True),
+        (7, 3, True),
+        (3, 1, False),
+        (1, None, False),
+    ]:
+        _tree.update(area_id, parent, is_leaf)
+    return _tree
+
+
+def test_queries():
+    _tree = _building()
+
+    assert _tree.roots() == [1]
+    assert _tree.children(1) == [2, 3]
+    assert _tree.ancestors(6) == [3, 1]
+    assert [_tree.depth(x) for x in [1, 3, 6]] == [0, 1, 2]
+    assert sorted(_tree.leaves(1)) == [4, 5, 6, 7]
+    assert _tree.leaves(2) == [4, 5]
+    assert _tree.leaves(4) == []
+
+
+def test_moves_and_leafness():
+    _tree = _building()
+
+    # A room moves to the other floor
+    _tree.update(5, 3, True)
+    assert _tree.children(2) == [4]
+    assert sorted(_tree.leaves(3)) == [5, 6, 7]
+    assert sorted(_tree.leaves(1)) == [4, 5, 6, 7]
+
+    # A floor gets split into rooms of its own
+    _tree.update(8, 7, True)
+    _tree.update(7, 3, False)
+    assert sorted(_tree.leaves(3)) == [5, 6, 8]
+    assert sorted(_tree.leaves(1)) == [4, 5, 6, 8]
+
+    # A whole floor moves under another one
+    _tree.update(3, 2, False)
+    assert _tree.ancestors(8) == [7, 3, 2, 1]
+    assert sorted(_tree.leaves(2)) == [4, 5, 6, 8]
+
+    # Cycles are ignored
+    _tree.update(2, 8, False)
+    assert _tree.parent(2) == 1
+
+    _tree.remove(3)
+    assert 3 not in _tree
+    assert sorted(_tree.roots()) == [1, 5, 6, 7]
+    assert _tree.leaves(1) == [4]
+    assert _tree.leaves(7) == [8]
+
+
+def test_area_models():
+    async def _test():
+        _session = LeapSession("localhost")
+        _definitions = read_response(
+            "MultipleAreaDefinition",
+            "/area",
+            {
+                "Areas": [
+                    {
+                        "href": f"/area/{x}",
+                        "Name": f"Area {x}",
+                        "SortOrder": x,
+                        "IsLeaf": x > 3,
+                        **({"Parent": {"href": f"/area/{p}"}} if p else {}),
+                    }
+                    for x, p in [(4, 2), (5, 2), (6, 3), (2, 1), (3, 1), (1, None)]
+                ]
+            },
+        )
+        Area.handle_response(_session, _definitions)
+        _areas = {x.leap_id: x for x in _session.areas}
+
+        assert _areas[1].get_children() == [_areas[2], _areas[3]]
+        assert _areas[4].get_parent() is _areas[2]
+        assert _areas[1].get_parent() is None
+        assert _areas[6].get_ancestors() == [_areas[3], _areas[1]]
+        assert _areas[6].depth == 2
+        assert _areas[1].get_leaf_areas() == [_areas[4], _areas[5], _areas[6]]
+
+    asyncio.run(_test())
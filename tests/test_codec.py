@@ -0,0 +1,173 @@
+import json
+from pathlib import Path
+
+import pytest
+from marshmallow import ValidationError
+
+from pylutron_leap.api.codec import (
+    BODY_TYPES,
+    LazyLeapMessage,
+    decode_body,
+    decode_header,
+    decode_message,
+    encode_message,
+    load_message,
+)
+from pylutron_leap.api.enum import (
+    CommandType,
+    CommuniqueType,
+    FanSpeedType,
+    MessageBodyTypeEnum,
+)
+from pylutron_leap.api.message import LeapMessage, ResponseStatus
+from pylutron_leap.api.zone import LeapMultiZoneBody
+from pylutron_leap.jsonbackend import dumps
+from pylutron_leap.models.messages import (
+    get_all_zone_subscribe,
+    get_zone_createrequest_command,
+    get_zone_createrequest_fancommand,
+    get_zone_createrequest_lightinglevelcommand,
+)
+
+_MESSAGES = Path(__file__).parent / "messages"
+
+
+def _corpus() -> list[dict]:
+    return [
+        json.loads(line)
+        for line in (_MESSAGES / "traffic.txt").read_text().splitlines()
+        if line.strip()
+    ]
+
+
+def test_decode_matches_schema():
+    for data in _corpus():
+        _expected = LeapMessage.Schema().load(data, partial=True)
+        assert decode_message(data) == _expected
+
+
+def test_decode_uses_registered_body():
+    _data: dict = {
+        "CommuniqueType": "ReadResponse",
+        "Header": {
+            "MessageBodyType": "MultipleZoneStatus",
+            "StatusCode": "200 OK",
+            "Url": "/zone/status",
+        },
+        "Body": {"ZoneStatuses": [{"href": "/zone/842/status", "Level": 10}]},
+    }
+
+    _msg = decode_message(_data)
+
+    assert _msg.CommuniqueType == CommuniqueType.ReadResponse
+    assert _msg.Header.StatusCode == ResponseStatus(200, "OK")
+    assert isinstance(_msg.Body, LeapMultiZoneBody)
+    assert _msg.Body.ZoneStatuses[0].Level == 10
+    assert BODY_TYPES[MessageBodyTypeEnum.MultipleZoneStatus] is LeapMultiZoneBody
+
+
+def test_decode_falls_back_to_union():
+    # The header names a body type that does not match the body, so the
+    # Union has to find the right class.
+    _data: dict = {
+        "CommuniqueType": "ReadResponse",
+        "Header": {"MessageBodyType": "OneZoneStatus", "Url": "/zone/842/status"},
+        "Body": {"Message": "Something went wrong"},
+    }
+
+    _msg = decode_message(_data)
+
+    assert _msg.Body.Message == "Something went wrong"
+
+
+def test_decode_unknown_body_members_like_schema():
+    _data: dict = {
+        "CommuniqueType": "ReadResponse",
+        "Header": {
+            "MessageBodyType": "MultipleZoneStatus",
+            "StatusCode": "200 OK",
+            "Url": "/zone/status",
+        },
+        "Body": {"ZoneStatuses": [], "Extra": 1},
+    }
+
+    # Loading the body alone is no more lenient than the whole message
+    with pytest.raises(ValidationError):
+        load_message(_data)
+    with pytest.raises(ValidationError):
+        decode_body(decode_header(_data["Header"]), _data)
+
+
+def test_decode_header():
+    _header = decode_header(
+        {
+            "Url": "/zone/status",
+            "ClientTag": "abc",
+            "Directives": {"SuppressMessageBody": True},
+        }
+    )
+
+    assert _header.ClientTag == "abc"
+    assert _header.Directives.SuppressMessageBody is True
+    assert _header.StatusCode is None
+    assert _header.MessageBodyType is None
+
+
+def test_encode_command_matches_schema():
+    _messages = [
+        get_zone_createrequest_lightinglevelcommand(
+            1845, CommandType.GoToDimmedLevel, 50
+        ),
+        get_zone_createrequest_lightinglevelcommand(
+            842, CommandType.GoToDimmedLevel, 0
+        ),
+        get_zone_createrequest_fancommand(
+            842, CommandType.GoToFanSpeed, FanSpeedType.High
+        ),
+        get_zone_createrequest_command(2210, CommandType.Raise),
+        get_all_zone_subscribe(),
+        # Coerced by the schema fields, not sent as they are
+        get_zone_createrequest_lightinglevelcommand(
+            1845, CommandType.GoToDimmedLevel, 50.7  # type: ignore
+        ),
+        get_zone_createrequest_lightinglevelcommand(
+            1845, CommandType.GoToDimmedLevel, True
+        ),
+    ]
+
+    for msg in _messages:
+        msg.Header.ClientTag = "c66a3051-5355-497f-8958-02f9fb2c607d"
+        _expected = LeapMessage.Schema().dump(msg)
+
+        assert encode_message(msg) == dumps(_expected)
+        # The second encode of each shape comes from the compiled template
+        assert encode_message(msg) == dumps(_expected)
+
+
+def test_lazy_decode_matches_eager():
+    for data in _corpus():
+        _lazy = decode_message(data, lazy=True)
+        _eager = decode_message(data)
+
+        assert _lazy.Header == _eager.Header
+        assert _lazy.Body == _eager.Body
+        assert _lazy.related_ids() == _eager.related_ids()
+
+
+def test_lazy_decode_defers_body():
+    _data: dict = {
+        "CommuniqueType": "ReadResponse",
+        "Header": {"MessageBodyType": "OneZoneStatus", "Url": "/zone/842/status"},
+        "Body": {"ZoneStatus": {"href": "/zone/842/status", "Level": 10}},
+    }
+
+    _msg = decode_message(_data, lazy=True)
+
+    assert isinstance(_msg, LazyLeapMessage)
+    assert _msg.Header.MessageBodyType == MessageBodyTypeEnum.OneZoneStatus
+    assert not _msg.is_decoded
+    assert "<raw" in repr(_msg)
+
+    assert _msg.Body.ZoneStatus.Level == 10
+    assert _msg.is_decoded
+    assert LeapMessage.Schema().dump(_msg) == _data
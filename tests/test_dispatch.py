@@ -0,0 +1,126 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from pylutron_leap.api.enum import CommuniqueType
+from pylutron_leap.api.message import LeapMessage, LeapMessageHeader
+from pylutron_leap.dispatch import DispatchQueue, OverflowPolicy
+
+
+def _message(url: str) -> LeapMessage:
+    return LeapMessage(
+        CommuniqueType=CommuniqueType.ReadResponse,
+        Header=LeapMessageHeader(Url=url),
+    )
+
+
+def _deliveries(policy: OverflowPolicy, urls: List[str]) -> List[str]:
+    """Put a message for every Url while the first one is being delivered."""
+
+    async def _test():
+        _received: List[str] = []
+        _release = asyncio.Event()
+
+        async def _callback(message):
+            await _release.wait()
+            _received.append(message.Header.Url)
+
+        _queue = DispatchQueue(_callback, maxsize=2, policy=policy)
+        for index, url in enumerate(urls):
+            if policy == OverflowPolicy.Block and index == 3:
+                # The queue is full, so this one has to wait
+                _put = asyncio.create_task(_queue.put(_message(url)))
+                await asyncio.sleep(0.01)
+                assert not _put.done()
+                _release.set()
+                await _put
+            else:
+                await _queue.put(_message(url))
+            await asyncio.sleep(0)
+
+        _release.set()
+        await asyncio.sleep(0.01)
+        _queue.close()
+
+        assert _queue.delivered == len(_received)
+        assert _queue.dropped == len(urls) - len(_received)
+        return _received
+
+    return asyncio.run(_test())
+
+
+def test_block():
+    _urls = ["/a", "/b", "/c", "/d", "/e"]
+    assert _deliveries(OverflowPolicy.Block, _urls) == _urls
+
+
+def test_drop_oldest():
+    # /a is being delivered while /b and /c fill the queue
+    _urls = ["/a", "/b", "/c", "/d", "/e"]
+    assert _deliveries(OverflowPolicy.DropOldest, _urls) == ["/a", "/d", "/e"]
+
+
+def test_keep_latest():
+    _urls = ["/a", "/zone/1", "/zone/2", "/zone/1", "/zone/3"]
+    assert _deliveries(OverflowPolicy.KeepLatest, _urls) == [
+        "/a",
+        "/zone/1",
+        "/zone/3",
+    ]
+
+
+def test_callback_errors_do_not_stop_delivery():
+    async def _test():
+        _received: List[str] = []
+
+        async def _callback(message):
+            if message.Header.Url == "/a":
+                raise RuntimeError("broken handler")
+            _received.append(message.Header.Url)
+
+        _queue = DispatchQueue(_callback)
+        await _queue.put(_message("/a"))
+        await _queue.put(_message("/b"))
+        await asyncio.sleep(0.01)
+        _queue.close()
+
+        assert _received == ["/b"]
+        assert _queue.stats()["delivered"] == 2
+
+    asyncio.run(_test())
+
+
+def test_close_wakes_blocked_put():
+    async def _test():
+        _release = asyncio.Event()
+
+        async def _callback(message):
+            await _release.wait()
+
+        _queue = DispatchQueue(_callback, maxsize=1)
+        await _queue.put(_message("/a"))
+        await asyncio.sleep(0)
+        await _queue.put(_message("/b"))
+
+        # The queue is full, so this one waits until it is closed
+        _put = asyncio.create_task(_queue.put(_message("/c")))
+        await asyncio.sleep(0.01)
+        assert not _put.done()
+
+        _queue.close()
+        await asyncio.wait_for(_put, 0.1)
+        assert _queue.dropped == 1
+        assert _queue.depth == 0
+
+        # Nothing is delivered after closing
+        await _queue.put(_message("/d"))
+        assert _queue._task is None
+        assert _queue.dropped == 2
+
+    asyncio.run(_test())
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        DispatchQueue(print, maxsize=0)  # type: ignore
@@ -0,0 +1,131 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from pylutron_leap.api.codec import decode_message
+from pylutron_leap.api.enum import CommuniqueType, MessageBodyTypeEnum
+from pylutron_leap.api.message import LeapMessage
+from pylutron_leap.eventbus import EventBus
+
+
+def _message(
+    url: str,
+    body_type: str = "OneZoneStatus",
+    tag: Optional[str] = None,
+    communique_type: str = "ReadResponse",
+) -> LeapMessage:
+    _header = {"MessageBodyType": body_type, "Url": url}
+    if tag is not None:
+        _header["ClientTag"] = tag
+    return decode_message(
+        {"CommuniqueType": communique_type, "Header": _header, "Body": {}},
+        lazy=True,
+    )
+
+
+def _recorder(received: List[str], name: str):
+    async def _callback(message):
+        received.append(name)
+
+    return _callback
+
+
+def test_routing():
+    async def _test():
+        _bus = EventBus()
+        _received: List[str] = []
+
+        _bus.subscribe(_recorder(_received, "zone 12"), href_id=12)
+        _bus.subscribe(_recorder(_received, "zones"), url_prefix="/zone/")
+        _bus.subscribe(_recorder(_received, "zone 1"), url_prefix="/zone/1")
+        _bus.subscribe(
+            _recorder(_received, "areas"),
+            body_type=MessageBodyTypeEnum.OneAreaStatus,
+        )
+        _bus.subscribe(
+            _recorder(_received, "updates"),
+            communique_type=CommuniqueType.UpdateResponse,
+        )
+        _bus.subscribe(_recorder(_received, "untagged"), tagged=False)
+
+        assert await _bus.publish(_message("/zone/12/status", tag="x")) == 2
+        await asyncio.sleep(0.01)
+        assert sorted(_received) == ["zone 12", "zones"]
+
+        _received.clear()
+        await _bus.publish(_message("/zone/1/status"))
+        await asyncio.sleep(0.01)
+        assert sorted(_received) == ["untagged", "zone 1", "zones"]
+
+        _received.clear()
+        await _bus.publish(
+            _message(
+                "/area/3/status", "OneAreaStatus", communique_type="UpdateResponse"
+            )
+        )
+        await asyncio.sleep(0.01)
+        assert sorted(_received) == ["areas", "untagged", "updates"]
+
+    asyncio.run(_test())
+
+
+def test_combined_criteria():
+    async def _test():
+        _bus = EventBus()
+        _received: List[str] = []
+        _bus.subscribe(
+            _recorder(_received, "zone 12 status"),
+            href_id=12,
+            body_type=MessageBodyTypeEnum.OneZoneStatus,
+        )
+
+        await _bus.publish(_message("/zone/12", "OneZoneDefinition"))
+        await _bus.publish(_message("/zone/12/status"))
+        await asyncio.sleep(0.01)
+        assert _received == ["zone 12 status"]
+
+    asyncio.run(_test())
+
+
+def test_only_interested_handlers_are_checked():
+    _bus = EventBus()
+    for zone in range(1000):
+        _bus.subscribe(_recorder([], str(zone)), href_id=zone)
+
+    assert len(_bus.candidates(_message("/zone/7/status"))) == 1
+    assert len(_bus.candidates(_message("/server/status/ping"))) == 0
+
+
+def test_unsubscribe():
+    async def _test():
+        _bus = EventBus()
+        _received: List[str] = []
+        _callback = _recorder(_received, "zones")
+
+        _registration = _bus.subscribe(_callback, url_prefix="/zone")
+        _bus.unsubscribe(_registration)
+        assert _bus.candidates(_message("/zone/1/status")) == []
+
+        _bus.subscribe(_callback)
+        _bus.unsubscribe_callback(_callback)
+        assert _bus.registrations == {}
+
+        with pytest.raises(ValueError):
+            _bus.unsubscribe_callback(_callback)
+
+    asyncio.run(_test())
+
+
+def test_publish_after_close():
+    async def _test():
+        _bus = EventBus()
+        _received: List[str] = []
+        _bus.subscribe(_recorder(_received, "zones"), url_prefix="/zone")
+
+        _bus.close()
+        await _bus.publish(_message("/zone/1/status"))
+        await asyncio.sleep(0.01)
+        assert _received == ["zones"]
+
+    asyncio.run(_test())
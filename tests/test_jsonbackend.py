@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from pylutron_leap import jsonbackend
+from pylutron_leap.api.codec import encode_message
+from pylutron_leap.api.enum import CommandType
+from pylutron_leap.models.messages import get_zone_createrequest_lightinglevelcommand
+
+_DOC = {
+    "CommuniqueType": "ReadResponse",
+    "Header": {"Url": "/area/407/status", "StatusCode": "200 OK"},
+    "Body": {"AreaStatus": {"href": "/area/407/status", "Level": 75, "Name": "Café"}},
+}
+
+
+@pytest.fixture(params=jsonbackend.available_backends())
+def backend(request):
+    _previous = jsonbackend.current_backend()
+    yield jsonbackend.use_backend(request.param)
+    jsonbackend.use_backend(_previous.name)
+
+
+def test_backend_roundtrip(backend):
+    _encoded = jsonbackend.dumps(_DOC)
+
+    assert isinstance(_encoded, bytes)
+    assert jsonbackend.loads(_encoded) == _DOC
+    assert _encoded == jsonbackend.get_backend("json").dumps(_DOC)
+
+
+def test_backend_encodes_commands(backend):
+    _msg = get_zone_createrequest_lightinglevelcommand(
+        1845, CommandType.GoToDimmedLevel, 50
+    )
+    _msg.Header.ClientTag = "abc"
+
+    _first = encode_message(_msg)
+    _second = encode_message(_msg)
+
+    assert _first == _second
+    assert json.loads(_first)["Body"]["Command"]["DimmedLevelParameters"] == {
+        "Level": 50
+    }
+
+
+def test_stdlib_is_always_available():
+    assert "json" in jsonbackend.available_backends()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        jsonbackend.get_backend("simplejson")
@@ -0,0 +1,330 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+
+from pylutron_leap.api.enum import CommuniqueType
+from pylutron_leap.api.message import LeapMessage, LeapMessageHeader
+from pylutron_leap.exception import SessionDisconnectedError
+from pylutron_leap.leap import LeapProtocol
+
+
+class FakeWriter:
+    """Collect lines written by LeapProtocol instead of sending them."""
+
+    def __init__(self):
+        self.writes: List[bytes] = []
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        self.writes.append(data)
+
+    def writelines(self, data) -> None:
+        self.write(b"".join(data))
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def sent(self) -> List[dict]:
+        return [json.loads(x) for x in b"".join(self.writes).splitlines()]
+
+
+def _ping() -> LeapMessage:
+    return LeapMessage(
+        CommuniqueType=CommuniqueType.ReadRequest,
+        Header=LeapMessageHeader(Url="/server/status/ping"),
+    )
+
+
+def _respond(reader: asyncio.StreamReader, request: dict) -> None:
+    _response = {
+        "CommuniqueType": "ReadResponse",
+        "Header": {
+            "MessageBodyType": "OnePingResponse",
+            "StatusCode": "200 OK",
+            "Url": request["Header"]["Url"],
+            "ClientTag": request["Header"]["ClientTag"],
+        },
+        "Body": {"PingResponse": {"LEAPVersion": 1.115}},
+    }
+    reader.feed_data(json.dumps(_response).encode("UTF-8") + b"\r\n")
+
+
+def test_request_response():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        _request = asyncio.create_task(_leap.request(_ping()))
+        await asyncio.sleep(0.01)
+        _respond(_reader, _writer.sent()[0])
+
+        _response = await _request
+        assert _response.Body.PingResponse.LEAPVersion == 1.115
+        assert _leap.in_flight == 0
+
+        _reader.feed_eof()
+        await _run
+
+    asyncio.run(_test())
+
+
+def test_in_flight_window():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer, max_in_flight=2)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        _requests = [asyncio.create_task(_leap.request(_ping())) for _ in range(5)]
+        await asyncio.sleep(0.01)
+
+        assert len(_writer.sent()) == 2
+        assert _leap.in_flight == 2
+        assert _leap.queue_depth == 3
+
+        _answered = 0
+        while _answered < 5:
+            for request in _writer.sent()[_answered:]:
+                _respond(_reader, request)
+                _answered += 1
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*_requests)
+
+        _stats = _leap.flow_stats()
+        assert _stats["queue_depth"] == 0
+        assert _stats["wait_count"] == 3
+        assert _stats["max_wait_time"] > 0
+
+        _reader.feed_eof()
+        await _run
+
+    asyncio.run(_test())
+
+
+def test_requests_in_one_tick_are_coalesced():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer, max_in_flight=64)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        _requests = [asyncio.create_task(_leap.request(_ping())) for _ in range(40)]
+        await asyncio.sleep(0.01)
+
+        assert len(_writer.writes) == 1
+        assert len(_writer.sent()) == 40
+
+        for request in _writer.sent():
+            _respond(_reader, request)
+        await asyncio.gather(*_requests)
+
+        _leap.close()
+        _reader.feed_eof()
+        await _run
+
+    asyncio.run(_test())
+
+
+def test_uncoalesced_writes():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer, coalesce_window=None)  # type: ignore
+
+        _requests = [asyncio.create_task(_leap.request(_ping())) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        assert len(_writer.writes) == 3
+        assert _leap.write_calls == 3
+
+        for request in _requests:
+            request.cancel()
+
+    asyncio.run(_test())
+
+
+def test_write_errors_fail_requests_and_restart_the_writer():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        async def _broken_drain():
+            raise OSError("broken pipe")
+
+        _writer.drain = _broken_drain  # type: ignore
+        with pytest.raises(SessionDisconnectedError):
+            await _leap.request(_ping())
+        await asyncio.sleep(0)
+        assert _leap.in_flight == 0
+        assert _leap._writer_task is None
+
+        # Later requests are still written
+        del _writer.drain
+        _writer.writes.clear()
+        _request = asyncio.create_task(_leap.request(_ping(), timeout=1))
+        await asyncio.sleep(0.01)
+        _respond(_reader, _writer.sent()[0])
+        await _request
+
+        # A response that arrived but wasn't picked up yet doesn't break close
+        _done = asyncio.get_running_loop().create_future()
+        _done.set_result(None)
+        _leap._in_flight_requests["done"] = _done
+        _leap.close()
+        _reader.feed_eof()
+        await _run
+
+    asyncio.run(_test())
+
+
+def test_request_timeout():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer)  # type: ignore
+        _leap.sweep_interval = 0.01
+
+        with pytest.raises(asyncio.TimeoutError):
+            await _leap.request(_ping(), timeout=0.05)
+
+        assert _leap.in_flight == 0
+        assert _leap.timeouts["/server/status/ping"] == 1
+
+        # The sweeper stops once nothing is waiting
+        await asyncio.sleep(0.05)
+        assert _leap._sweeper_task is None
+
+    asyncio.run(_test())
+
+
+def test_slow_subscriber_does_not_block_reader():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        _release = asyncio.Event()
+        _events: List[LeapMessage] = []
+
+        async def _slow(message):
+            await _release.wait()
+            _events.append(message)
+
+        _subscribe = LeapMessage(
+            CommuniqueType=CommuniqueType.SubscribeRequest,
+            Header=LeapMessageHeader(Url="/server/status/ping"),
+        )
+        _request = asyncio.create_task(_leap.subscribe(_subscribe, _slow))
+        await asyncio.sleep(0.01)
+        _respond(_reader, _writer.sent()[0])
+        _, _tag = await _request
+
+        # Two events for the subscription, then the response to a request
+        _respond(_reader, _writer.sent()[0])
+        _respond(_reader, _writer.sent()[0])
+        _request = asyncio.create_task(_leap.request(_ping()))
+        await asyncio.sleep(0.01)
+        _respond(_reader, _writer.sent()[1])
+
+        await asyncio.wait_for(_request, 1)
+        assert _events == []
+        assert _leap.dispatch_stats()[_tag]["depth"] == 1
+
+        _release.set()
+        await asyncio.sleep(0.01)
+        assert len(_events) == 2
+
+        _leap.close()
+        _reader.feed_eof()
+        await _run
+
+    asyncio.run(_test())
+
+
+def test_queued_subscribe_response_comes_first():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        _events: List[LeapMessage] = []
+
+        async def _callback(message):
+            _events.append(message)
+
+        _subscribe = LeapMessage(
+            CommuniqueType=CommuniqueType.SubscribeRequest,
+            Header=LeapMessageHeader(Url="/server/status/ping"),
+        )
+        _request = asyncio.create_task(
+            _leap.subscribe(_subscribe, _callback, queue_response=True)
+        )
+        await asyncio.sleep(0.01)
+
+        # An event read before the subscriber gets its response
+        _respond(_reader, _writer.sent()[0])
+        _respond(_reader, _writer.sent()[0])
+        _response, _ = await _request
+        await asyncio.sleep(0.01)
+
+        assert len(_events) == 2
+        assert _events[0] is _response
+
+        _leap.close()
+        _reader.feed_eof()
+        await _run
+
+    asyncio.run(_test())
+
+
+def test_unsubscribe():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        _events: List[LeapMessage] = []
+
+        async def _callback(message):
+            _events.append(message)
+
+        _subscribe = LeapMessage(
+            CommuniqueType=CommuniqueType.SubscribeRequest,
+            Header=LeapMessageHeader(Url="/server/status/ping"),
+        )
+        _request = asyncio.create_task(_leap.subscribe(_subscribe, _callback))
+        await asyncio.sleep(0.01)
+        _respond(_reader, _writer.sent()[0])
+        _, _tag = await _request
+
+        _request = asyncio.create_task(_leap.unsubscribe(_tag))
+        await asyncio.sleep(0.01)
+        _sent = _writer.sent()[1]
+        assert _sent["CommuniqueType"] == "UnsubscribeRequest"
+        assert _sent["Header"]["Url"] == "/server/status/ping"
+        _respond(_reader, _sent)
+        await _request
+
+        # Late events for the old subscription are not delivered
+        _respond(_reader, _writer.sent()[0])
+        await asyncio.sleep(0.01)
+        assert _events == []
+        assert await _leap.unsubscribe(_tag) is None
+
+        _leap.close()
+        _reader.feed_eof()
+        await _run
+
+    asyncio.run(_test())
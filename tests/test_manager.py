@@ -0,0 +1,71 @@
+import asyncio
+import json
+from pathlib import Path
+
+from pylutron_leap.api.codec import decode_message
+from pylutron_leap.api.enum import CommuniqueType
+from pylutron_leap.api.message import LeapMessage, LeapMessageHeader
+from pylutron_leap.manager import LeapManager
+from pylutron_leap.models.processor import ProcessorModel
+from pylutron_leap.models.zone import Zone
+from pylutron_leap.session import LeapSession
+
+MESSAGES = Path(__file__).parent / "messages"
+
+
+class FakeSession:
+    """Answer every request with the master device list."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def request(self, message, timeout=None):
+        self.requests.append(message)
+        with open(MESSAGES / "masterdevicelist.json") as _file:
+            return decode_message(json.load(_file))
+
+
+def test_get_processors():
+    async def _test():
+        _session = FakeSession()
+        _processors = await ProcessorModel.get_processors(_session)
+
+        assert _session.requests[0].CommuniqueType == CommuniqueType.ReadRequest
+        assert [x.leap_id for x in _processors] == [1, 2]
+        assert [x.ip_addr for x in _processors] == ["192.168.1.20", "192.168.1.21"]
+        assert _processors[1].mac_addr == "30:e2:83:01:23:46"
+        assert _processors[1].proc_id == 2
+
+    asyncio.run(_test())
+
+
+def test_merged_models_and_routing():
+    async def _test():
+        _first = LeapSession("192.168.1.20")
+        _second = LeapSession("192.168.1.21")
+        _first.models.extend([Zone(1, _first), Zone(2, _first)])
+        _second.models.extend([Zone(2, _second), Zone(3, _second)])
+
+        _manager = LeapManager("192.168.1.20")
+        _manager.sessions = [_first, _second]
+
+        assert sorted(x.leap_id for x in _manager.zones) == [1, 2, 3]
+        assert _manager.session_for(Zone, 2) is _first
+        assert _manager.session_for_url("/zone/3/commandprocessor") is _second
+        assert _manager.session_for_url("/zone/99/status") is _first
+        assert _manager.session_for_url("/server/status/ping") is _first
+
+        _sent = []
+
+        async def _request(message, timeout=None):
+            _sent.append(message)
+
+        _second.request = _request  # type: ignore
+        _msg = LeapMessage(
+            CommuniqueType=CommuniqueType.ReadRequest,
+            Header=LeapMessageHeader(Url="/zone/3/status"),
+        )
+        await _manager.request(_msg)
+        assert _sent == [_msg]
+
+    asyncio.run(_test())
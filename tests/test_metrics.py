@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import pytest
+
+from pylutron_leap.leap import LeapProtocol
+from pylutron_leap.metrics import MetricsRegistry, normalize_url, render_prometheus
+from tests.test_leap import FakeWriter, _ping, _respond
+
+
+def test_normalize_url():
+    assert normalize_url("/zone/12/status") == "/zone/{id}/status"
+    assert normalize_url("/zone/12") == "/zone/{id}"
+    assert normalize_url("/device?where=IsThisDevice:true") == "/device"
+    assert normalize_url("/server/status/ping") == "/server/status/ping"
+    assert normalize_url(None) == ""
+
+
+def test_prometheus_text():
+    _registry = MetricsRegistry({"host": "bridge"})
+    _registry.counter("requests_total", "Requests", ["url"]).labels("/zone").inc(2)
+    _histogram = _registry.histogram("latency_seconds", "Latency", buckets=[0.1, 1])
+    _histogram.observe(0.05)
+    _histogram.observe(0.5)
+
+    assert _registry.prometheus().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{host="bridge",url="/zone"} 2',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{host="bridge",le="0.1"} 1',
+        'latency_seconds_bucket{host="bridge",le="1"} 2',
+        'latency_seconds_bucket{host="bridge",le="+Inf"} 2',
+        'latency_seconds_sum{host="bridge"} 0.55',
+        'latency_seconds_count{host="bridge"} 2',
+    ]
+
+    _snapshot = _registry.snapshot()
+    assert _snapshot["requests_total"] == [{"labels": {"url": "/zone"}, "value": 2}]
+    assert _snapshot["latency_seconds"][0]["value"]["buckets"][1] == 2
+
+    with pytest.raises(ValueError):
+        _registry.gauge("requests_total", "Not a counter")
+    with pytest.raises(ValueError):
+        _registry.metrics["requests_total"].labels()
+
+
+def test_registries_are_merged():
+    _first = MetricsRegistry({"host": "a"})
+    _second = MetricsRegistry({"host": "b"})
+    for registry in [_first, _second]:
+        registry.counter("reconnects_total", "Reconnects").inc()
+
+    _text = render_prometheus([_first, _second])
+    assert _text.count("# TYPE reconnects_total counter") == 1
+    assert 'reconnects_total{host="a"} 1' in _text
+    assert 'reconnects_total{host="b"} 1' in _text
+    # Every registry in the process is rendered by default
+    assert 'reconnects_total{host="a"} 1' in render_prometheus()
+
+
+def test_protocol_metrics():
+    async def _test():
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        async def _handler(message):
+            assert message.Body is not None
+
+        _leap.subscribe_unsolicited(_handler)
+
+        _request = asyncio.create_task(_leap.request(_ping()))
+        await asyncio.sleep(0.01)
+        assert _leap.metrics.in_flight.labels().value == 1
+        _reader.feed_data(
+            json.dumps(
+                {
+                    "CommuniqueType": "ReadResponse",
+                    "Header": {"MessageBodyType": "OneZoneStatus", "Url": "/zone/3"},
+                    "Body": {"ZoneStatus": {"href": "/zone/3/status", "Level": 1}},
+                }
+            ).encode("UTF-8")
+            + b"\r\n"
+        )
+        _respond(_reader, _writer.sent()[0])
+        await _request
+        await asyncio.sleep(0.01)
+
+        _snapshot = _leap.metrics.snapshot()
+        _latency = _snapshot["leap_request_duration_seconds"]
+        assert _latency[0]["labels"] == {
+            "url": "/server/status/ping",
+            "communique_type": "ReadRequest",
+        }
+        assert _latency[0]["value"]["count"] == 1
+        assert _leap.metrics.in_flight.labels().value == 0
+
+        _messages = {
+            x["labels"]["direction"]: x["value"]
+            for x in _snapshot["leap_messages_total"]
+        }
+        assert _messages == {"out": 1, "in": 2}
+        _decoded = {
+            x["labels"]["body_type"]: x["value"]["count"]
+            for x in _snapshot["leap_decode_duration_seconds"]
+        }
+        assert _decoded == {"OneZoneStatus": 1, "OnePingResponse": 1}
+        # Bodies are decoded, and timed, when they are first read
+        _bodies = _snapshot["leap_body_decode_duration_seconds"]
+        assert [x["labels"]["body_type"] for x in _bodies] == ["OneZoneStatus"]
+        _dispatched = _snapshot["leap_dispatch_duration_seconds"]
+        assert _dispatched[0]["labels"] == {"body_type": "OneZoneStatus"}
+
+        _reader.feed_eof()
+        await _run
+
+    asyncio.run(_test())
@@ -0,0 +1,83 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from pylutron_leap.api.enum import CommandType
+from pylutron_leap.mock import MockProcessor, MockTopology
+from pylutron_leap.models.messages import get_zone_createrequest_lightinglevelcommand
+from pylutron_leap.session import LeapSession
+
+CERTS = Path(__file__).parent / "certs"
+
+
+def test_topology():
+    _topology = MockTopology(zones=10, zones_per_area=4, zones_per_device=2)
+
+    assert len(_topology.zones) == 10
+    assert len(_topology.devices) == 5
+    # The root area and three leaf areas
+    assert len(_topology.areas) == 4
+    _ids = [*_topology.areas, *_topology.devices, *_topology.zones]
+    assert len(set(_ids)) == len(_ids)
+
+    with pytest.raises(ValueError):
+        MockTopology(zones_per_area=0)
+
+
+def test_handle_requests():
+    _mock = MockProcessor(MockTopology(zones=2))
+    _zone_id = next(iter(_mock.topology.zones))
+
+    def _request(communique_type, url, **header):
+        return {
+            "CommuniqueType": communique_type,
+            "Header": {"Url": url, "ClientTag": "t", **header},
+        }
+
+    (_status,) = _mock.handle(None, _request("ReadRequest", f"/zone/{_zone_id}/status"))  # type: ignore
+    assert _status["Header"]["MessageBodyType"] == "OneZoneStatus"
+    assert _status["Header"]["ClientTag"] == "t"
+    assert _status["Body"]["ZoneStatus"]["Level"] == 0
+
+    (_missing,) = _mock.handle(None, _request("ReadRequest", "/nothing"))  # type: ignore
+    assert _missing["Header"]["StatusCode"] == "404 NotFound"
+    assert _mock.requests == {"/zone/{id}/status": 1, "/nothing": 1}
+
+
+def test_session_against_mock():
+    async def _test():
+        _topology = MockTopology(zones=20)
+        async with MockProcessor(
+            _topology, certfile=CERTS / "bridge.crt", keyfile=CERTS / "bridge.key"
+        ) as _mock:
+            _session = LeapSession("127.0.0.1", port=_mock.port)
+            await _session.connect(timeout=5)
+
+            # Wait for the definitions and subscriptions of the initialization
+            while len(list(_session.devices)) < len(_topology.devices) + 1:
+                await asyncio.sleep(0.01)
+            while not _mock.requests["/occupancygroup/status"]:
+                await asyncio.sleep(0.01)
+
+            _zone_id = next(iter(_topology.zones))
+            _response = await _session.request(
+                get_zone_createrequest_lightinglevelcommand(
+                    _zone_id, CommandType.GoToDimmedLevel, 30
+                )
+            )
+            assert str(_response.Header.StatusCode) == "201 Created"
+            assert _topology.levels[_zone_id] == 30
+
+            assert await _mock.storm(rate=2000, count=40) == 40
+            _expected = dict(_topology.levels)
+            for _ in range(100):
+                _levels = {x.leap_id: x.level for x in _session.zones}
+                if _levels == _expected:
+                    break
+                await asyncio.sleep(0.01)
+            assert _levels == _expected
+
+            _session.close()
+
+    asyncio.run(_test())
@@ -0,0 +1,139 @@
+import asyncio
+from typing import List
+
+from pylutron_leap.api.enum import CommuniqueType
+from pylutron_leap.api.message import LeapMessage, LeapMessageHeader
+from pylutron_leap.leap import LeapProtocol
+from pylutron_leap.pool import LeapPool
+from tests.test_leap import FakeWriter, _ping, _respond
+
+
+def _connection():
+    _reader = asyncio.StreamReader()
+    _writer = FakeWriter()
+    return _reader, _writer, LeapProtocol(_reader, _writer)  # type: ignore
+
+
+def test_requests_balanced_over_ready_connections():
+    async def _test():
+        _primary = _connection()
+        _first = _connection()
+        _second = _connection()
+        _pool = LeapPool(_primary[2], [_first[2], _second[2]])
+
+        # Nothing but the primary until the secondaries are logged in
+        assert _pool.pick() is _primary[2]
+        _pool.mark_ready(_first[2])
+        _pool.mark_ready(_second[2])
+
+        _run = asyncio.create_task(_pool.run())
+        _requests = [asyncio.create_task(_pool.request(_ping())) for _ in range(4)]
+        await asyncio.sleep(0.01)
+
+        assert len(_primary[1].sent()) == 0
+        assert len(_first[1].sent()) == 2
+        assert len(_second[1].sent()) == 2
+        assert _pool.flow_stats()["in_flight"] == 4
+
+        for reader, writer, _ in (_first, _second):
+            for request in writer.sent():
+                _respond(reader, request)
+        await asyncio.gather(*_requests)
+
+        _primary[0].feed_eof()
+        await _run
+
+    asyncio.run(_test())
+
+
+def test_subscriptions_pinned_to_primary():
+    async def _test():
+        _primary = _connection()
+        _secondary = _connection()
+        _pool = LeapPool(_primary[2], [_secondary[2]])
+        _pool.mark_ready(_secondary[2])
+
+        _msg = LeapMessage(
+            CommuniqueType=CommuniqueType.SubscribeRequest,
+            Header=LeapMessageHeader(Url="/zone/status"),
+        )
+        _request = asyncio.create_task(_pool.request(_msg))
+        await asyncio.sleep(0.01)
+
+        assert len(_primary[1].sent()) == 1
+        assert len(_secondary[1].sent()) == 0
+        _request.cancel()
+
+    asyncio.run(_test())
+
+
+def test_lost_secondary_dropped():
+    async def _test():
+        _primary = _connection()
+        _secondary = _connection()
+        _pool = LeapPool(_primary[2], [_secondary[2]])
+        _pool.mark_ready(_secondary[2])
+        # The primary only counts once it is logged in
+        assert _pool.health()["ready"] == 1
+        _pool.mark_ready(_primary[2])
+
+        _run = asyncio.create_task(_pool.run())
+        _secondary[0].feed_eof()
+        await asyncio.sleep(0.01)
+
+        assert not _run.done()
+        assert _secondary[1].closed
+        assert _pool.pick() is _primary[2]
+        assert _pool.health() == {
+            "connections": 1,
+            "ready": 1,
+            "lost": 1,
+            "in_flight": [0],
+        }
+
+        _primary[0].feed_eof()
+        await _run
+
+    asyncio.run(_test())
+
+
+def test_lost_secondary_reopened():
+    async def _test():
+        _primary = _connection()
+        _lost = _connection()
+        _replacement = _connection()
+        _attempts: List[int] = []
+        _logins: List[LeapProtocol] = []
+
+        async def _reopen(attempt: int) -> LeapProtocol:
+            _attempts.append(attempt)
+            if attempt == 0:
+                raise ConnectionError("refused")
+            return _replacement[2]
+
+        async def _login(leap: LeapProtocol) -> None:
+            _logins.append(leap)
+
+        _pool = LeapPool(_primary[2], [_lost[2]], reopen=_reopen, login=_login)
+        _pool.mark_ready(_primary[2])
+        _pool.mark_ready(_lost[2])
+
+        _run = asyncio.create_task(_pool.run())
+        _lost[0].feed_eof()
+        await asyncio.sleep(0.01)
+
+        assert _attempts == [0, 1]
+        assert _logins == [_replacement[2]]
+        assert _pool.pick() is _replacement[2]
+        assert _pool.health()["ready"] == 2
+
+        # The replacement is read from
+        _request = asyncio.create_task(_pool.request(_ping()))
+        await asyncio.sleep(0.01)
+        _respond(_replacement[0], _replacement[1].sent()[0])
+        await _request
+
+        _primary[0].feed_eof()
+        await _run
+
+    asyncio.run(_test())
@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+
+from pylutron_leap.leap import FRAMING_PROTOCOL, FRAMING_STREAM, open_connection
+from pylutron_leap.protocol import LeapLineProtocol
+
+
+class FakeTransport:
+    def __init__(self):
+        self.paused = False
+
+    def pause_reading(self):
+        self.paused = True
+
+    def resume_reading(self):
+        self.paused = False
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+
+def _feed(protocol: LeapLineProtocol, data: bytes) -> None:
+    while data:
+        _buffer = protocol.get_buffer(len(data))
+        _size = min(len(_buffer), len(data))
+        _buffer[:_size] = data[:_size]
+        protocol.buffer_updated(_size)
+        data = data[_size:]
+
+
+def _frames(protocol: LeapLineProtocol):
+    _frames = list(protocol._frames)
+    protocol._frames.clear()
+    return _frames
+
+
+def test_split_frames():
+    _protocol = LeapLineProtocol(buffer_size=16)
+    _protocol.connection_made(FakeTransport())
+
+    _feed(_protocol, b'{"a": 1}\r\n{"b"')
+    assert _frames(_protocol) == [b'{"a": 1}']
+    _feed(_protocol, b": 2}\r")
+    assert _frames(_protocol) == []
+    _feed(_protocol, b"\n\r\n\n{}\n")
+    assert _frames(_protocol) == [b'{"b": 2}', b"{}"]
+    assert _protocol.frames_received == 3
+
+
+def test_long_lines_grow_the_buffer():
+    _protocol = LeapLineProtocol(buffer_size=16)
+    _protocol.connection_made(FakeTransport())
+
+    _line = b"x" * 100_000
+    for start in range(0, len(_line), 1000):
+        _feed(_protocol, _line[start : start + 1000])
+    _feed(_protocol, b"\r\nshort\r\n")
+    assert _frames(_protocol) == [_line, b"short"]
+
+
+def test_backpressure_and_eof():
+    async def _test():
+        _protocol = LeapLineProtocol(max_frames=4)
+        _transport = FakeTransport()
+        _protocol.connection_made(_transport)
+
+        _feed(_protocol, b"1\n2\n3\n4\n5\n")
+        assert _transport.paused
+        for frame in [b"1", b"2", b"3"]:
+            assert await _protocol.readline() == frame
+        assert not _transport.paused
+
+        _protocol.eof_received()
+        assert not _protocol.at_eof()
+        assert await _protocol.readline() == b"4"
+        assert await _protocol.readline() == b"5"
+        assert await _protocol.readline() == b""
+        assert _protocol.at_eof()
+
+    asyncio.run(_test())
+
+
+@pytest.mark.parametrize("framing", [FRAMING_PROTOCOL, FRAMING_STREAM])
+def test_framing_over_socket(framing):
+    _message = {
+        "CommuniqueType": "ReadResponse",
+        "Header": {"MessageBodyType": "OneZoneStatus", "Url": "/zone/1/status"},
+        "Body": {"ZoneStatus": {"href": "/zone/1/status", "Level": 50}},
+    }
+
+    async def _test():
+        async def _handle(reader, writer):
+            _data = json.dumps(_message).encode("UTF-8")
+            # Split a frame across writes
+            writer.write(_data[:10])
+            await writer.drain()
+            writer.write(_data[10:] + b"\r\n")
+            await writer.drain()
+            await reader.read()
+            writer.close()
+
+        _server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+        _port = _server.sockets[0].getsockname()[1]
+        _received = asyncio.get_running_loop().create_future()
+
+        async def _callback(message):
+            _received.set_result(message)
+
+        async with _server:
+            _leap = await open_connection("127.0.0.1", _port, framing=framing)
+            _leap.subscribe_unsolicited(_callback)
+            _task = asyncio.create_task(_leap.run())
+
+            _got = await asyncio.wait_for(_received, 5)
+            assert _got.Header.Url == "/zone/1/status"
+
+            _leap.close()
+            await asyncio.wait_for(_task, 5)
+
+    asyncio.run(_test())
+
+
+def test_unknown_framing():
+    with pytest.raises(ValueError):
+        asyncio.run(open_connection("127.0.0.1", 1, framing="carrier pigeon"))
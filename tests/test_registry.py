@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from pylutron_leap.models.area import Area
+from pylutron_leap.models.device import Device
+from pylutron_leap.models.fan import FanModel
+from pylutron_leap.models.registry import ModelRegistry, kind_of
+from pylutron_leap.models.zone import Zone
+from pylutron_leap.session import LeapSession
+from tests.responses import read_response
+
+
+def test_kind_of():
+    assert kind_of(Zone) is Zone
+    assert kind_of(FanModel) is Zone
+    assert kind_of(Area) is Area
+
+
+def test_registry_is_a_list():
+    async def _test():
+        _session = LeapSession("localhost")
+        _registry = ModelRegistry([Zone(1, _session), Area(1, _session)])
+        _fan = FanModel(2, _session)
+        _registry.append(_fan)
+        _registry.extend([Device(1, _session)])
+
+        assert len(_registry) == 4
+        assert [type(x) for x in _registry] == [Zone, Area, FanModel, Device]
+        assert _registry[2] is _fan
+        assert _fan in _registry
+
+        assert _registry.get(Zone, 2) is _fan
+        assert _registry.get(FanModel, 2) is _fan
+        assert _registry.get(FanModel, 1) is None
+        assert _registry.get(Device, 2) is None
+
+        _zones = _registry.view(Zone)
+        assert list(_zones) == [1, 2]
+        assert list(_registry.view(FanModel).values()) == [_fan]
+
+        # Views follow the registry, also when models are removed
+        _registry.append(Zone(3, _session))
+        del _registry[0]
+        assert list(_zones) == [2, 3]
+        _registry.remove(_fan)
+        assert _registry.get(Zone, 2) is None
+        assert list(_zones) == [3]
+
+    asyncio.run(_test())
+
+
+def test_get_or_create():
+    async def _test():
+        _session = LeapSession("localhost")
+
+        _zone = Zone.get_or_create_zone(_session, 10)
+        assert Zone.get_or_create_zone(_session, 10) is _zone
+        _area = Area.get_or_create_area(_session, 10)
+        assert _area is not _zone
+        _device = Device.get_or_create_device(_session, 10)
+
+        _zone, _created = _session.models.get_or_create(
+            Zone, 11, lambda: Zone(11, _session)
+        )
+        assert _created
+        assert _session.models.get_or_create(Zone, 11, lambda: Zone(11, _session)) == (
+            _zone,
+            False,
+        )
+
+        assert [x.leap_id for x in _session.zones] == [10, 11]
+        assert list(_session.areas) == [_area]
+        assert list(_session.devices) == [_device]
+        assert list(_session.current_leap_ids) == [10, 10, 10, 11]
+
+    asyncio.run(_test())
+
+
+def _zone(session: LeapSession, leap_id: int, area_id: int, category: dict):
+    # Zone definitions come in the Zone of zone statuses
+    _status = read_response(
+        "OneZoneStatus",
+        "/zone/status",
+        {
+            "ZoneStatus": {
+                "href": f"/zone/{leap_id}/status",
+                "Zone": {
+                    "href": f"/zone/{leap_id}",
+                    "Name": "Zone",
+                    "SortOrder": 0,
+                    "ControlType": None,
+                    "Category": category,
+                    "Device": None,
+                    "ColorTuningProperties": None,
+                    "PhaseSettings": None,
+                    "TuningSettings": None,
+                    "AssociatedArea": {"href": f"/area/{area_id}"},
+                    "AssociatedFacade": None,
+                },
+            }
+        },
+    )
+    Zone.get_or_create_zone(session, leap_id)._update_definition(
+        _status.Body.ZoneStatus.Zone
+    )
+
+
+def test_secondary_indexes():
+    async def _test():
+        _session = LeapSession("localhost")
+        _fan = {"IsLight": False, "Type": "CeilingFan", "SubType": ""}
+        _light = {"IsLight": True, "Type": "Light", "SubType": ""}
+        _zone(_session, 1, 407, _fan)
+        _zone(_session, 2, 407, _light)
+        _zone(_session, 3, 408, _fan)
+        Device.handle_response(
+            _session,
+            read_response(
+                "MultipleDeviceDefinition",
+                "/device",
+                {
+                    "Devices": [
+                        {
+                            "href": "/device/835",
+                            "Name": "Fan Control 1",
+                            "Parent": {"href": "/project"},
+                            "SerialNumber": 12345678,
+                            "ModelNumber": "RRD-2ANF",
+                            "DeviceType": "Unknown",
+                            "AssociatedArea": {"href": "/area/407"},
+                        }
+                    ]
+                },
+            ),
+        )
+
+        _models = _session.models
+        _fans = _models.find(Zone, "category", "CeilingFan")
+        assert list(_fans) == [1, 3]
+        assert list(_models.find(Zone, "associated_area", 407)) == [1, 2]
+        assert list(_models.find(Device, "model_number", "RRD-2ANF")) == [835]
+        assert 835 in _models.find(Device, "serial_number", 12345678)
+        assert [x.leap_id for x in Area(407, _session).get_known_devices()] == [835]
+        with pytest.raises(KeyError):
+            _models.find(Device, "name", "Fan Control 1")
+
+        # A zone that moves and changes category moves in the indexes
+        _zone(_session, 3, 407, _light)
+        assert list(_fans) == [1]
+        assert list(_models.find(Zone, "category", "Light")) == [2, 3]
+        assert [x.leap_id for x in Area(407, _session).get_known_zones()] == [1, 2, 3]
+        assert list(_models.find(Zone, "associated_area", 408)) == []
+
+        # Removed models leave the indexes too
+        _models.remove(_models.get(Zone, 3))
+        assert list(_models.find(Zone, "category", "Light")) == [2]
+        assert list(_models.find(Device, "area_id", 407)) == [835]
+
+    asyncio.run(_test())
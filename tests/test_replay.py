@@ -0,0 +1,146 @@
+import asyncio
+import io
+import json
+import time
+
+import pytest
+
+from pylutron_leap.leap import LeapProtocol
+from pylutron_leap.replay import replay
+from pylutron_leap.session import LeapSession
+from pylutron_leap.traffic import (
+    RECEIVED,
+    SENT,
+    CapturedLine,
+    TrafficRecorder,
+    load_capture,
+)
+from tests.test_leap import FakeWriter, _ping, _respond
+
+
+def _frame(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode("UTF-8")
+
+
+def _zone_status(zone: int, level: int, tag=None) -> bytes:
+    _header = {
+        "MessageBodyType": "OneZoneStatus",
+        "StatusCode": "200 OK",
+        "Url": "/zone/status",
+    }
+    if tag is not None:
+        _header["ClientTag"] = tag
+    return _frame(
+        {
+            "CommuniqueType": "ReadResponse",
+            "Header": _header,
+            "Body": {"ZoneStatus": {"href": f"/zone/{zone}/status", "Level": level}},
+        }
+    )
+
+
+def test_record_protocol_traffic():
+    async def _test():
+        _file = io.BytesIO()
+        _recorder = TrafficRecorder(_file)
+        _reader = asyncio.StreamReader()
+        _writer = FakeWriter()
+        _leap = LeapProtocol(_reader, _writer, recorder=_recorder)  # type: ignore
+        _run = asyncio.create_task(_leap.run())
+
+        _request = asyncio.create_task(_leap.request(_ping()))
+        await asyncio.sleep(0.01)
+        _respond(_reader, _writer.sent()[0])
+        await _request
+        _reader.feed_data(_zone_status(1, 50) + b"\r\n")
+        _reader.feed_eof()
+        await _run
+
+        _recorder.sent(b'{"Body":{"Login":{"Password":"secret"}}}\r\n')
+        _recorder.close()
+        return _file
+
+    _file = asyncio.run(_test())
+    _file.seek(0)
+    _lines = load_capture(_file)
+
+    assert [x.direction for x in _lines] == [SENT, RECEIVED, RECEIVED, SENT]
+    assert [x.time for x in _lines] == sorted(x.time for x in _lines)
+    assert json.loads(_lines[0].frame)["Header"]["Url"] == "/server/status/ping"
+    assert (
+        json.loads(_lines[1].frame)["Header"]["ClientTag"]
+        == json.loads(_lines[0].frame)["Header"]["ClientTag"]
+    )
+    assert _lines[2].frame == _zone_status(1, 50)
+    assert _lines[3].frame == b'{"Body":{"Login":{"Password":"***"}}}'
+
+
+def test_read_capture_rejects_other_files():
+    with pytest.raises(ValueError):
+        load_capture(io.BytesIO(b'{"CommuniqueType":"ReadResponse"}\n'))
+
+
+def _capture():
+    return [
+        CapturedLine(
+            0.0,
+            SENT,
+            b'{"CommuniqueType":"SubscribeRequest",'
+            b'"Header":{"Url":"/zone/status","ClientTag":"a"}}',
+        ),
+        CapturedLine(
+            0.05,
+            RECEIVED,
+            _frame(
+                {
+                    "CommuniqueType": "SubscribeResponse",
+                    "Header": {
+                        "MessageBodyType": "OneZoneStatus",
+                        "StatusCode": "200 OK",
+                        "Url": "/zone/status",
+                        "ClientTag": "a",
+                    },
+                    "Body": {"ZoneStatus": {"href": "/zone/1/status", "Level": 10}},
+                }
+            ),
+        ),
+        CapturedLine(0.1, RECEIVED, _zone_status(1, 20, tag="a")),
+        CapturedLine(
+            0.1,
+            SENT,
+            b'{"CommuniqueType":"ReadRequest",'
+            b'"Header":{"Url":"/zone/2/status","ClientTag":"b"}}',
+        ),
+        CapturedLine(0.15, RECEIVED, _zone_status(2, 30, tag="b")),
+        CapturedLine(0.2, RECEIVED, _zone_status(3, 40)),
+    ]
+
+
+def test_replay_into_session():
+    async def _test():
+        _session = LeapSession("localhost")
+        _stats = await replay(_capture(), _session)
+
+        assert (_stats.received, _stats.sent) == (4, 2)
+        assert {x.leap_id: x.level for x in _session.zones} == {1: 20, 2: 30, 3: 40}
+        _messages = {
+            x["labels"]["direction"]: x["value"]
+            for x in _session.metrics.snapshot()["leap_messages_total"]
+        }
+        assert _messages["in"] == 4
+
+    asyncio.run(_test())
+
+
+def test_replay_speed():
+    async def _test(speed):
+        _session = LeapSession("localhost")
+        _start = time.perf_counter()
+        await replay(_capture(), _session, speed=speed)
+        return time.perf_counter() - _start, [x.level for x in _session.zones]
+
+    _fast, _fast_levels = asyncio.run(_test(None))
+    _recorded, _recorded_levels = asyncio.run(_test(2.0))
+    assert _fast < 0.1
+    assert _recorded >= 0.1
+    assert _fast_levels == _recorded_levels
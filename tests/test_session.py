@@ -0,0 +1,312 @@
+import asyncio
+import socket
+import time
+from typing import Callable, Dict, List
+
+import pytest
+
+from pylutron_leap.api.codec import decode_message
+from pylutron_leap.api.enum import CommuniqueType
+from pylutron_leap.leap import LeapProtocol
+from pylutron_leap.models.zone import Zone
+from pylutron_leap.pool import LeapPool
+from pylutron_leap.session import RECONNECT_DELAY, RECONNECT_MAX_DELAY, LeapSession
+from tests.responses import read_response
+from tests.test_leap import FakeWriter
+
+
+def test_handle_response_skips_unhandled_bodies():
+    async def _test():
+        _session = LeapSession("localhost")
+
+        _ping = read_response(
+            "OnePingResponse",
+            "/server/status/ping",
+            {"PingResponse": {"LEAPVersion": 1.115}},
+            lazy=True,
+        )
+        await _session.handle_response(_ping)
+        assert not _ping.is_decoded
+
+        _status = read_response(
+            "OneZoneStatus",
+            "/zone/status",
+            {"ZoneStatus": {"href": "/zone/842/status", "Level": 10}},
+            lazy=True,
+        )
+        await _session.handle_response(_status)
+        assert _session.model_for_response(_status) is Zone
+        assert [x.level for x in _session.zones] == [10]
+
+    asyncio.run(_test())
+
+
+def test_connect_timeout():
+    # Nothing listens on this port, so every connection attempt is refused
+    with socket.socket() as _sock:
+        _sock.bind(("127.0.0.1", 0))
+        _port = _sock.getsockname()[1]
+
+    async def _test():
+        _session = LeapSession("127.0.0.1", port=_port, connect_timeout=0.2)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await _session.connect()
+
+        assert not _session.logged_in
+
+    asyncio.run(_test())
+
+
+def test_pool_health_before_connect():
+    async def _test():
+        _session = LeapSession("localhost", pool_size=3)
+        _health = _session.pool_health()
+        assert _health["size"] == 3
+        assert _health["connections"] == 0
+        assert not _health["healthy"]
+
+        with pytest.raises(ValueError):
+            LeapSession("localhost", pool_size=0)
+
+    asyncio.run(_test())
+
+
+def test_pool_events_from_primary_only():
+    async def _test():
+        _session = LeapSession("localhost", pool_size=3)
+        _buses: List[object] = []
+
+        async def _open_connection(ssl_context, events=None):
+            _buses.append(events)
+            return LeapProtocol(asyncio.StreamReader(), FakeWriter(), events=events)
+
+        _session._ssl_context = lambda: None  # type: ignore
+        _session._open_connection = _open_connection  # type: ignore
+        await _session._connect()
+
+        assert _buses == [_session.events, None, None]
+        _pool = _session._leap
+        assert isinstance(_pool, LeapPool)
+        assert _pool.primary.events is _session.events
+        assert all(x.events is not _session.events for x in _pool.secondaries)
+        assert _session.pool_health()["ready"] == 0
+        _session.close()
+
+    asyncio.run(_test())
+
+
+def test_session_metrics():
+    async def _test():
+        _session = LeapSession("bridge.local", pool_size=2)
+        _text = _session.metrics.prometheus()
+        assert 'leap_connections{host="bridge.local"} 0' in _text
+        assert "# TYPE leap_request_duration_seconds histogram" in _text
+
+        _session.metrics.reconnects.inc()
+        assert _session.metrics.snapshot()["leap_reconnects_total"] == [
+            {"labels": {}, "value": 1}
+        ]
+
+    asyncio.run(_test())
+
+
+class FakeLeap:
+    """
+    Answer requests with canned responses, recording the Urls.
+
+    Reads, not subscriptions, of /zone/status answer with the levels by zone
+    id. Requests for a
+    Url in gates are only answered once its event is set.
+    """
+
+    def __init__(self, project_name: str):
+        self.project_name = project_name
+        self.urls: List[str] = []
+        self.levels: Dict[int, int] = {}
+        self.gates: Dict[str, asyncio.Event] = {}
+        self.lazy = True
+
+    async def request(self, message, timeout=None):
+        _url = message.Header.Url
+        self.urls.append(_url)
+        if _url in self.gates:
+            await self.gates[_url].wait()
+
+        _response: dict = {
+            "CommuniqueType": "ReadResponse",
+            "Header": {"StatusCode": "200 OK", "Url": _url},
+        }
+        _read = message.CommuniqueType == CommuniqueType.ReadRequest
+        if _url == "/zone/status" and _read and self.levels:
+            _response["Header"]["MessageBodyType"] = "MultipleZoneStatus"
+            _response["Body"] = {
+                "ZoneStatuses": [
+                    {"href": f"/zone/{x}/status", "Level": level}
+                    for x, level in self.levels.items()
+                ]
+            }
+        elif _url == "/project":
+            _response["Header"]["MessageBodyType"] = "OneProjectDefinition"
+            _response["Body"] = {
+                "Project": {"href": "/project", "Name": self.project_name}
+            }
+        return decode_message(_response, lazy=self.lazy)
+
+    async def subscribe(self, message, callback, timeout=None, queue_response=False):
+        return await self.request(message), "tag"
+
+    def subscribe_unsolicited(self, callback):
+        pass
+
+
+def test_resync_skips_unchanged_definitions():
+    async def _test():
+        _session = LeapSession("localhost")
+        _session._login_completed.set_result(None)
+        _session._monitor_task = asyncio.get_running_loop().create_future()
+
+        _definitions = "/device?where=IsThisDevice:false"
+
+        _session._leap = FakeLeap("Home")  # type: ignore
+        await _session._initialize()
+        assert _definitions in _session._leap.urls
+
+        # Reconnect to the same project
+        _session._leap = FakeLeap("Home")  # type: ignore
+        await _session._initialize()
+        assert _definitions not in _session._leap.urls
+        assert "/zone/status" in _session._leap.urls
+        assert _session._leap.urls.count("/area/status") == 1
+
+        # The project was transferred again while disconnected
+        _session._leap = FakeLeap("Home v2")  # type: ignore
+        await _session._initialize()
+        assert _definitions in _session._leap.urls
+
+        assert _session.syncs == {"full": 2, "status": 1}
+
+    asyncio.run(_test())
+
+
+async def _until(condition: Callable[[], bool]) -> None:
+    async def _wait():
+        while not condition():
+            await asyncio.sleep(0)
+
+    await asyncio.wait_for(_wait(), 1)
+
+
+def test_events_during_initialize_are_not_overwritten():
+    async def _test():
+        _session = LeapSession("localhost")
+        _session._login_completed.set_result(None)
+        _session._monitor_task = asyncio.get_running_loop().create_future()
+
+        _session._leap = FakeLeap("Home")  # type: ignore
+        await _session._initialize()
+
+        # Reconnect; the status read is answered while /project is not
+        _leap = FakeLeap("Home")
+        _leap.levels = {1: 10}
+        _leap.gates["/project"] = asyncio.Event()
+        _session._leap = _leap  # type: ignore
+        _initialize = asyncio.create_task(_session._initialize())
+        await _until(lambda: _session.models.get(Zone, 1) is not None)
+        assert _session.models.get(Zone, 1).level == 10  # type: ignore
+
+        # An event that comes in after the status read isn't undone by it
+        await _session.handle_response(
+            read_response(
+                "OneZoneStatus",
+                "/zone/status",
+                {"ZoneStatus": {"href": "/zone/1/status", "Level": 70}},
+            )
+        )
+        _leap.gates["/project"].set()
+        await _initialize
+
+        assert _session.models.get(Zone, 1).level == 70  # type: ignore
+        assert _session.syncs == {"full": 1, "status": 1}
+
+    asyncio.run(_test())
+
+
+def test_initialize_pipelines_requests():
+    async def _test():
+        _session = LeapSession("localhost")
+        _session._login_completed.set_result(None)
+        _session._monitor_task = asyncio.get_running_loop().create_future()
+        _session._connect_started = time.perf_counter()
+
+        _handled: List[str] = []
+
+        async def _handle_response(response):
+            _handled.append(response.Header.Url)
+
+        _session.handle_response = _handle_response  # type: ignore
+        _urls = [
+            "/zone/status",
+            "/area/status",
+            "/occupancygroup/status",
+            "/device?where=IsThisDevice:true",
+            "/device?where=IsThisDevice:false",
+            "/project",
+        ]
+        _leap = FakeLeap("Home")
+        _leap.gates = {x: asyncio.Event() for x in _urls}
+        _session._leap = _leap  # type: ignore
+        _initialize = asyncio.create_task(_session._initialize())
+
+        # Three subscriptions, the project and two device reads are all sent
+        # before any is answered
+        await _until(lambda: len(_leap.urls) == len(_urls))
+        assert sorted(_leap.urls) == sorted(_urls)
+
+        # Answered last one first, but applied in order
+        for url in reversed(_urls):
+            _leap.gates[url].set()
+            await asyncio.sleep(0)
+        await _initialize
+
+        assert _handled == [
+            "/zone/status",
+            "/area/status",
+            "/device?where=IsThisDevice:true",
+            "/device?where=IsThisDevice:false",
+        ]
+        assert _session.ready_time is not None and _session.ready_time > 0
+        assert _session._ready_metric.labels("full").count == 1
+
+    asyncio.run(_test())
+
+
+def test_resync_without_lazy_decode():
+    async def _test():
+        _session = LeapSession("localhost")
+        _session._login_completed.set_result(None)
+        _session._monitor_task = asyncio.get_running_loop().create_future()
+
+        _definitions = "/device?where=IsThisDevice:false"
+        for _ in range(2):
+            _session._leap = FakeLeap("Home")  # type: ignore
+            _session._leap.lazy = False
+            await _session._initialize()
+
+        assert _definitions not in _session._leap.urls
+        assert _session.syncs == {"full": 1, "status": 1}
+
+    asyncio.run(_test())
+
+
+def test_reconnect_backoff():
+    async def _test():
+        _session = LeapSession("localhost")
+        _delays = [_session._reconnect_delay() for _ in range(10)]
+
+        assert RECONNECT_DELAY / 2 <= _delays[0] <= RECONNECT_DELAY
+        assert 2 * RECONNECT_DELAY <= _delays[3] <= 8 * RECONNECT_DELAY
+        assert max(_delays) <= RECONNECT_MAX_DELAY
+        assert _delays[-1] >= RECONNECT_MAX_DELAY / 2
+
+    asyncio.run(_test())
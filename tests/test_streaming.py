@@ -0,0 +1,169 @@
+import asyncio
+import json
+from dataclasses import dataclass
+
+import pytest
+from marshmallow import ValidationError
+
+from pylutron_leap.api.codec import decode_message, register_body_type
+from pylutron_leap.api.enum import MessageBodyTypeEnum
+from pylutron_leap.api.streaming import (
+    StreamedArray,
+    _array_end,
+    _stream_body,
+    decode_streamed,
+)
+from pylutron_leap.api.zone import LeapMultiZoneBody
+from pylutron_leap.leap import FRAMING_PROTOCOL, FRAMING_STREAM, open_connection
+
+
+def _zone_statuses(count: int, tag=None) -> dict:
+    _header = {
+        "MessageBodyType": "MultipleZoneStatus",
+        "StatusCode": "200 OK",
+        "Url": "/zone/status",
+    }
+    if tag is not None:
+        _header["ClientTag"] = tag
+    return {
+        "CommuniqueType": "ReadResponse",
+        "Header": _header,
+        "Body": {
+            "ZoneStatuses": [
+                {
+                    "href": f"/zone/{x}/status",
+                    "Level": x % 101,
+                    "StatusAccuracy": "Good",
+                }
+                for x in range(count)
+            ]
+        },
+    }
+
+
+def test_streamed_matches_decoded():
+    _data = _zone_statuses(50)
+    _decoded = decode_message(_data)
+
+    for text in [json.dumps(_data), json.dumps(_data, indent=2)]:
+        _streamed = decode_streamed(text.encode("UTF-8"))
+        assert _streamed is not None
+        assert _streamed.Header == _decoded.Header
+        assert isinstance(_streamed.Body.ZoneStatuses, StreamedArray)
+        assert list(_streamed.Body.ZoneStatuses) == _decoded.Body.ZoneStatuses
+        assert len(_streamed.Body.ZoneStatuses) == 50
+        assert _streamed.related_ids() == _decoded.related_ids()
+
+        # Indexing works like on a list, and keeps the decoded elements
+        _statuses = _streamed.Body.ZoneStatuses
+        assert _statuses[3] == _decoded.Body.ZoneStatuses[3]
+        assert _statuses[-2:] == _decoded.Body.ZoneStatuses[-2:]
+        assert _statuses[0] is next(iter(_statuses))
+        assert list(_statuses) == _decoded.Body.ZoneStatuses
+
+
+def test_members_after_the_array():
+    _data = _zone_statuses(3)
+    _data["Trailer"] = {"List": [3]}
+
+    _streamed = decode_streamed(json.dumps(_data).encode("UTF-8"))
+    assert _streamed is not None
+    assert len(list(_streamed.Body.ZoneStatuses)) == 3
+
+    # An array after the streamed one is a member of its own
+    _data["Body"]["Extra"] = [1, 2]
+    del _data["Trailer"]
+    _text = json.dumps(_data)
+    _start = _text.index('{"ZoneStatuses"')
+    _body, _, _array = _stream_body(_text, _start, "ZoneStatuses")
+    assert _body == {"Extra": [1, 2]}
+    assert _array == ("ZoneStatuses", _text.index("[", _start))
+
+    # It isn't a field of the body, so it fails as it does decoded whole
+    _streamed = decode_streamed(_text.encode("UTF-8"))
+    assert _streamed is not None
+    with pytest.raises(ValidationError):
+        _streamed.Body
+
+
+def test_array_end_skips_strings():
+    _text = '{"A": [["]"], "[", {"B": [1]}], "C": [2]}}'
+    _start = _text.index("[")
+    assert _text[_array_end(_text, _start) :] == ', "C": [2]}}'
+
+    with pytest.raises(ValueError):
+        _array_end('{"A": [1, "]"', 6)
+
+
+def test_body_that_does_not_match_its_type():
+    @dataclass
+    class _Other:
+        Other: str
+
+    register_body_type(MessageBodyTypeEnum.MultipleZoneStatus, _Other)
+    try:
+        _data = _zone_statuses(3)
+        _streamed = decode_streamed(json.dumps(_data).encode("UTF-8"))
+        assert _streamed is not None
+        assert _streamed.Body == decode_message(_data).Body
+    finally:
+        register_body_type(MessageBodyTypeEnum.MultipleZoneStatus, LeapMultiZoneBody)
+
+
+def test_not_streamed():
+    # No array to stream
+    _ping = {
+        "CommuniqueType": "ReadResponse",
+        "Header": {
+            "MessageBodyType": "OnePingResponse",
+            "Url": "/server/1/status/ping",
+        },
+        "Body": {"PingResponse": {"LEAPVersion": 1.115}},
+    }
+    assert decode_streamed(json.dumps(_ping).encode("UTF-8")) is None
+
+    # Body before Header
+    _data = _zone_statuses(3)
+    _reordered = {"Body": _data["Body"], **_data}
+    assert decode_streamed(json.dumps(_reordered).encode("UTF-8")) is None
+
+    assert decode_streamed(b'{"Header": ') is None
+
+
+@pytest.mark.parametrize("framing", [FRAMING_PROTOCOL, FRAMING_STREAM])
+def test_lines_longer_than_the_limit(framing):
+    # A few thousand zones make a line well past the old 64 KiB limit
+    _frame = json.dumps(_zone_statuses(5000, tag="big")).encode("UTF-8")
+    assert len(_frame) > 2**16
+
+    async def _test():
+        async def _handle(reader, writer):
+            await reader.readline()
+            writer.write(_frame + b"\r\n")
+            await writer.drain()
+            await reader.read()
+            writer.close()
+
+        _server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+        _port = _server.sockets[0].getsockname()[1]
+
+        async with _server:
+            _leap = await open_connection("127.0.0.1", _port, framing=framing)
+            _task = asyncio.create_task(_leap.run())
+
+            _response = await _leap.request(
+                decode_message(
+                    {
+                        "CommuniqueType": "ReadRequest",
+                        "Header": {"Url": "/zone/status", "ClientTag": "big"},
+                    }
+                ),
+                timeout=5,
+            )
+            _levels = [x.Level for x in _response.Body.ZoneStatuses]
+            assert _levels == [x % 101 for x in range(5000)]
+
+            _leap.close()
+            await asyncio.wait_for(_task, 5)
+
+    asyncio.run(_test())
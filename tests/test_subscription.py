@@ -0,0 +1,155 @@
+import asyncio
+from typing import List, Optional
+
+from pylutron_leap.api.codec import decode_message
+from pylutron_leap.models.messages import get_all_area_subscribe, get_all_zone_subscribe
+from pylutron_leap.subscription import SubscriptionManager
+
+
+class FakeConnection:
+    """Accept every subscription, recording what was sent."""
+
+    def __init__(self, status: str = "200 OK"):
+        self.status = status
+        self.subscribed: List[str] = []
+        self.unsubscribed: List[str] = []
+        self.queued: List[str] = []
+        self.callbacks = {}
+        self.unsubscribe_gate: Optional[asyncio.Event] = None
+
+    async def subscribe(self, message, callback, timeout=None, queue_response=False):
+        _url = message.Header.Url
+        _tag = f"{_url}-{len(self.subscribed)}"
+        self.subscribed.append(_url)
+        self.callbacks[_tag] = callback
+
+        _response = decode_message(
+            {
+                "CommuniqueType": "SubscribeResponse",
+                "Header": {"StatusCode": self.status, "Url": _url, "ClientTag": _tag},
+            }
+        )
+        if queue_response and _response.Header.StatusCode.is_successful():
+            # Like LeapProtocol, which gives it to the subscription's queue
+            self.queued.append(_url)
+            await callback(_response)
+        return _response, _tag
+
+    async def unsubscribe(self, tag, timeout=None):
+        if self.unsubscribe_gate is not None:
+            await self.unsubscribe_gate.wait()
+        self.unsubscribed.append(tag)
+
+
+def _recorder(received: List[str], name: str):
+    async def _callback(message):
+        received.append(name)
+
+    return _callback
+
+
+def test_dedupe_and_refcount():
+    async def _test():
+        _connection = FakeConnection()
+        _manager = SubscriptionManager(lambda: _connection)
+        _received: List[str] = []
+
+        _, _first = await _manager.subscribe(
+            get_all_zone_subscribe(), _recorder(_received, "first")
+        )
+        _, _second = await _manager.subscribe(
+            get_all_zone_subscribe(), _recorder(_received, "second")
+        )
+        assert _connection.subscribed == ["/zone/status"]
+        assert _manager.consumers("/zone/status") == 2
+        assert _first.tag == _second.tag
+
+        # Both consumers get the messages of the one wire subscription
+        await _connection.callbacks[_first.tag](None)
+        assert _received == ["first", "second"]
+
+        _tag = _first.tag
+        await _first.cancel()
+        assert _connection.unsubscribed == []
+        await _second.cancel()
+        assert _connection.unsubscribed == [_tag]
+        assert len(_manager) == 0
+
+        # Cancelling twice does nothing
+        await _second.cancel()
+        assert _connection.unsubscribed == [_tag]
+
+    asyncio.run(_test())
+
+
+def test_restore_after_reconnect():
+    async def _test():
+        _connection = FakeConnection()
+        _manager = SubscriptionManager(lambda: _connection)
+        _received: List[str] = []
+
+        await _manager.subscribe(get_all_zone_subscribe(), _recorder(_received, "zone"))
+        await _manager.subscribe(get_all_area_subscribe(), _recorder(_received, "area"))
+
+        _connection = FakeConnection()
+        await _manager.restore()
+
+        assert sorted(_connection.subscribed) == ["/area/status", "/zone/status"]
+        # The new responses carry the current state to the consumers, through
+        # the queues of the subscriptions
+        assert sorted(_received) == ["area", "zone"]
+        assert sorted(_connection.queued) == ["/area/status", "/zone/status"]
+
+    asyncio.run(_test())
+
+
+def test_failed_subscription_is_retried():
+    async def _test():
+        _connection = FakeConnection("404 NotFound")
+        _manager = SubscriptionManager(lambda: _connection)
+
+        _response, _subscription = await _manager.subscribe(
+            get_all_zone_subscribe(), _recorder([], "zone")
+        )
+        assert not _response.Header.StatusCode.is_successful()
+        assert _subscription.tag is None
+
+        _connection.status = "200 OK"
+        await _manager.subscribe(get_all_zone_subscribe(), _recorder([], "zone"))
+        assert _connection.subscribed == ["/zone/status", "/zone/status"]
+        assert _subscription.tag is not None
+
+    asyncio.run(_test())
+
+
+def test_resubscribe_while_unsubscribing():
+    async def _test():
+        _connection = FakeConnection()
+        _connection.unsubscribe_gate = asyncio.Event()
+        _manager = SubscriptionManager(lambda: _connection)
+
+        _, _old = await _manager.subscribe(
+            get_all_zone_subscribe(), _recorder([], "old")
+        )
+        _old_tag = _old.tag
+        _cancel = asyncio.create_task(_old.cancel())
+        await asyncio.sleep(0.01)
+
+        # Subscribing again waits for the old wire to be torn down
+        _subscribe = asyncio.create_task(
+            _manager.subscribe(get_all_zone_subscribe(), _recorder([], "new"))
+        )
+        await asyncio.sleep(0.01)
+        assert not _subscribe.done()
+
+        _connection.unsubscribe_gate.set()
+        await _cancel
+        _, _new = await asyncio.wait_for(_subscribe, 1)
+
+        assert _connection.unsubscribed == [_old_tag]
+        assert _connection.subscribed == ["/zone/status", "/zone/status"]
+        assert _new.active
+        assert _new.tag is not None and _new.tag != _old_tag
+        assert _manager.consumers("/zone/status") == 1
+
+    asyncio.run(_test())
@@ -0,0 +1,53 @@
+import logging
+import subprocess
+import sys
+
+import pytest
+
+from pylutron_leap.traffic import TRAFFIC_LOGGER, TrafficLog, redact
+
+
+def test_import_leaves_logging_alone():
+    _output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import logging, pylutron_leap.session;"
+            "print(logging.getLogger().handlers, logging.getLogger().level)",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert _output.strip() == f"[] {logging.WARNING}"
+
+
+def test_sampling(caplog):
+    _log = TrafficLog(sample_every=3, max_bytes=8)
+
+    with caplog.at_level(logging.INFO, logger=TRAFFIC_LOGGER):
+        for _ in range(6):
+            _log.received(b"ignored")
+    assert caplog.records == []
+
+    with caplog.at_level(logging.DEBUG, logger=TRAFFIC_LOGGER):
+        for number in range(6):
+            _log.received(b'{"frame": %d}' % number)
+            _log.sent(b"short")
+
+    _messages = [x.getMessage() for x in caplog.records]
+    assert _messages == [
+        '<< #3 (12 bytes) {"frame"',
+        ">> #3 (5 bytes) short",
+        '<< #6 (12 bytes) {"frame"',
+        ">> #6 (5 bytes) short",
+    ]
+
+    with pytest.raises(ValueError):
+        TrafficLog(sample_every=0)
+
+
+def test_redact():
+    _login = b'{"Login":{"LoginId":"lutron","Password":"se\\"cret"}}'
+    assert redact(_login) == b'{"Login":{"LoginId":"lutron","Password":"***"}}'
+    assert redact(b'{"Url":"/zone/1"}') == b'{"Url":"/zone/1"}'
@@ -0,0 +1,61 @@
+import asyncio
+import ssl
+from pathlib import Path
+
+import pytest
+
+from pylutron_leap.leap import open_connection
+from pylutron_leap.transport import clear_ssl_context_cache, get_leap_ssl_context
+
+CERTS = Path(__file__).parent / "certs"
+
+
+def _server_context() -> ssl.SSLContext:
+    _context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    _context.load_cert_chain(CERTS / "bridge.crt", CERTS / "bridge.key")
+    return _context
+
+
+def test_context_shared():
+    clear_ssl_context_cache()
+    _context = get_leap_ssl_context(ca_chain=CERTS / "bridge.crt")
+
+    assert get_leap_ssl_context(ca_chain=CERTS / "bridge.crt") is _context
+    assert get_leap_ssl_context() is not _context
+    assert _context.verify_mode == ssl.CERT_REQUIRED
+
+    with pytest.raises(ValueError):
+        get_leap_ssl_context(keyfile=CERTS / "bridge.key")
+
+
+def test_tls_session_resumed():
+    async def _test():
+        async def _handle(reader, writer):
+            await reader.read()
+            writer.close()
+
+        _server = await asyncio.start_server(
+            _handle, "127.0.0.1", 0, ssl=_server_context()
+        )
+        _port = _server.sockets[0].getsockname()[1]
+        _context = get_leap_ssl_context()
+
+        async with _server:
+            _first = await open_connection(
+                "127.0.0.1", _port, ssl=_context, server_hostname=""
+            )
+            assert not _first.tls_session_reused
+            _session = _first.tls_session
+            _first.close()
+
+            _second = await open_connection(
+                "127.0.0.1",
+                _port,
+                ssl=_context,
+                server_hostname="",
+                tls_session=_session,
+            )
+            assert _second.tls_session_reused
+            _second.close()
+
+    asyncio.run(_test())